@@ -78,50 +78,51 @@ def run_daily_alert_check():
 
         airport_alerts = alerts_by_airport.get(airport_code, [])
 
-        for friday, sunday in weekends:
-            data = scraper.search_flights(friday, sunday)
-            if not data:
-                continue
-
-            results = data.get("everywhereDestination", {}).get("results", [])
-
-            for result in results:
-                if result.get("type") != "LOCATION":
+        try:
+            for friday, sunday in weekends:
+                data = scraper.search_flights(friday, sunday)
+                if not data:
                     continue
-                content = result.get("content", {})
-                location = content.get("location", {})
-                fq = content.get("flightQuotes", {})
-                if not fq:
-                    continue
-                raw_price = fq.get("cheapest", {}).get("rawPrice", 9999)
-                city_name = location.get("name", "?")
-                country_name = location.get("countryName", "") or city_name
-                sky_code = location.get("skyCode", "")
-                url = (
-                    f"https://www.skyscanner.at/transport/fluge/{airport_code}/{sky_code.lower()}/"
-                    f"{friday.strftime('%y%m%d')}/{sunday.strftime('%y%m%d')}/"
-                    f"?adultsv2=1&cabinclass=economy&rtn=1&preferdirects=true"
-                )
-
-                # Collect for public deals (under 100€)
-                if raw_price <= 100:
-                    if airport_code not in public_deals_by_airport:
-                        public_deals_by_airport[airport_code] = []
-                    public_deals_by_airport[airport_code].append({
-                        "city": city_name, "country": country_name, "price": raw_price,
-                        "departure_date": friday.strftime("%Y-%m-%d"), "return_date": sunday.strftime("%Y-%m-%d"),
-                        "url": url, "sky_code": sky_code,
-                    })
-
-                # Send Telegram alerts for matching user alerts
-                for alert in airport_alerts:
-                    if raw_price <= alert["max_price"]:
-                        if not hasattr(alert, '_deals'):
-                            alert['_deals'] = []
-                        alert['_deals'].append({"city": city_name, "price": raw_price, "url": url,
-                                                "date_str": f"{friday.strftime('%d.%m.')} – {sunday.strftime('%d.%m.')}"})
-
-            time.sleep(1)  # Pause between weekends
+
+                results = data.get("everywhereDestination", {}).get("results", [])
+
+                for result in results:
+                    if result.get("type") != "LOCATION":
+                        continue
+                    content = result.get("content", {})
+                    location = content.get("location", {})
+                    fq = content.get("flightQuotes", {})
+                    if not fq:
+                        continue
+                    raw_price = fq.get("cheapest", {}).get("rawPrice", 9999)
+                    city_name = location.get("name", "?")
+                    country_name = location.get("countryName", "") or city_name
+                    sky_code = location.get("skyCode", "")
+                    url = (
+                        f"https://www.skyscanner.at/transport/fluge/{airport_code}/{sky_code.lower()}/"
+                        f"{friday.strftime('%y%m%d')}/{sunday.strftime('%y%m%d')}/"
+                        f"?adultsv2=1&cabinclass=economy&rtn=1&preferdirects=true"
+                    )
+
+                    # Collect for public deals (under 100€)
+                    if raw_price <= 100:
+                        if airport_code not in public_deals_by_airport:
+                            public_deals_by_airport[airport_code] = []
+                        public_deals_by_airport[airport_code].append({
+                            "city": city_name, "country": country_name, "price": raw_price,
+                            "departure_date": friday.strftime("%Y-%m-%d"), "return_date": sunday.strftime("%Y-%m-%d"),
+                            "url": url, "sky_code": sky_code,
+                        })
+
+                    # Send Telegram alerts for matching user alerts
+                    for alert in airport_alerts:
+                        if raw_price <= alert["max_price"]:
+                            if not hasattr(alert, '_deals'):
+                                alert['_deals'] = []
+                            alert['_deals'].append({"city": city_name, "price": raw_price, "url": url,
+                                                    "date_str": f"{friday.strftime('%d.%m.')} – {sunday.strftime('%d.%m.')}"})
+        finally:
+            scraper.close()
 
     # Send Telegram messages for user alerts
     for airport_code, airport_alerts in alerts_by_airport.items():
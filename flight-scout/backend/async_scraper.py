@@ -0,0 +1,541 @@
+"""
+Skyscanner Scraper - Async Engine
+Gleiche Semantik wie SkyscannerAPI (search_flights, search_country_cities,
+get_specific_flight_details, scrape_weekend), aber auf httpx.AsyncClient:
+ein Event-Loop treibt alle Trips, die Anzahl gleichzeitiger Requests wird
+über eine gemeinsame Semaphore begrenzt. Bodies, Cache-Keys, Parsing und Deal-Bau
+kommen aus scraper.SkyscannerBase, nichts aus der Thread-Engine (requests/Session-Pool).
+"""
+
+import asyncio
+import os
+import ssl
+import uuid
+from datetime import datetime
+from typing import Optional
+
+import httpx
+
+from database import (
+    load_session_jar, save_session_jar, delete_session_jar,
+    get_cache, set_cache, CACHE_TTL_HOURS, COUNTRY_CACHE_TTL_HOURS, DETAIL_CACHE_TTL_HOURS, CACHE_STALE_MAX_HOURS,
+)
+from upstream import GOVERNOR, SINGLE_FLIGHT, BREAKER, HEDGER, TIMEOUTS, DETAIL_HEDGE, CircuitOpen
+from metrics import DETAIL_CITY_LATENCY
+from session_pool import jar_key, dump_cookies, load_cookies
+from proxies import PROXY_POOL
+from cache import TTL_STATS, PREWARM_TRACKER, effective_ttl, project_everywhere, project_country, project_detail
+from scraper import (
+    SkyscannerBase, FlightDeal, TripTask, CITY_DATABASE, RETRY_403_DELAYS,
+    HOMEPAGE_URL, FLIGHTS_PAGE_URL, EXPLORE_HEADERS,
+    _browser_profile, _browser_headers, _api_headers, _report_status,
+)
+
+# Max. gleichzeitige Skyscanner-Requests pro Event-Loop
+ASYNC_MAX_CONCURRENCY = int(os.environ.get("ASYNC_MAX_CONCURRENCY", "20"))
+
+# Einmal laden statt pro Client (CA-Bundle parsen kostet sonst bei jedem Trip)
+_SSL_CONTEXT = ssl.create_default_context()
+
+
+class AsyncSkyscannerAPI(SkyscannerBase):
+    def __init__(self, origin_entity_id="95673444", adults=1, start_hour=14, origin_sky_code="vie",
+                 max_return_hour=23, semaphore: Optional[asyncio.Semaphore] = None):
+        super().__init__(origin_entity_id, adults, start_hour, origin_sky_code, max_return_hour)
+        # Kein Warmup im Konstruktor – die Session wird beim ersten Request aufgebaut
+        self.client: Optional[httpx.AsyncClient] = None
+        self.proxy_url: Optional[str] = None
+        self.traveller_context = str(uuid.uuid4())
+        self.view_id = str(uuid.uuid4())
+        self._semaphore = semaphore
+        self._hedge_worker: Optional["AsyncSkyscannerAPI"] = None  # eigener Client für Hedge-Requests
+        self._hedge_warmup: Optional[asyncio.Task] = None
+
+    def _spawn_worker(self):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(ASYNC_MAX_CONCURRENCY)
+        worker = super()._spawn_worker()
+        worker._semaphore = self._semaphore
+        return worker
+
+    def _apply_proxy(self):
+        """Pick the healthiest proxy for the next client (not the one that just failed)."""
+        self.proxy_url = PROXY_POOL.pick(exclude=self.proxy_url)
+
+    def _is_proxy_error(self, exc):
+        return isinstance(exc, httpx.ProxyError) or super()._is_proxy_error(exc)
+
+    async def _request(self, method: str, url: str, kind: Optional[str] = None, recorder=None,
+                       **kwargs) -> httpx.Response:
+        """kind (warmup | everywhere | country | detail) setzt den adaptiven Timeout und wird gemessen."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(ASYNC_MAX_CONCURRENCY)
+        if method == "POST" and not BREAKER.allow():
+            raise CircuitOpen()
+        # Erst Budget abwarten, dann Slot belegen – sonst blockiert Warten die Semaphore
+        await GOVERNOR.wait_async(self.proxy_url)
+        if kind is not None:
+            kwargs["timeout"] = TIMEOUTS.timeout(kind, self.proxy_url)
+        async with self._semaphore:
+            started = asyncio.get_running_loop().time()
+            try:
+                response = await self.client.request(method, url, **kwargs)
+            except Exception as e:
+                if kind is not None and isinstance(e, httpx.TimeoutException):
+                    TIMEOUTS.record_timeout(kind, self.proxy_url, asyncio.get_running_loop().time() - started)
+                if self._is_proxy_error(e):
+                    PROXY_POOL.report_error(self.proxy_url)
+                raise
+            latency = asyncio.get_running_loop().time() - started
+        if kind is not None:
+            TIMEOUTS.record(kind, self.proxy_url, latency)
+        if recorder is not None:
+            recorder.record(latency)
+        if method == "POST":
+            _report_status(response.status_code, self.proxy_url, latency)
+        elif url == HOMEPAGE_URL:
+            PROXY_POOL.report_success(self.proxy_url, latency)
+        return response
+
+    async def _ensure_session(self):
+        if self.client is None:
+            await self._setup_session()
+
+    async def aclose(self):
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+        if self._hedge_warmup is not None:
+            self._hedge_warmup.cancel()
+            self._hedge_warmup = None
+        if self._hedge_worker is not None:
+            await self._hedge_worker.aclose()
+            self._hedge_worker = None
+
+    async def _detail_request(self, body: dict) -> httpx.Response:
+        await self._ensure_session()
+        h = self.client.headers.copy()
+        for name in EXPLORE_HEADERS:
+            h.pop(name, None)
+        return await self._request("POST", self.API_URL, "detail", HEDGER.latency, json=body, headers=h)
+
+    async def _post_detail(self, body: dict) -> httpx.Response:
+        """Wie SkyscannerAPI._post_detail: nach HEDGER.delay() ohne Antwort derselbe Request über
+        einen zweiten Client (anderer Proxy), die erste 200 gewinnt."""
+        if not DETAIL_HEDGE:
+            return await self._detail_request(body)
+        HEDGER.start()
+        delay = HEDGER.delay()
+        primary = asyncio.ensure_future(self._detail_request(body))
+        self._hedge_ready()  # Hedge-Client während der Wartezeit wärmen, falls noch keiner da ist
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done or not HEDGER.try_hedge(session_available=self._hedge_ready()):
+            return await primary
+        print(f"  [HEDGE] Detail nach {delay:.1f}s ohne Antwort -> zweiter Client")
+        secondary = asyncio.ensure_future(self._hedge_worker._detail_request(body))
+        pending = {primary, secondary}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None and task.result().status_code == 200:
+                    if task is secondary:
+                        HEDGER.record_win()
+                    for other in pending:
+                        # Verlierer läuft zu Ende, Fehler nicht als "never retrieved" loggen
+                        other.add_done_callback(lambda t: t.cancelled() or t.exception())
+                    return task.result()
+        if secondary.exception() is None and secondary.result().status_code == 403:
+            await self._hedge_worker.aclose()  # nächster Hedge baut neuen Client auf anderem Proxy auf
+        return await primary
+
+    def _hedge_ready(self) -> bool:
+        """Hedge-Client fertig gewärmt? Sonst im Hintergrund aufbauen (für den nächsten Hedge),
+        wie der Session-Pool im Thread-Engine – ein Warmup hält nie den Caller auf."""
+        if self._hedge_worker is None:
+            self._hedge_worker = self._spawn_worker()
+            self._hedge_worker.proxy_url = self.proxy_url  # _apply_proxy wählt dann einen anderen
+        warmup = self._hedge_warmup
+        if warmup is not None and not warmup.done():
+            return False
+        if warmup is not None and not warmup.cancelled() and warmup.exception() is None \
+                and self._hedge_worker.client is not None:
+            return True
+        # Noch nie gewärmt, Warmup fehlgeschlagen oder Client nach 403 geschlossen
+        self._hedge_warmup = asyncio.ensure_future(self._hedge_worker._ensure_session())
+        return False
+
+    async def _restore_jar(self) -> bool:
+        """Gespeicherten Cookie-Jar des Proxys in den neuen Client übernehmen (wie scraper._restore_session)."""
+        key = jar_key(self.proxy_url)
+        jar = await asyncio.to_thread(load_session_jar, key)
+        if jar is None:
+            return False
+        if not load_cookies(self.client.cookies.jar, jar["cookies"]):
+            await asyncio.to_thread(delete_session_jar, key)
+            return False
+        self.traveller_context = jar["traveller_context"]
+        self.view_id = jar["view_id"]
+        self.client.headers.update(_api_headers(jar["user_agent"], jar["sec_ch_ua"], jar["platform"],
+                                                self.traveller_context, self.view_id))
+        print(f"  [SESSION] Cookie-Jar übernommen, kein Warmup (Cookies: {len(self.client.cookies)})")
+        return True
+
+    async def _forget_jar(self):
+        """403: Jar dieses Clients nicht wiederverwenden."""
+        await asyncio.to_thread(delete_session_jar, jar_key(self.proxy_url), self.traveller_context)
+
+    async def _setup_session(self, max_proxy_retries=5):
+        # Neuer Client: gespeicherter Cookie-Jar des Proxys, sonst Warmup mit frischen IDs
+        warmed = False
+        for attempt in range(max_proxy_retries):
+            await self.aclose()
+            self._apply_proxy()
+            self.client = httpx.AsyncClient(proxy=self.proxy_url, timeout=30, follow_redirects=True, verify=_SSL_CONTEXT)
+            if await self._restore_jar():
+                return
+            self.traveller_context = str(uuid.uuid4())
+            self.view_id = str(uuid.uuid4())
+            ua, sec_ch_ua, platform = _browser_profile()
+
+            browser_headers = _browser_headers(ua, sec_ch_ua, platform)
+            try:
+                await self._request("GET", HOMEPAGE_URL, "warmup", headers=browser_headers)
+
+                browser_headers["referer"] = HOMEPAGE_URL
+                browser_headers["sec-fetch-site"] = "same-origin"
+                await self._request("GET", FLIGHTS_PAGE_URL, "warmup", headers=browser_headers)
+                warmed = True
+                break  # Warmup OK
+            except Exception as e:
+                if self._is_proxy_error(e) and attempt < max_proxy_retries - 1:
+                    print(f"  [SESSION] Proxy-Fehler, versuche anderen Proxy... ({attempt + 1}/{max_proxy_retries})")
+                    continue
+                print(f"  [SESSION] Warmup-Fehler: {e}")
+
+        self.client.headers.update(_api_headers(ua, sec_ch_ua, platform, self.traveller_context, self.view_id))
+        print(f"  [SESSION] Neuer Async-Client bereit (Cookies: {len(self.client.cookies)})")
+        if warmed and len(self.client.cookies):
+            await asyncio.to_thread(save_session_jar, jar_key(self.proxy_url), dump_cookies(self.client.cookies.jar),
+                                    ua, sec_ch_ua, platform, self.traveller_context, self.view_id)
+
+    async def _retry_on_403(self, make_request, label="API", cancel_check=None):
+        """Wie SkyscannerAPI._retry_on_403, wartet aber mit asyncio.sleep statt den Thread zu blockieren."""
+        for proxy_attempt in range(5):
+            try:
+                response = await make_request()
+                break
+            except Exception as e:
+                if self._is_proxy_error(e) and proxy_attempt < 4:
+                    print(f"  [{label}] Proxy-Fehler, wechsle Proxy... ({proxy_attempt + 1}/5)")
+                    await self._setup_session()
+                    continue
+                raise
+
+        if response.status_code != 403:
+            return response
+
+        if BREAKER.degraded:
+            print(f"  [{label}] 403 BLOCKED - Circuit-Breaker offen, kein Retry")
+            return response
+
+        for retry_wait in RETRY_403_DELAYS:
+            if cancel_check and cancel_check():
+                print(f"  [{label}] Abbruch während Retry")
+                return response
+            print(f"  [{label}] 403 BLOCKED - Warte {retry_wait}s, neue Session...")
+            for _ in range(retry_wait):
+                if cancel_check and cancel_check():
+                    print(f"  [{label}] Abbruch während Warten")
+                    return response
+                await asyncio.sleep(1)
+            await self._forget_jar()
+            await self._setup_session()
+            try:
+                response = await make_request()
+            except Exception as e:
+                if self._is_proxy_error(e):
+                    print(f"  [{label}] Proxy-Fehler beim Retry, neue Session...")
+                    await self._setup_session()
+                    continue
+                raise
+            print(f"  [{label}] Retry -> HTTP {response.status_code}")
+            if response.status_code != 403:
+                self._is_blocked = False
+                return response
+
+        return response
+
+    async def _fetch(self, body: dict, label: str, kind: str, cancel_check=None,
+                     bucket: Optional[str] = None) -> tuple[int, Optional[dict]]:
+        if bucket:
+            TTL_STATS.record(bucket, "upstream")
+        await self._ensure_session()
+        response = await self._retry_on_403(
+            lambda: self._request("POST", self.API_URL, kind, json=body),
+            label=label,
+            cancel_check=cancel_check,
+        )
+        return self._json_result(response)
+
+    async def search_flights(self, departure: datetime, return_date: datetime, cancel_check=None) -> dict:
+        cache_key = self._everywhere_cache_key(departure, return_date)
+        bucket, ttl = effective_ttl(CACHE_TTL_HOURS, departure)
+        cached, stale = await asyncio.to_thread(self._cached_everywhere, cache_key, departure, return_date, bucket)
+        if cached:
+            return cached
+
+        body = self._everywhere_body(departure, return_date)
+        label = f"EVERYWHERE {self.ORIGIN_SKY_CODE} {departure.strftime('%d.%m.')}"
+        if await asyncio.to_thread(self._negative, cache_key, label):
+            return self._stale_fallback(stale, label)
+        try:
+            status, data = await SINGLE_FLIGHT.do_async(
+                SINGLE_FLIGHT.key("everywhere", body),
+                lambda: self._fetch(body, label, "everywhere", cancel_check, bucket),
+                cancel_check,
+            )
+            print(f"[{label}] -> HTTP {status}")
+            if status == 200:
+                results = data.get("everywhereDestination", {}).get("results", [])
+                print(f"[{label}] {len(results)} Ergebnisse")
+                if not results:
+                    await asyncio.to_thread(self._remember_failure, cache_key, status, cancel_check, "empty")
+                    return self._stale_fallback(stale, label)
+                await asyncio.to_thread(set_cache, cache_key, project_everywhere(data), ttl, CACHE_STALE_MAX_HOURS)
+                PREWARM_TRACKER.forget(cache_key)
+                return data
+            print(f"[{label}] Fehlgeschlagen! Status {status}")
+            await asyncio.to_thread(self._remember_failure, cache_key, status, cancel_check)
+            return self._stale_fallback(stale, label)
+        except CircuitOpen:
+            return self._stale_fallback(stale, label)
+        except Exception as e:
+            print(f"[{label}] Exception: {e}")
+            await asyncio.to_thread(self._remember_failure, cache_key, None, cancel_check)
+            return self._stale_fallback(stale, label)
+
+    async def get_specific_flight_details(self, destination_entity_id: str, departure: datetime, return_date: datetime,
+                                          cache_only: bool = False) -> Optional[dict]:
+        clean_dest_id = str(destination_entity_id).replace("location-", "")
+        cache_key = self._detail_cache_key(clean_dest_id, departure, return_date)
+        bucket, ttl = effective_ttl(DETAIL_CACHE_TTL_HOURS, departure)
+        cached = await asyncio.to_thread(get_cache, cache_key)
+        if cached is not None:
+            TTL_STATS.record(bucket, "hits")
+            print(f"  [CACHE HIT] Detail {clean_dest_id}")
+            return self._parse_flight_details(cached, departure)
+        TTL_STATS.record(bucket, "misses")
+        if cache_only:
+            # Trip geblockt (403 / Circuit-Breaker): Cache-Treffer ja, Upstream nein
+            return {"status": "blocked", "cache_only": True}
+        negative = await asyncio.to_thread(self._negative, cache_key, f"DETAIL {clean_dest_id}")
+        if negative:
+            return self._negative_details(negative)
+
+        body = self._detail_body(clean_dest_id, departure, return_date)
+
+        async def fetch():
+            TTL_STATS.record(bucket, "upstream")
+            started = asyncio.get_running_loop().time()
+            try:
+                return self._json_result(await self._post_detail(body))
+            finally:
+                DETAIL_CITY_LATENCY.record(clean_dest_id, asyncio.get_running_loop().time() - started)
+
+        try:
+            status, data = await SINGLE_FLIGHT.do_async(SINGLE_FLIGHT.key("detail", body), fetch)
+            print(f"  [API] {clean_dest_id} -> HTTP {status}")
+            if status == 403:
+                # Sofort aufgeben statt minutenlang warten - Caller nutzt Country-Preis
+                print(f"  [API] 403 -> Skip (Country-Preis wird verwendet)")
+                await asyncio.to_thread(self._remember_failure, cache_key, status)
+                return {"status": "blocked"}
+            if status != 200:
+                await asyncio.to_thread(self._remember_failure, cache_key, status)
+                return None
+            if not data.get("itineraries", {}).get("results"):
+                await asyncio.to_thread(self._remember_failure, cache_key, status, None, "empty")
+            else:
+                await asyncio.to_thread(set_cache, cache_key, project_detail(data), ttl)
+            return self._parse_flight_details(data, departure)
+        except CircuitOpen:
+            return {"status": "blocked"}
+        except Exception as e:
+            print(f"  [API] Exception: {e}")
+            await asyncio.to_thread(self._remember_failure, cache_key, None)
+            return None
+
+    async def search_country_cities(self, country_entity_id: str, departure: datetime, return_date: datetime, cancel_check=None) -> dict:
+        cache_key = self._country_cache_key(country_entity_id, departure, return_date)
+        bucket, ttl = effective_ttl(COUNTRY_CACHE_TTL_HOURS, departure)
+        cached = await asyncio.to_thread(get_cache, cache_key)
+        if cached is not None:
+            TTL_STATS.record(bucket, "hits")
+            print(f"  [CACHE HIT] Country {country_entity_id}")
+            return cached
+        TTL_STATS.record(bucket, "misses")
+        if await asyncio.to_thread(self._negative, cache_key, f"COUNTRY {country_entity_id}"):
+            return await asyncio.to_thread(self._stale_country, cache_key)
+
+        body = self._country_body(country_entity_id, departure, return_date)
+        try:
+            status, data = await SINGLE_FLIGHT.do_async(
+                SINGLE_FLIGHT.key("country", body),
+                lambda: self._fetch(body, f"COUNTRY {country_entity_id}", "country", cancel_check, bucket),
+                cancel_check,
+            )
+            print(f"  [COUNTRY] {country_entity_id} -> HTTP {status}")
+            if status == 200:
+                if not data.get("countryDestination", {}).get("results"):
+                    await asyncio.to_thread(self._remember_failure, cache_key, status, cancel_check, "empty")
+                    return data
+                await asyncio.to_thread(set_cache, cache_key, project_country(data), ttl, CACHE_STALE_MAX_HOURS)
+                return data
+            await asyncio.to_thread(self._remember_failure, cache_key, status, cancel_check)
+            return await asyncio.to_thread(self._stale_country, cache_key)
+        except CircuitOpen:
+            return await asyncio.to_thread(self._stale_country, cache_key)
+        except Exception as e:
+            print(f"  [COUNTRY] Exception: {e}")
+            await asyncio.to_thread(self._remember_failure, cache_key, None, cancel_check)
+            return await asyncio.to_thread(self._stale_country, cache_key)
+
+    async def scrape_weekend(self, friday: datetime, sunday: datetime, cancel_check=None,
+                             on_deals=None, on_status=None) -> list[FlightDeal]:
+        self._is_blocked = False  # Reset pro Trip
+        if cancel_check and cancel_check():
+            return []
+
+        date_str = friday.strftime('%d.%m.')
+        if on_status:
+            on_status(f"🔍 {date_str} Everywhere-Suche...")
+
+        data = await self.search_flights(friday, sunday, cancel_check=cancel_check)
+        if not data:
+            return []
+        everywhere_stale = bool(data.get("stale"))
+
+        deals = []
+        cheap_countries, skipped_countries = self._cheap_countries(data)
+
+        if on_status:
+            on_status(f"🌍 {date_str} {len(cheap_countries)} günstige Länder gefunden, {len(skipped_countries)} zu teuer")
+
+        for ci, country in enumerate(cheap_countries):
+            if cancel_check and cancel_check():
+                break
+
+            if on_status:
+                on_status(f"🔎 {date_str} {country['name']} durchsuchen... ({ci+1}/{len(cheap_countries)})")
+
+            city_data = await self.search_country_cities(country["entity_id"], friday, sunday, cancel_check=cancel_check)
+            cities_in_country = self._cities_in_country(city_data)
+            stale = everywhere_stale or bool(city_data.get("stale"))
+
+            for cj, (location, cheapest, price_per_person, city_entity_id) in enumerate(cities_in_country):
+                if cancel_check and cancel_check():
+                    break
+
+                city_name_api = location.get('name', '?')
+                if on_status:
+                    on_status(f"✈️ {date_str} {city_name_api}, {country['name']} prüfen... ({cj+1}/{len(cities_in_country)})")
+
+                # Nach einem Block nur noch Detail-Cache, kein Upstream-Call
+                details = await self.get_specific_flight_details(city_entity_id, friday, sunday,
+                                                                 cache_only=self._is_blocked)
+
+                if details is not None and details.get("status") == "blocked" and not details.get("negative"):
+                    self._is_blocked = True
+
+                deal = self._city_outcome(details, location, cheapest, price_per_person, country["name"],
+                                          friday, sunday, stale, on_status)
+                if deal is None:
+                    continue
+                deals.append(deal)
+
+                if on_deals:
+                    on_deals([deal])
+
+        return deals
+
+    async def run_trip(self, task: TripTask, cancel_check=None, on_deals=None, on_status=None) -> list[FlightDeal]:
+        if cancel_check and cancel_check():
+            return []
+        worker = self._spawn_worker()
+        try:
+            return await worker.scrape_weekend(task.departure, task.return_date, cancel_check=cancel_check,
+                                               on_deals=on_deals, on_status=on_status)
+        except Exception as e:
+            print(f"Error: {e}")
+            return []
+        finally:
+            await worker.aclose()
+
+    async def search_specific_cities(self, cities: list[str], departure: datetime, return_date: datetime,
+                                     cancel_check=None, on_deals=None, on_status=None) -> list[FlightDeal]:
+        """Gezielte Suche nach bestimmten Städten statt Everywhere"""
+        deals = []
+        self._is_blocked = False
+        date_str = departure.strftime('%d.%m.')
+        print(f"\n[CITY-SEARCH] {departure.strftime('%d.%m.%Y')}-{return_date.strftime('%d.%m.%Y')} | {len(cities)} Städte | Origin: {self.ORIGIN_SKY_CODE} | MaxPrice: {self.MAX_PRICE}€ | MinHour: {self.START_HOUR} | MaxReturnHour: {self.MAX_RETURN_HOUR}")
+        for ci, city_name in enumerate(cities):
+            if cancel_check and cancel_check():
+                print(f"  [CITY-SEARCH] Abgebrochen durch Benutzer")
+                break
+            city_info = CITY_DATABASE.get(city_name)
+            if not city_info:
+                print(f"  [SKIP] {city_name} - nicht in CITY_DATABASE!")
+                continue
+
+            if on_status:
+                on_status(f"✈️ {date_str} {city_name} prüfen... ({ci+1}/{len(cities)})")
+
+            print(f"  [SEARCH] {city_name} (entity={city_info['entity_id']})...")
+            details = await self.get_specific_flight_details(city_info["entity_id"], departure, return_date,
+                                                             cache_only=self._is_blocked)
+
+            if details is None:
+                print(f"  [RESULT] {city_name} -> None (API-Fehler)")
+                if on_status:
+                    on_status(f"⚠️ {city_name} – kein Response")
+            elif details.get("negative"):
+                print(f"  [RESULT] {city_name} -> kürzlich geblockt (Negativ-Cache), übersprungen")
+            elif details.get("cache_only"):
+                print(f"  [SKIP] {city_name} -> übersprungen (403-Block aktiv, nicht im Cache)")
+                if on_status:
+                    on_status(f"🛡️ {city_name} übersprungen (API-Limit)")
+            elif details.get("status") == "blocked":
+                self._is_blocked = True
+                print(f"  [RESULT] {city_name} -> 403 geblockt, restliche Cities nur noch aus dem Cache")
+                if on_status:
+                    on_status(f"🛡️ API-Limit erreicht bei {city_name}")
+            elif details.get("status") == "ok":
+                is_early = details.get('early_departure', False)
+                early_tag = " [FRÜH]" if is_early else ""
+                print(f"  [RESULT] {city_name} -> {details['price']:.0f}€, Hin: {details.get('time')}, Rück: {details.get('return_time')}{early_tag}")
+                deal = self._city_deal(city_name, city_info, details, departure, return_date)
+                deals.append(deal)
+                if on_deals:
+                    on_deals([deal])
+            else:
+                print(f"  [RESULT] {city_name} -> {details.get('status')} (kein passender Flug)")
+                if on_status:
+                    on_status(f"💸 {city_name} – kein passender Flug")
+
+        print(f"[CITY-SEARCH] Ergebnis: {len(deals)}/{len(cities)} Deals für {departure.strftime('%d.%m.')}")
+        return deals
+
+    async def run_city_trip(self, cities: list[str], task: TripTask,
+                            cancel_check=None, on_deals=None, on_status=None) -> list[FlightDeal]:
+        if cancel_check and cancel_check():
+            return []
+        worker = self._spawn_worker()
+        try:
+            return await worker.search_specific_cities(cities, task.departure, task.return_date,
+                                                       cancel_check=cancel_check,
+                                                       on_deals=on_deals, on_status=on_status)
+        except Exception as e:
+            print(f"Error city search: {e}")
+            return []
+        finally:
+            await worker.aclose()
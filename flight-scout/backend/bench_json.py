@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark stdlib json vs. orjson auf aufgezeichneten Payloads.
+
+  python bench_json.py [antwort.json ...] [--rounds 20]
+
+Ohne Dateien: alle Einträge aus search_cache der lokalen SQLite-Datei (Everywhere/
+Country/Detail, entpackt wie gespeichert) und die gespeicherten Ergebnisse aus saved_searches.
+Gemessen werden die Codecs aus fastjson.CODECS, also genau die der App.
+Mit Dateien: z.B. rohe Skyscanner-Antworten, die vorher mitgeschnitten wurden.
+"""
+
+import json
+import sys
+import time
+import zlib
+
+from fastjson import CODECS
+
+
+def recorded_payloads() -> dict[str, list[bytes]]:
+    """JSON-Texte pro Art aus der lokalen Datenbank, so wie sie gespeichert sind.
+    search_cache wird direkt aus der SQLite-Datei gelesen, auch wenn CACHE_BACKEND=http ist."""
+    from cache_backend import CACHE_BACKEND
+    from cache_snapshot import tier_of
+    from database import get_db
+
+    if CACHE_BACKEND != "sqlite":
+        print(f"CACHE_BACKEND={CACHE_BACKEND}: search_cache aus der lokalen SQLite-Datei, "
+              "Einträge im KV-Store werden nicht gemessen (dafür Dateien angeben)")
+    groups: dict[str, list[bytes]] = {}
+    conn = get_db()
+    for row in conn.execute("SELECT key, data, codec FROM search_cache WHERE expires_at >= datetime('now')"):
+        raw = zlib.decompress(row["data"]) if row["codec"] == "zlib" else row["data"].encode()
+        groups.setdefault(tier_of(row["key"]), []).append(raw)
+    rows = conn.execute("SELECT results FROM saved_searches WHERE results IS NOT NULL").fetchall()
+    conn.close()
+    if rows:
+        groups["saved_searches"] = [r["results"].encode() for r in rows]
+    return groups
+
+
+def file_payloads(paths: list[str]) -> dict[str, list[bytes]]:
+    groups = {}
+    for path in paths:
+        with open(path, "rb") as f:
+            groups[path] = [f.read()]
+    return groups
+
+
+def bench(texts: list[bytes], rounds: int) -> dict[str, tuple[float, float]]:
+    """(decode_ms, encode_ms) pro Codec, summiert über alle Texte, bester von `rounds` Läufen."""
+    objects = [json.loads(t) for t in texts]
+    result = {}
+    for name, (dumps, loads) in CODECS.items():
+        best_decode = best_encode = float("inf")
+        for _ in range(rounds):
+            started = time.perf_counter()
+            for t in texts:
+                loads(t)
+            best_decode = min(best_decode, time.perf_counter() - started)
+            started = time.perf_counter()
+            for obj in objects:
+                dumps(obj)
+            best_encode = min(best_encode, time.perf_counter() - started)
+        result[name] = (best_decode * 1000, best_encode * 1000)
+    return result
+
+
+def main(argv: list[str]):
+    rounds = 20
+    if "--rounds" in argv:
+        i = argv.index("--rounds")
+        rounds = int(argv[i + 1])
+        argv = argv[:i] + argv[i + 2:]
+    groups = file_payloads(argv) if argv else recorded_payloads()
+    if not groups:
+        print("Keine Payloads gefunden (search_cache leer und keine Dateien angegeben)")
+        return
+    if "orjson" not in CODECS:
+        print("orjson nicht installiert - nur stdlib gemessen (pip install orjson)")
+
+    print(f"{'Payloads':<28}{'Anzahl':>7}{'KB':>10}  {'Codec':<8}{'loads ms':>10}{'dumps ms':>10}")
+    for group, texts in groups.items():
+        size_kb = sum(len(t) for t in texts) / 1024
+        timings = bench(texts, rounds)
+        for name, (decode_ms, encode_ms) in timings.items():
+            print(f"{group:<28}{len(texts):>7}{size_kb:>10.1f}  {name:<8}{decode_ms:>10.2f}{encode_ms:>10.2f}")
+        if "orjson" in timings:
+            (sd, se), (od, oe) = timings["stdlib"], timings["orjson"]
+            print(f"{'':<47}-> loads {sd / od:.1f}x, dumps {se / oe:.1f}x schneller")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
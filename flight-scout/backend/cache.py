@@ -0,0 +1,335 @@
+"""
+Flight Scout Cache - In-Process-LRU vor dem SQLite search_cache.
+Hält bereits dekodierte Antworten, damit parallele Worker denselben Key nicht
+jedes Mal neu aus SQLite lesen und json.loads-en. SQLite bleibt die zweite,
+persistente Stufe (überlebt Neustarts) und speichert projizierte, zlib-
+komprimierte Payloads.
+"""
+
+import math
+import os
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Optional
+
+import fastjson
+
+CACHE_MEMORY_MB = float(os.environ.get("CACHE_MEMORY_MB", "64"))
+CACHE_REFRESH_WORKERS = int(os.environ.get("CACHE_REFRESH_WORKERS", "2"))  # Threads für Stale-while-revalidate
+
+# Nur diese Felder lesen scrape_weekend, Kalender und Alerts aus Everywhere-/Country-Antworten
+LOCATION_FIELDS = ("id", "entityId", "name", "type", "skyCode", "coordinates", "countryName")
+
+
+class LRUCache:
+    """LRU mit Byte-Limit. Die Größe eines Eintrags ist die Länge seines JSON-Texts.
+    Einträge merken sich created_at und die effektive TTL aus SQLite, die TTL gilt also über beide Stufen."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._data: OrderedDict[str, tuple[dict, float, int, float]] = OrderedDict()  # key -> (value, created_at, size, ttl_s)
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+    def get(self, key: str, max_age_s: Optional[float] = None) -> Optional[dict]:
+        """Dekodierter Wert oder None. Der Wert wird geteilt – nicht verändern."""
+        entry = self.get_entry(key, max_age_s)
+        return entry[0] if entry is not None else None
+
+    def get_entry(self, key: str, max_age_s: Optional[float] = None) -> Optional[tuple[dict, float, float]]:
+        """(Wert, Alter, TTL) in Sekunden oder None. Ohne max_age_s gilt die TTL des Eintrags."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, created_at, size, ttl_s = entry
+            age = time.time() - created_at
+            if age > (ttl_s if max_age_s is None else max_age_s):
+                # Kann für einen Stale-Read noch gültig sein -> nur Miss, nicht löschen
+                self.expired += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value, age, ttl_s
+
+    def put(self, key: str, value: dict, size: int, ttl_s: float, created_at: Optional[float] = None):
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.bytes -= old[2]
+            self._data[key] = (value, created_at if created_at is not None else time.time(), size, ttl_s)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, _, evicted_size, _) = self._data.popitem(last=False)
+                self.bytes -= evicted_size
+                self.evictions += 1
+
+    def invalidate(self, key: str):
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.bytes -= old[2]
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+                "expired": self.expired,
+                "evictions": self.evictions,
+            }
+
+
+# --- TTL nach Abstand zum Abflug ---
+
+def _parse_ttl_curve(spec: str) -> list[tuple[float, float, str]]:
+    """"3:0.5,14:1,*:4" -> [(max. Tage bis Abflug, Faktor auf die Basis-TTL, Label), ...]"""
+    points = []
+    for part in spec.split(","):
+        limit, factor = part.strip().split(":")
+        points.append((math.inf if limit.strip() == "*" else float(limit), float(factor)))
+    points.sort()
+    curve = []
+    prev = None
+    for days, factor in points:
+        if days == math.inf:
+            label = f">{prev:g}d" if prev is not None else "all"
+        else:
+            label = f"<={days:g}d"
+        curve.append((days, factor, label))
+        prev = days
+    return curve
+
+
+# Nahe Abflüge ändern sich stündlich, Wochenenden in zwei Monaten kaum
+CACHE_TTL_CURVE = _parse_ttl_curve(os.environ.get("CACHE_TTL_CURVE", "3:0.5,14:1,42:2,*:4"))
+
+
+def effective_ttl(base_hours: float, departure: datetime) -> tuple[str, float]:
+    """(Bucket, TTL in Stunden) für einen Eintrag: Basis-TTL der Art × Faktor der Kurve."""
+    days = (departure - datetime.now()).total_seconds() / 86400
+    for limit, factor, label in CACHE_TTL_CURVE:
+        if days <= limit:
+            return label, base_hours * factor
+    _, factor, label = CACHE_TTL_CURVE[-1]
+    return label, base_hours * factor
+
+
+class BucketStats:
+    """Cache-Hits, Misses und Upstream-Requests pro TTL-Bucket (zum Tunen der Kurve)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts: dict[str, dict[str, int]] = {}
+
+    def record(self, bucket: str, event: str):
+        """event: "hits", "misses" oder "upstream"."""
+        with self._lock:
+            counts = self._counts.setdefault(bucket, {"hits": 0, "misses": 0, "upstream": 0})
+            counts[event] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            result = {}
+            for _, factor, label in CACHE_TTL_CURVE:
+                counts = dict(self._counts.get(label, {"hits": 0, "misses": 0, "upstream": 0}))
+                lookups = counts["hits"] + counts["misses"]
+                result[label] = {
+                    "ttl_factor": factor,
+                    **counts,
+                    "hit_rate": round(counts["hits"] / lookups, 3) if lookups else None,
+                }
+            return result
+
+
+class PrewarmTracker:
+    """Welche Everywhere-Keys der Prewarmer geschrieben hat und wie oft Suchen sie danach treffen."""
+
+    def __init__(self, max_keys: int = 5000):
+        self.max_keys = max_keys
+        self._keys: OrderedDict[str, float] = OrderedDict()
+        self._lock = threading.Lock()
+        self.warmed_total = 0
+        self.lookups = 0
+        self.hits = 0
+        self.prewarmed_hits = 0
+
+    def warmed(self, key: str):
+        with self._lock:
+            self._keys[key] = time.time()
+            self._keys.move_to_end(key)
+            while len(self._keys) > self.max_keys:
+                self._keys.popitem(last=False)
+            self.warmed_total += 1
+
+    def forget(self, key: str):
+        """Suche hat den Eintrag selbst geladen -> zählt nicht mehr für den Prewarmer."""
+        with self._lock:
+            self._keys.pop(key, None)
+
+    def lookup(self, key: str, hit: bool):
+        with self._lock:
+            self.lookups += 1
+            if hit:
+                self.hits += 1
+                if key in self._keys:
+                    self.prewarmed_hits += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "tracked_keys": len(self._keys),
+                "warmed": self.warmed_total,
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "prewarmed_hits": self.prewarmed_hits,
+                # Anteil der Everywhere-Hits, die es ohne Prewarmer nicht gegeben hätte
+                "hit_share": round(self.prewarmed_hits / self.hits, 3) if self.hits else None,
+            }
+
+
+class BackgroundRefresher:
+    """Stale-while-revalidate: abgelaufene Einträge im Hintergrund neu laden.
+    Pro Key läuft höchstens ein Refresh, weitere Anfragen werden verworfen."""
+
+    def __init__(self, max_workers: int):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="cache-refresh")
+        self._lock = threading.Lock()
+        self._running: set[str] = set()
+        self.scheduled = 0
+        self.skipped = 0
+        self.refreshed = 0
+        self.failed = 0
+
+    def schedule(self, key: str, fn) -> bool:
+        """fn() -> True bei Erfolg. False, wenn für den Key schon ein Refresh läuft."""
+        with self._lock:
+            if key in self._running:
+                self.skipped += 1
+                return False
+            self._running.add(key)
+            self.scheduled += 1
+        self._executor.submit(self._run, key, fn)
+        return True
+
+    def _run(self, key: str, fn):
+        try:
+            ok = fn()
+        except Exception as e:
+            print(f"[CACHE] Refresh {key} fehlgeschlagen: {e}")
+            ok = False
+        with self._lock:
+            self._running.discard(key)
+            if ok:
+                self.refreshed += 1
+            else:
+                self.failed += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "running": len(self._running),
+                "scheduled": self.scheduled,
+                "skipped": self.skipped,
+                "refreshed": self.refreshed,
+                "failed": self.failed,
+            }
+
+
+# --- Payloads im search_cache: projiziert + zlib ---
+
+def _project_results(results: list) -> list:
+    projected = []
+    for result in results:
+        if result.get("type") != "LOCATION":
+            continue
+        content = result.get("content", {})
+        location = content.get("location", {})
+        flight_quotes = content.get("flightQuotes") or {}
+        projected.append({
+            "type": "LOCATION",
+            "content": {
+                "location": {k: location[k] for k in LOCATION_FIELDS if k in location},
+                "flightQuotes": {"cheapest": flight_quotes.get("cheapest", {})} if flight_quotes else {},
+            },
+        })
+    return projected
+
+
+def project_everywhere(data: dict) -> dict:
+    """Everywhere-Antwort auf Location + flightQuotes.cheapest reduzieren."""
+    return {"everywhereDestination": {"results": _project_results(data.get("everywhereDestination", {}).get("results", []))}}
+
+
+def project_country(data: dict) -> dict:
+    """Country-Antwort auf die Städte-Liste reduzieren (ungefiltert)."""
+    return {"countryDestination": {"results": _project_results(data.get("countryDestination", {}).get("results", []))}}
+
+
+def project_detail(data: dict) -> dict:
+    """Detail-Antwort auf Preis und Abflug-/Ankunftszeiten der Itineraries reduzieren (ungefiltert)."""
+    itineraries = []
+    for itinerary in data.get("itineraries", {}).get("results", []):
+        itineraries.append({
+            "price": {k: v for k, v in itinerary.get("price", {}).items() if k == "raw"},
+            "legs": [{"departure": leg.get("departure", ""), "arrival": leg.get("arrival", "")}
+                     for leg in itinerary.get("legs", [])],
+        })
+    return {"itineraries": {"results": itineraries}}
+
+
+def project_for_key(key: str, data: dict) -> dict:
+    """Projektion anhand des Key-Präfixes (für die Migration alter Zeilen)."""
+    if key.startswith("country_"):
+        return project_country(data)
+    if key.startswith("detail_"):
+        return project_detail(data)
+    if "everywhereDestination" in data:
+        return project_everywhere(data)
+    return data
+
+
+# Codecs, die decode_payload lesen kann (Spalte search_cache.codec)
+PAYLOAD_CODECS = ("zlib", "json")
+
+
+def encode_payload(data: dict) -> tuple[bytes, int]:
+    """(zlib-Blob, Länge des JSON-Texts). Die Länge dient als Größe im LRU."""
+    raw = fastjson.dumps(data)
+    return zlib.compress(raw, 6), len(raw)
+
+
+def decode_payload(blob, codec: str) -> tuple[dict, int]:
+    """(dict, Länge des JSON-Texts)."""
+    raw = zlib.decompress(blob) if codec == "zlib" else blob
+    return fastjson.loads(raw), len(raw)
+
+
+# Prozessweit, vor get_cache/set_cache in database.py
+MEMORY_CACHE = LRUCache(int(CACHE_MEMORY_MB * 1024 * 1024))
+
+# Prozessweit: Statistik pro TTL-Bucket (beide Engines)
+TTL_STATS = BucketStats()
+
+# Prozessweit: Beitrag des Prewarmers (prewarm.py) zu den Everywhere-Hits
+PREWARM_TRACKER = PrewarmTracker()
+
+# Prozessweit: Hintergrund-Refreshes abgelaufener Everywhere-Einträge (beide Engines)
+REFRESHER = BackgroundRefresher(CACHE_REFRESH_WORKERS)
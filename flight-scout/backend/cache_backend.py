@@ -0,0 +1,153 @@
+"""
+Flight Scout Cache-Backends - wo die kodierten search_cache-Einträge liegen.
+
+  sqlite (Standard): lokale Datei, Implementierung in database.py
+  http:              geteilter Key-Value-Store, damit mehrere Instanzen Everywhere-,
+                     Country- und Detail-Ergebnisse teilen (lokaler Stand-in: cache_kv_server.py)
+
+Beide Backends speichern dasselbe: Key, Payload aus cache.encode_payload (zlib), Codec,
+created_at (UTC) und effektive TTL. Das In-Process-LRU liegt davor in database.get_cache_entry.
+"""
+
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime
+from urllib.parse import quote
+
+import requests
+
+from metrics import LatencyRecorder
+
+CACHE_BACKEND = os.environ.get("CACHE_BACKEND", "sqlite")  # sqlite | http
+CACHE_KV_URL = os.environ.get("CACHE_KV_URL", "http://127.0.0.1:8765")
+CACHE_KV_TIMEOUT = float(os.environ.get("CACHE_KV_TIMEOUT", "2"))
+# Nach einem Verbindungsfehler so lange ohne KV-Store arbeiten (kein Timeout pro Lookup)
+CACHE_KV_BACKOFF = float(os.environ.get("CACHE_KV_BACKOFF", "15"))
+
+# created_at wie in SQLite (datetime('now')), damit beide Backends dieselben Werte tragen
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+@dataclass
+class CacheRecord:
+    blob: bytes
+    codec: str
+    created_at: datetime  # naive UTC
+    ttl_hours: float
+
+
+class CacheBackend(ABC):
+    """Schnittstelle für search_cache. put bekommt fertig kodierte Payloads;
+    keep_hours = Aufbewahrung über die TTL hinaus (Stale-Fallback), danach darf das Backend löschen."""
+
+    name = "base"
+
+    @abstractmethod
+    def get(self, key: str) -> CacheRecord | None:
+        ...
+
+    @abstractmethod
+    def put(self, key: str, record: CacheRecord, keep_hours: float):
+        ...
+
+    def stats(self) -> dict:
+        return {"backend": self.name}
+
+
+class HttpKVBackend(CacheBackend):
+    """Key-Value-Store per HTTP: GET/PUT {url}/cache/{key}, Payload als Body,
+    Metadaten in X-Codec / X-Created-At / X-TTL-Hours, Löschfrist in X-Expire-Seconds.
+    Fehler zählen als Miss bzw. verworfener Write – eine Suche scheitert nie am Cache.
+    Ist der Store nicht erreichbar, wird er CACHE_KV_BACKOFF Sekunden lang übersprungen."""
+
+    name = "http"
+
+    def __init__(self, base_url: str, timeout: float = CACHE_KV_TIMEOUT):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.latency = LatencyRecorder()
+        self.counts = {"gets": 0, "hits": 0, "puts": 0, "errors": 0, "skipped": 0}
+        self._lock = threading.Lock()  # get/put laufen parallel aus Worker-Threads
+        self._down_until = 0.0
+
+    def _count(self, name: str):
+        with self._lock:
+            self.counts[name] += 1
+
+    def _url(self, key: str) -> str:
+        return f"{self.base_url}/cache/{quote(key, safe='')}"
+
+    def _available(self) -> bool:
+        if time.time() < self._down_until:
+            self._count("skipped")
+            return False
+        return True
+
+    def _failed(self, op: str, error: Exception):
+        with self._lock:
+            self.counts["errors"] += 1
+            first = time.time() >= self._down_until
+            self._down_until = time.time() + CACHE_KV_BACKOFF
+        if first:
+            print(f"[CACHE] KV-{op} fehlgeschlagen, {CACHE_KV_BACKOFF:.0f}s ohne KV-Store: {error}")
+
+    def get(self, key: str) -> CacheRecord | None:
+        if not self._available():
+            return None
+        self._count("gets")
+        started = time.perf_counter()
+        try:
+            resp = self.session.get(self._url(key), timeout=self.timeout)
+        except requests.RequestException as e:
+            self._failed("GET", e)
+            return None
+        finally:
+            self.latency.record(time.perf_counter() - started)
+        if resp.status_code == 404:
+            return None
+        if resp.status_code != 200:
+            self._count("errors")
+            print(f"[CACHE] KV-GET Status {resp.status_code}")
+            return None
+        try:
+            record = CacheRecord(
+                blob=resp.content,
+                codec=resp.headers["X-Codec"],
+                created_at=datetime.strptime(resp.headers["X-Created-At"], TIMESTAMP_FORMAT),
+                ttl_hours=float(resp.headers["X-TTL-Hours"]),
+            )
+        except (KeyError, ValueError) as e:
+            self._count("errors")
+            print(f"[CACHE] KV-Eintrag {key} unvollständig: {e}")
+            return None
+        self._count("hits")
+        return record
+
+    def put(self, key: str, record: CacheRecord, keep_hours: float):
+        if not self._available():
+            return
+        self._count("puts")
+        expire_s = (record.created_at - datetime.utcnow()).total_seconds() + max(record.ttl_hours, keep_hours) * 3600
+        headers = {
+            "Content-Type": "application/octet-stream",
+            "X-Codec": record.codec,
+            "X-Created-At": record.created_at.strftime(TIMESTAMP_FORMAT),
+            "X-TTL-Hours": repr(record.ttl_hours),
+            "X-Expire-Seconds": str(max(1, int(expire_s))),
+        }
+        try:
+            resp = self.session.put(self._url(key), data=record.blob, headers=headers, timeout=self.timeout)
+            if resp.status_code >= 300:
+                self._count("errors")
+                print(f"[CACHE] KV-PUT Status {resp.status_code}")
+        except requests.RequestException as e:
+            self._failed("PUT", e)
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self.counts)
+        return {"backend": self.name, "url": self.base_url, **counts, "latency": self.latency.stats()}
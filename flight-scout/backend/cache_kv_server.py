@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Lokaler Stand-in für den geteilten Cache (CACHE_BACKEND=http), nur Standardbibliothek.
+Spricht das Protokoll von cache_backend.HttpKVBackend und hält alles im Speicher.
+
+  python cache_kv_server.py [port]
+  CACHE_BACKEND=http CACHE_KV_URL=http://127.0.0.1:8765 python main.py
+"""
+
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+META_HEADERS = ("X-Codec", "X-Created-At", "X-TTL-Hours")
+
+_store: dict[str, tuple[bytes, dict, float]] = {}  # key -> (blob, meta, expires_at)
+_lock = threading.Lock()
+
+
+class KVHandler(BaseHTTPRequestHandler):
+    def _key(self) -> str | None:
+        if not self.path.startswith("/cache/"):
+            return None
+        return unquote(self.path[len("/cache/"):])
+
+    def do_GET(self):
+        key = self._key()
+        with _lock:
+            entry = _store.get(key) if key is not None else None
+            if entry is not None and entry[2] < time.time():
+                del _store[key]
+                entry = None
+        if entry is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        blob, meta, _ = entry
+        self.send_response(200)
+        for name, value in meta.items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(len(blob)))
+        self.end_headers()
+        self.wfile.write(blob)
+
+    def do_PUT(self):
+        key = self._key()
+        blob = self.rfile.read(int(self.headers.get("Content-Length", "0")))
+        if key is None or any(name not in self.headers for name in META_HEADERS):
+            self.send_response(400)
+        else:
+            meta = {name: self.headers[name] for name in META_HEADERS}
+            expires_at = time.time() + float(self.headers.get("X-Expire-Seconds", "3600"))
+            with _lock:
+                _store[key] = (blob, meta, expires_at)
+            self.send_response(204)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(port: int = 8765) -> ThreadingHTTPServer:
+    """Server im Hintergrund-Thread starten (auch für lokale Tests)."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), KVHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8765
+    server = ThreadingHTTPServer(("127.0.0.1", port), KVHandler)
+    print(f"[CACHE] KV-Stand-in läuft auf http://127.0.0.1:{port}")
+    server.serve_forever()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Cache-Snapshot für Warm-Starts neuer Instanzen (frisches Volume, zweite Instanz).
+
+  python cache_snapshot.py export [datei] [everywhere,country,detail]
+  python cache_snapshot.py import [datei]
+
+Beim Start importiert main.py den Snapshot aus CACHE_SNAPSHOT_IMPORT (falls gesetzt).
+
+Format (Version 1): MAGIC + Version, Header-JSON, dann pro Eintrag Metadaten-JSON
+und Payload, jeweils mit 4-Byte-Längenpräfix. Die Payload wird so übernommen,
+wie sie in search_cache liegt (projiziert und zlib-komprimiert).
+Abgelaufene Einträge werden weder exportiert noch importiert.
+"""
+
+import json
+import os
+import struct
+import sys
+from collections import Counter
+from datetime import datetime
+
+from cache import PAYLOAD_CODECS
+
+MAGIC = b"FSCACHE"
+SNAPSHOT_VERSION = 1
+TIERS = ("everywhere", "country", "detail")
+DEFAULT_PATH = "cache_snapshot.bin"
+
+SNAPSHOT_IMPORT_PATH = os.environ.get("CACHE_SNAPSHOT_IMPORT", "")
+
+
+def tier_of(key: str) -> str:
+    if key.startswith("country_"):
+        return "country"
+    if key.startswith("detail_"):
+        return "detail"
+    return "everywhere"
+
+
+def _write_chunk(f, payload: bytes):
+    f.write(struct.pack("<I", len(payload)))
+    f.write(payload)
+
+
+def _read_chunk(f) -> bytes | None:
+    head = f.read(4)
+    if not head:
+        return None
+    if len(head) < 4:
+        raise ValueError("Snapshot abgeschnitten")
+    (length,) = struct.unpack("<I", head)
+    payload = f.read(length)
+    if len(payload) < length:
+        raise ValueError("Snapshot abgeschnitten")
+    return payload
+
+
+def export_snapshot(path: str = DEFAULT_PATH, tiers=TIERS) -> dict:
+    """Live-Cache in eine Snapshot-Datei schreiben (atomar über .tmp + rename)."""
+    from database import export_cache_rows
+
+    rows = [r for r in export_cache_rows() if tier_of(r["key"]) in tiers]
+    counts = Counter(tier_of(r["key"]) for r in rows)
+    header = {
+        "created_at": datetime.utcnow().isoformat(timespec="seconds"),
+        "entries": len(rows),
+        "tiers": dict(counts),
+    }
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC + struct.pack("<H", SNAPSHOT_VERSION))
+        _write_chunk(f, json.dumps(header).encode())
+        for row in rows:
+            data = row["data"]
+            meta = {k: row[k] for k in ("key", "codec", "created_at", "expires_at", "ttl_hours")}
+            _write_chunk(f, json.dumps(meta, separators=(",", ":")).encode())
+            _write_chunk(f, data.encode() if isinstance(data, str) else data)
+    os.replace(tmp_path, path)
+    return {**header, "path": path, "bytes": os.path.getsize(path)}
+
+
+def read_snapshot(path: str) -> tuple[dict, list[dict]]:
+    """(Header, Zeilen). ValueError bei fremder Datei oder unbekannter Version."""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} ist kein Cache-Snapshot")
+        (version,) = struct.unpack("<H", f.read(2))
+        if version != SNAPSHOT_VERSION:
+            raise ValueError(f"Snapshot-Version {version} nicht unterstützt (erwartet {SNAPSHOT_VERSION})")
+        header = json.loads(_read_chunk(f))
+        rows = []
+        while (meta := _read_chunk(f)) is not None:
+            row = json.loads(meta)
+            payload = _read_chunk(f)
+            if payload is None:
+                raise ValueError("Snapshot abgeschnitten")
+            row["data"] = payload.decode() if row["codec"] == "json" else payload
+            rows.append(row)
+    return header, rows
+
+
+def import_snapshot(path: str = DEFAULT_PATH) -> dict:
+    """Snapshot in den Cache (CACHE_STORE) einspielen; abgelaufene Einträge werden übersprungen."""
+    from database import import_cache_rows
+
+    header, rows = read_snapshot(path)
+    known = [r for r in rows if r["codec"] in PAYLOAD_CODECS]
+    result = import_cache_rows(known)
+    result["unknown_codec"] = len(rows) - len(known)
+    result["snapshot_created_at"] = header.get("created_at")
+    return result
+
+
+def import_on_startup():
+    """Startup-Hook: CACHE_SNAPSHOT_IMPORT einspielen, Fehler nur loggen."""
+    if not SNAPSHOT_IMPORT_PATH:
+        return
+    if not os.path.exists(SNAPSHOT_IMPORT_PATH):
+        print(f"[CACHE] Snapshot {SNAPSHOT_IMPORT_PATH} nicht gefunden, starte kalt")
+        return
+    try:
+        result = import_snapshot(SNAPSHOT_IMPORT_PATH)
+        print(f"[CACHE] Snapshot importiert: {result['imported']} Einträge, "
+              f"{result['expired']} abgelaufen, {result['kept_local']} lokal neuer "
+              f"(Stand {result['snapshot_created_at']})")
+    except (OSError, ValueError) as e:
+        print(f"[CACHE] Snapshot-Import fehlgeschlagen: {e}")
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+    path = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_PATH
+    if command == "export":
+        tiers = tuple(sys.argv[3].split(",")) if len(sys.argv) > 3 else TIERS
+        result = export_snapshot(path, tiers)
+        print(f"{result['entries']} Einträge ({result['tiers']}) -> {path} ({result['bytes'] / 1024:.1f} KB)")
+    elif command == "import":
+        result = import_snapshot(path)
+        print(f"{result['imported']} importiert, {result['expired']} abgelaufen, "
+              f"{result['kept_local']} lokal neuer, {result['unknown_codec']} unbekannter Codec")
+    else:
+        print("Verwendung: python cache_snapshot.py export|import [datei] [everywhere,country,detail]")
+        sys.exit(1)
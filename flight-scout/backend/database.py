@@ -6,9 +6,15 @@ import sqlite3
 import hashlib
 import hmac
 import base64
+import threading
 import time
 import os
 
+import fastjson
+from cache import MEMORY_CACHE, encode_payload, decode_payload, project_for_key
+from cache_backend import CACHE_BACKEND, CACHE_KV_URL, CacheBackend, CacheRecord, HttpKVBackend, TIMESTAMP_FORMAT
+from metrics import CACHE_WRITE_LATENCY
+
 # Use /data volume on Railway (persists across deploys), fallback to local for dev
 _data_dir = "/data" if os.path.isdir("/data") else os.path.dirname(__file__)
 DB_PATH = os.path.join(_data_dir, "flight_scout.db")
@@ -79,6 +85,27 @@ def init_db():
             created_at TEXT DEFAULT (datetime('now'))
         );
 
+        CREATE TABLE IF NOT EXISTS negative_cache (
+            key TEXT PRIMARY KEY,
+            reason TEXT NOT NULL,
+            status INTEGER,
+            created_at TEXT DEFAULT (datetime('now')),
+            expires_at TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_negative_cache_expires ON negative_cache(expires_at);
+
+        CREATE TABLE IF NOT EXISTS session_jars (
+            proxy_key TEXT PRIMARY KEY,
+            cookies TEXT NOT NULL,
+            user_agent TEXT NOT NULL,
+            sec_ch_ua TEXT NOT NULL,
+            platform TEXT NOT NULL,
+            traveller_context TEXT NOT NULL,
+            view_id TEXT NOT NULL,
+            created_at TEXT DEFAULT (datetime('now')),
+            expires_at TEXT NOT NULL
+        );
+
         CREATE TABLE IF NOT EXISTS saved_searches (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             user_id INTEGER NOT NULL,
@@ -116,9 +143,69 @@ def init_db():
             created_at TEXT DEFAULT (datetime('now'))
         );
     """)
+    _migrate_search_cache(conn)
+    _migrate_search_log(conn)
     conn.close()
 
 
+def _migrate_search_log(conn):
+    """search_log: Wochentag, Dauern und Personen mitschreiben (für den Prewarmer)."""
+    columns = {row["name"] for row in conn.execute("PRAGMA table_info(search_log)")}
+    for name, sql_type in (("start_weekday", "INTEGER"), ("durations", "TEXT"), ("adults", "INTEGER")):
+        if name not in columns:
+            conn.execute(f"ALTER TABLE search_log ADD COLUMN {name} {sql_type}")
+    conn.commit()
+
+
+def _migrate_search_cache(conn):
+    """search_cache: codec-/expires_at-/ttl_hours-Spalten ergänzen, alte JSON-Zeilen projizieren und komprimieren."""
+    columns = {row["name"] for row in conn.execute("PRAGMA table_info(search_cache)")}
+    if "codec" not in columns:
+        conn.execute("ALTER TABLE search_cache ADD COLUMN codec TEXT NOT NULL DEFAULT 'json'")
+        conn.commit()
+    if "expires_at" not in columns:
+        conn.execute("ALTER TABLE search_cache ADD COLUMN expires_at TEXT")
+        conn.execute(
+            f"UPDATE search_cache SET expires_at = datetime(created_at, '+{_MAX_CACHE_TTL_HOURS} hours')"
+        )
+        conn.commit()
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_search_cache_expires ON search_cache(expires_at)")
+    conn.commit()
+    if "ttl_hours" not in columns:
+        # Effektive TTL pro Eintrag; alte Zeilen bekommen die Basis-TTL ihrer Art
+        conn.execute("ALTER TABLE search_cache ADD COLUMN ttl_hours REAL")
+        conn.execute(
+            "UPDATE search_cache SET ttl_hours = CASE "
+            "WHEN key GLOB 'country_*' THEN ? WHEN key GLOB 'detail_*' THEN ? ELSE ? END",
+            (COUNTRY_CACHE_TTL_HOURS, DETAIL_CACHE_TTL_HOURS, CACHE_TTL_HOURS)
+        )
+        conn.commit()
+
+    # Incremental Vacuum braucht auto_vacuum=INCREMENTAL, greift erst nach einem vollen VACUUM
+    needs_vacuum = conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2
+    if needs_vacuum:
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+
+    rows = conn.execute("SELECT key, data FROM search_cache WHERE codec = 'json'").fetchall()
+    if not rows:
+        if needs_vacuum:
+            conn.execute("VACUUM")
+        return
+    before = sum(len(row["data"]) for row in rows)
+    after = 0
+    for row in rows:
+        try:
+            blob, _ = encode_payload(project_for_key(row["key"], fastjson.loads(row["data"])))
+        except (ValueError, TypeError):
+            conn.execute("DELETE FROM search_cache WHERE key = ?", (row["key"],))
+            continue
+        after += len(blob)
+        conn.execute("UPDATE search_cache SET data = ?, codec = 'zlib' WHERE key = ?", (blob, row["key"]))
+    conn.commit()
+    conn.execute("VACUUM")
+    print(f"[CACHE] {len(rows)} Einträge migriert: {before // 1024} KB -> {after // 1024} KB")
+
+
 # --- Auth ---
 
 def hash_password(password: str) -> str:
@@ -325,47 +412,358 @@ def delete_deal_alert(user_id: int, alert_id: int) -> bool:
 
 # --- Search Cache ---
 
-CACHE_TTL_HOURS = 6
+# Basis-TTLs pro Art; die effektive TTL eines Eintrags skaliert cache.effective_ttl nach
+# Tagen bis Abflug (CACHE_TTL_CURVE) und sie wird mit dem Eintrag gespeichert
+CACHE_TTL_HOURS = 6  # Everywhere-Suche
+# Country-/Detail-Calls: roh gecacht (ungefiltert), eigene TTLs
+COUNTRY_CACHE_TTL_HOURS = float(os.environ.get("COUNTRY_CACHE_TTL_HOURS", "6"))
+DETAIL_CACHE_TTL_HOURS = float(os.environ.get("DETAIL_CACHE_TTL_HOURS", "3"))
+# Stale-while-revalidate (Everywhere): bis TTL + CACHE_SWR_HOURS wird der alte Eintrag sofort
+# geliefert und im Hintergrund erneuert; bis CACHE_STALE_MAX_HOURS (auch Country) nur noch als Fallback bei 403/Fehler
+CACHE_SWR_HOURS = float(os.environ.get("CACHE_SWR_HOURS", "6"))
+CACHE_STALE_MAX_HOURS = max(CACHE_TTL_HOURS + CACHE_SWR_HOURS, COUNTRY_CACHE_TTL_HOURS,
+                            float(os.environ.get("CACHE_STALE_MAX_HOURS", "48")))
+_MAX_CACHE_TTL_HOURS = max(CACHE_STALE_MAX_HOURS, COUNTRY_CACHE_TTL_HOURS, DETAIL_CACHE_TTL_HOURS)
+
+class SQLiteCacheBackend(CacheBackend):
+    """search_cache in der lokalen SQLite-Datei; abgelaufene Zeilen löscht der Janitor."""
+
+    name = "sqlite"
+
+    def get(self, key: str) -> CacheRecord | None:
+        from datetime import datetime
+        conn = get_db()
+        row = conn.execute(
+            "SELECT data, codec, created_at, ttl_hours FROM search_cache WHERE key = ?", (key,)
+        ).fetchone()
+        conn.close()
+        if not row:
+            return None
+        return CacheRecord(
+            blob=row["data"],
+            codec=row["codec"],
+            created_at=datetime.fromisoformat(row["created_at"]),
+            ttl_hours=row["ttl_hours"] if row["ttl_hours"] is not None else CACHE_TTL_HOURS,
+        )
+
+    def put(self, key: str, record: CacheRecord, keep_hours: float):
+        created = record.created_at.strftime(TIMESTAMP_FORMAT)
+        conn = get_db()
+        conn.execute(
+            "INSERT OR REPLACE INTO search_cache (key, data, codec, created_at, expires_at, ttl_hours) "
+            "VALUES (?, ?, ?, ?, datetime(?, ?), ?)",
+            (key, record.blob, record.codec, created, created,
+             f"+{max(record.ttl_hours, keep_hours)} hours", record.ttl_hours)
+        )
+        conn.commit()
+        conn.close()
+
+
+# CACHE_BACKEND=http teilt den Cache zwischen Instanzen, sonst lokale SQLite-Datei
+CACHE_STORE: CacheBackend = HttpKVBackend(CACHE_KV_URL) if CACHE_BACKEND == "http" else SQLiteCacheBackend()
+
 
 def get_cache(key: str) -> dict | None:
-    import json
+    """Erst In-Process-LRU, dann SQLite; frisch nach der gespeicherten TTL des Eintrags.
+    Geliefertes dict nicht verändern (geteilt)."""
+    entry = get_cache_entry(key)
+    return entry[0] if entry is not None else None
+
+
+def get_cache_entry(key: str, max_age_hours: float | None = None) -> tuple[dict, float, float] | None:
+    """(data, Alter, TTL) in Stunden. Ohne max_age_hours nur frische Einträge, mit
+    max_age_hours auch ältere (Stale-Reads über die TTL hinaus)."""
+    cached = MEMORY_CACHE.get_entry(key, max_age_hours * 3600 if max_age_hours is not None else None)
+    if cached is not None:
+        return cached[0], cached[1] / 3600, cached[2] / 3600
+    record = CACHE_STORE.get(key)
+    if record is None:
+        return None
+    from datetime import datetime, timezone
+    age_hours = (datetime.utcnow() - record.created_at).total_seconds() / 3600
+    ttl_hours = record.ttl_hours
+    if age_hours > (ttl_hours if max_age_hours is None else max_age_hours):
+        return None
+    data, size = decode_payload(record.blob, record.codec)
+    MEMORY_CACHE.put(key, data, size, ttl_hours * 3600, record.created_at.replace(tzinfo=timezone.utc).timestamp())
+    return data, age_hours, ttl_hours
+
+
+def set_cache(key: str, data: dict, ttl_hours: float, keep_hours: float = 0.0):
+    """data sollte bereits projiziert sein (cache.project_*), gespeichert wird zlib-komprimiert.
+    ttl_hours ist die effektive TTL des Eintrags; gelöscht wird er (Janitor bzw. KV-Store)
+    nach max(ttl_hours, keep_hours) – keep_hours hält Stale-Daten als Fallback vor."""
+    from datetime import datetime
+    blob, size = encode_payload(data)
+    started = time.perf_counter()
+    now = datetime.utcnow().replace(microsecond=0)
+    CACHE_STORE.put(key, CacheRecord(blob=blob, codec="zlib", created_at=now, ttl_hours=ttl_hours), keep_hours)
+    CACHE_WRITE_LATENCY.record(time.perf_counter() - started)
+    MEMORY_CACHE.put(key, data, size, ttl_hours * 3600)
+
+
+# --- Cache Snapshot (cache_snapshot.py) ---
+
+def export_cache_rows() -> list[dict]:
+    """Alle noch nicht abgelaufenen search_cache-Zeilen, Payload unverändert (komprimiert).
+    Nur mit dem SQLite-Backend – der KV-Store kann seine Keys nicht auflisten."""
+    if not isinstance(CACHE_STORE, SQLiteCacheBackend):
+        print(f"[CACHE] Snapshot-Export übersprungen: CACHE_BACKEND={CACHE_STORE.name} kann keine Keys auflisten")
+        return []
+    conn = get_db()
+    rows = conn.execute(
+        "SELECT key, data, codec, created_at, expires_at, ttl_hours FROM search_cache "
+        "WHERE expires_at >= datetime('now') ORDER BY key"
+    ).fetchall()
+    conn.close()
+    return [dict(r) for r in rows]
+
+
+def import_cache_rows(rows: list[dict]) -> dict:
+    """Snapshot-Zeilen einspielen. Abgelaufene Einträge werden übersprungen,
+    lokal vorhandene nur durch neuere ersetzt. Geschrieben wird in CACHE_STORE."""
+    from datetime import datetime
+    now = datetime.utcnow().strftime(TIMESTAMP_FORMAT)
+    result = {"imported": 0, "expired": 0, "kept_local": 0}
+    if not isinstance(CACHE_STORE, SQLiteCacheBackend):
+        for row in rows:
+            if row["expires_at"] < now:
+                result["expired"] += 1
+                continue
+            created_at = datetime.strptime(row["created_at"], TIMESTAMP_FORMAT)
+            existing = CACHE_STORE.get(row["key"])
+            if existing is not None and existing.created_at >= created_at:
+                result["kept_local"] += 1
+                continue
+            data = row["data"]
+            record = CacheRecord(
+                blob=data.encode() if isinstance(data, str) else data,
+                codec=row["codec"],
+                created_at=created_at,
+                ttl_hours=row["ttl_hours"] if row["ttl_hours"] is not None else CACHE_TTL_HOURS,
+            )
+            # Löschfrist wie im Snapshot (expires_at), nicht ab jetzt neu gerechnet
+            keep_hours = (datetime.strptime(row["expires_at"], TIMESTAMP_FORMAT) - created_at).total_seconds() / 3600
+            CACHE_STORE.put(row["key"], record, keep_hours)
+            result["imported"] += 1
+        return result
+    conn = get_db()
+    try:
+        for row in rows:
+            if row["expires_at"] < now:
+                result["expired"] += 1
+                continue
+            cursor = conn.execute(
+                "INSERT INTO search_cache (key, data, codec, created_at, expires_at, ttl_hours) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET data = excluded.data, codec = excluded.codec, "
+                "created_at = excluded.created_at, expires_at = excluded.expires_at, ttl_hours = excluded.ttl_hours "
+                "WHERE excluded.created_at > search_cache.created_at",
+                (row["key"], row["data"], row["codec"], row["created_at"], row["expires_at"], row["ttl_hours"])
+            )
+            if cursor.rowcount:
+                result["imported"] += 1
+            else:
+                result["kept_local"] += 1
+        conn.commit()
+    finally:
+        conn.close()
+    return result
+
+
+# --- Negative Cache ---
+# Fehlgeschlagene Upstream-Queries (gleicher Key wie der positive Eintrag) für ein paar
+# Minuten merken, damit der nächste Job nicht sofort wieder in dieselbe Sperre läuft
+
+NEGATIVE_TTL_MINUTES = {
+    "blocked": float(os.environ.get("NEGATIVE_TTL_BLOCKED_MIN", "10")),  # 403 / 429
+    "5xx": float(os.environ.get("NEGATIVE_TTL_5XX_MIN", "2")),
+    "error": float(os.environ.get("NEGATIVE_TTL_ERROR_MIN", "2")),  # Exception / sonstiger Status
+    "empty": float(os.environ.get("NEGATIVE_TTL_EMPTY_MIN", "30")),  # 200 ohne Ergebnisse
+}
+NEGATIVE_STATS = {reason: {"writes": 0, "hits": 0} for reason in NEGATIVE_TTL_MINUTES}
+_NEGATIVE_STATS_LOCK = threading.Lock()  # get/set_negative laufen in Worker-Threads
+
+
+def negative_reason(status: int | None) -> str:
+    """Fehlerklasse eines fehlgeschlagenen Calls (status None = Exception)."""
+    if status in (403, 429):
+        return "blocked"
+    if status is not None and status >= 500:
+        return "5xx"
+    return "error"
+
+
+def get_negative(key: str) -> str | None:
+    """Grund eines noch gültigen Negativ-Eintrags oder None."""
     conn = get_db()
     row = conn.execute(
-        "SELECT data, created_at FROM search_cache WHERE key = ?", (key,)
+        "SELECT reason FROM negative_cache WHERE key = ? AND expires_at > datetime('now')", (key,)
     ).fetchone()
     conn.close()
     if not row:
         return None
-    from datetime import datetime, timedelta
-    created = datetime.fromisoformat(row["created_at"])
-    if datetime.utcnow() - created > timedelta(hours=CACHE_TTL_HOURS):
-        return None
-    return json.loads(row["data"])
+    with _NEGATIVE_STATS_LOCK:
+        NEGATIVE_STATS[row["reason"]]["hits"] += 1
+    return row["reason"]
 
 
-def set_cache(key: str, data: dict):
-    import json
+def set_negative(key: str, reason: str, status: int | None = None):
     conn = get_db()
     conn.execute(
-        "INSERT OR REPLACE INTO search_cache (key, data, created_at) VALUES (?, ?, datetime('now'))",
-        (key, json.dumps(data))
+        "INSERT OR REPLACE INTO negative_cache (key, reason, status, created_at, expires_at) "
+        "VALUES (?, ?, ?, datetime('now'), datetime('now', ?))",
+        (key, reason, status, f"+{NEGATIVE_TTL_MINUTES[reason]} minutes")
     )
-    # Cleanup expired entries
+    conn.commit()
+    conn.close()
+    with _NEGATIVE_STATS_LOCK:
+        NEGATIVE_STATS[reason]["writes"] += 1
+
+
+# --- Session Jars ---
+# Cookies + Browser-Identität einer gewärmten Session pro Proxy (session_pool.jar_key),
+# damit nach Deploy/Neustart kein Homepage-Warmup nötig ist. Bei 403 wird der Jar verworfen.
+
+SESSION_JAR_MAX_AGE = int(os.environ.get("SESSION_JAR_MAX_AGE", "21600"))  # Sekunden
+
+
+def save_session_jar(proxy_key: str, cookies: list[dict], user_agent: str, sec_ch_ua: str, platform: str,
+                     traveller_context: str, view_id: str):
+    conn = get_db()
     conn.execute(
-        f"DELETE FROM search_cache WHERE created_at < datetime('now', '-{CACHE_TTL_HOURS} hours')"
+        "INSERT OR REPLACE INTO session_jars (proxy_key, cookies, user_agent, sec_ch_ua, platform, "
+        "traveller_context, view_id, created_at, expires_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, datetime('now'), datetime('now', ?))",
+        (proxy_key, fastjson.dumps_str(cookies), user_agent, sec_ch_ua, platform, traveller_context, view_id,
+         f"+{SESSION_JAR_MAX_AGE} seconds")
     )
     conn.commit()
     conn.close()
 
 
+def load_session_jar(proxy_key: str) -> dict | None:
+    """Gültiger (nicht abgelaufener) Jar für den Proxy oder None."""
+    conn = get_db()
+    row = conn.execute(
+        "SELECT * FROM session_jars WHERE proxy_key = ? AND expires_at > datetime('now')", (proxy_key,)
+    ).fetchone()
+    conn.close()
+    if not row:
+        return None
+    jar = dict(row)
+    jar["cookies"] = fastjson.loads(jar["cookies"])
+    return jar
+
+
+def delete_session_jar(proxy_key: str, traveller_context: str | None = None):
+    """Jar verwerfen; mit traveller_context nur, wenn er noch zu dieser Session gehört."""
+    conn = get_db()
+    if traveller_context is None:
+        conn.execute("DELETE FROM session_jars WHERE proxy_key = ?", (proxy_key,))
+    else:
+        conn.execute("DELETE FROM session_jars WHERE proxy_key = ? AND traveller_context = ?",
+                     (proxy_key, traveller_context))
+    conn.commit()
+    conn.close()
+
+
+# --- Cache Janitor ---
+
+CACHE_JANITOR_INTERVAL = int(os.environ.get("CACHE_JANITOR_INTERVAL", "300"))  # Sekunden
+CACHE_JANITOR_BATCH = 500  # Zeilen pro DELETE, hält den Write-Lock kurz
+CACHE_VACUUM_PAGES = int(os.environ.get("CACHE_VACUUM_PAGES", "1000"))  # Pages pro incremental_vacuum
+
+JANITOR_STATS = {"runs": 0, "deleted": 0, "vacuumed_pages": 0, "last_run": None, "last_duration_ms": None}
+
+
+def purge_expired_cache(batch: int = CACHE_JANITOR_BATCH) -> int:
+    """Abgelaufene Cache-Zeilen in kleinen Batches über den expires_at-Index löschen."""
+    deleted = 0
+    conn = get_db()
+    try:
+        while True:
+            cursor = conn.execute(
+                "DELETE FROM search_cache WHERE rowid IN ("
+                "SELECT rowid FROM search_cache WHERE expires_at < datetime('now') LIMIT ?)",
+                (batch,)
+            )
+            conn.commit()
+            deleted += cursor.rowcount
+            if cursor.rowcount < batch:
+                break
+        # Negativ-Einträge leben nur Minuten, die Tabelle bleibt klein
+        deleted += conn.execute("DELETE FROM negative_cache WHERE expires_at < datetime('now')").rowcount
+        conn.execute("DELETE FROM session_jars WHERE expires_at < datetime('now')")
+        conn.commit()
+    finally:
+        conn.close()
+    return deleted
+
+
+def run_cache_maintenance() -> dict:
+    """Ein Janitor-Durchlauf: Expiry, incremental VACUUM, WAL-Checkpoint."""
+    from datetime import datetime
+    started = time.perf_counter()
+    deleted = purge_expired_cache()
+    conn = get_db()
+    try:
+        free_before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        if free_before:
+            conn.execute(f"PRAGMA incremental_vacuum({CACHE_VACUUM_PAGES})")
+        vacuumed = free_before - conn.execute("PRAGMA freelist_count").fetchone()[0]
+        conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+    finally:
+        conn.close()
+    JANITOR_STATS["runs"] += 1
+    JANITOR_STATS["deleted"] += deleted
+    JANITOR_STATS["vacuumed_pages"] += vacuumed
+    JANITOR_STATS["last_run"] = datetime.utcnow().isoformat(timespec="seconds")
+    JANITOR_STATS["last_duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    if deleted:
+        print(f"[CACHE] Janitor: {deleted} abgelaufene Einträge gelöscht, {vacuumed} Pages freigegeben")
+    return {"deleted": deleted, "vacuumed_pages": vacuumed}
+
+
+def start_cache_janitor():
+    """Hintergrund-Thread, der alle CACHE_JANITOR_INTERVAL Sekunden aufräumt."""
+
+    def janitor_loop():
+        while True:
+            try:
+                run_cache_maintenance()
+            except Exception as e:
+                print(f"[CACHE] Janitor-Fehler: {e}")
+            time.sleep(CACHE_JANITOR_INTERVAL)
+
+    thread = threading.Thread(target=janitor_loop, daemon=True)
+    thread.start()
+    print(f"[CACHE] Janitor gestartet (alle {CACHE_JANITOR_INTERVAL}s)")
+
+
+def cache_db_stats() -> dict:
+    with _NEGATIVE_STATS_LOCK:
+        negative = {reason: dict(counts) for reason, counts in NEGATIVE_STATS.items()}
+    return {
+        "store": CACHE_STORE.stats(),
+        "write_latency": CACHE_WRITE_LATENCY.stats(),
+        "janitor": dict(JANITOR_STATS),
+        "negative": negative,
+    }
+
+
 # --- Search Log ---
 
-def log_search(user_id: int, search_mode: str, airports: str, start_date: str, end_date: str, max_price: float, results_count: int = 0):
+def log_search(user_id: int, search_mode: str, airports: str, start_date: str, end_date: str, max_price: float,
+               results_count: int = 0, start_weekday: int | None = None, durations: str | None = None,
+               adults: int | None = None):
     conn = get_db()
     conn.execute(
-        """INSERT INTO search_log (user_id, search_mode, airports, start_date, end_date, max_price, results_count)
-           VALUES (?, ?, ?, ?, ?, ?, ?)""",
-        (user_id, search_mode, airports, start_date, end_date, max_price, results_count)
+        """INSERT INTO search_log (user_id, search_mode, airports, start_date, end_date, max_price, results_count,
+                                   start_weekday, durations, adults)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+        (user_id, search_mode, airports, start_date, end_date, max_price, results_count,
+         start_weekday, durations, adults)
     )
     conn.commit()
     conn.close()
@@ -406,6 +804,20 @@ def get_search_log(limit: int = 50) -> list[dict]:
     return [dict(r) for r in rows]
 
 
+def get_recent_everywhere_searches(days: int) -> list[dict]:
+    """Everywhere-Suchen der letzten `days` Tage, deren Zeitraum noch nicht vorbei ist."""
+    conn = get_db()
+    rows = conn.execute("""
+        SELECT airports, start_date, end_date, start_weekday, durations, adults, created_at
+        FROM search_log
+        WHERE search_mode = 'everywhere'
+          AND created_at >= datetime('now', ?)
+          AND end_date >= date('now')
+    """, (f"-{days} days",)).fetchall()
+    conn.close()
+    return [dict(r) for r in rows]
+
+
 # --- Saved Searches ---
 
 def save_search(user_id: int, name: str, params: str, results: str) -> int:
@@ -426,7 +838,6 @@ def save_search(user_id: int, name: str, params: str, results: str) -> int:
 
 
 def get_user_searches(user_id: int) -> list[dict]:
-    import json
     conn = get_db()
     rows = conn.execute(
         "SELECT id, name, params, results, created_at, updated_at FROM saved_searches WHERE user_id = ? ORDER BY updated_at DESC",
@@ -436,12 +847,12 @@ def get_user_searches(user_id: int) -> list[dict]:
     result = []
     for r in rows:
         d = dict(r)
-        p = json.loads(d["params"])
+        p = fastjson.loads(d["params"])
         d["airports"] = p.get("airports", [])
         d["search_mode"] = p.get("search_mode", "everywhere")
         d["start_date"] = p.get("start_date", "")
         d["end_date"] = p.get("end_date", "")
-        d["result_count"] = len(json.loads(d["results"])) if d.get("results") else 0
+        d["result_count"] = len(fastjson.loads(d["results"])) if d.get("results") else 0
         del d["params"]
         del d["results"]
         result.append(d)
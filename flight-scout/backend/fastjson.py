@@ -0,0 +1,39 @@
+"""
+Flight Scout JSON - ein Codec für Upstream-Antworten, Cache-Payloads und gespeicherte Suchen.
+orjson, wenn installiert, sonst die Standardbibliothek. Beide schreiben kompaktes UTF-8-JSON,
+Cache-Einträge und gespeicherte Ergebnisse bleiben also mit beiden lesbar.
+"""
+
+import json
+import os
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# auto (orjson wenn installiert) | stdlib
+JSON_CODEC = os.environ.get("JSON_CODEC", "auto")
+
+BACKEND = "orjson" if orjson is not None and JSON_CODEC != "stdlib" else "stdlib"
+
+
+def _stdlib_dumps(obj) -> bytes:
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def _orjson_dumps(obj) -> bytes:
+    return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+
+
+# Alle verfügbaren Codecs als (dumps, loads) – bench_json.py misst genau diese
+CODECS = {"stdlib": (_stdlib_dumps, json.loads)}
+if orjson is not None:
+    CODECS["orjson"] = (_orjson_dumps, orjson.loads)
+
+dumps, loads = CODECS[BACKEND]
+
+
+def dumps_str(obj) -> str:
+    """Für TEXT-Spalten (saved_searches, session_jars)."""
+    return dumps(obj).decode()
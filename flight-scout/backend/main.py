@@ -15,9 +15,13 @@ import uuid
 import calendar
 import threading
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
 
-from scraper import SkyscannerAPI, create_pdf_report, FlightDeal, PDF_DIR, CITY_DATABASE
+from scraper import SkyscannerAPI, create_pdf_report, FlightDeal, PDF_DIR, CITY_DATABASE, SESSION_POOL, detail_latency_stats
+from async_scraper import AsyncSkyscannerAPI, ASYNC_MAX_CONCURRENCY
+from upstream import GOVERNOR, CONCURRENCY, SINGLE_FLIGHT, BREAKER, TIMEOUTS, run_bounded, retry_stats
+from proxies import PROXY_POOL
+from cache import MEMORY_CACHE, REFRESHER, TTL_STATS
+from planner import plan_trips, estimate_plan, execute_plan, execute_plan_async
 import os
 from database import (
     create_user, authenticate_user, create_token, verify_token,
@@ -25,9 +29,12 @@ from database import (
     create_deal_alert, get_user_deal_alerts, delete_deal_alert,
     save_search, get_user_searches, get_saved_search, update_search_results, delete_saved_search,
     log_search, get_all_users, get_search_log,
-    get_public_deals,
+    get_public_deals, start_cache_janitor, cache_db_stats,
 )
 from alerts import start_alert_scheduler
+from prewarm import start_prewarmer, prewarm_stats
+from cache_snapshot import import_on_startup as import_cache_snapshot
+import fastjson
 
 app = FastAPI(title="Flight Scout API", version="1.0.0")
 
@@ -50,6 +57,9 @@ AIRPORTS = {
     "zur": {"id": "95673856", "name": "Zürich", "code": "zrh"},
 }
 
+# Scraper-Engine: "threads" (ThreadPoolExecutor, Standard) oder "async" (ein Event-Loop, httpx)
+SCRAPER_ENGINE = os.environ.get("SCRAPER_ENGINE", "threads")
+
 WEEKDAYS = ["Montag", "Dienstag", "Mittwoch", "Donnerstag", "Freitag", "Samstag", "Sonntag"]
 
 
@@ -81,6 +91,7 @@ class JobStatus(BaseModel):
     destinations_found: int = 0
     deals_found: int = 0
     pdf_path: Optional[str] = None
+    degraded: bool = False  # Circuit-Breaker offen: Ergebnisse nur aus dem Cache
 
 
 class AuthRequest(BaseModel):
@@ -261,9 +272,8 @@ class SaveSearchRequest(BaseModel):
 
 @app.post("/searches/save")
 def save_search_endpoint(req: SaveSearchRequest, request: Request):
-    import json
     user_id = get_user_id(request)
-    search_id = save_search(user_id, req.name, json.dumps(req.params), json.dumps(req.results))
+    search_id = save_search(user_id, req.name, fastjson.dumps_str(req.params), fastjson.dumps_str(req.results))
     if search_id == -1:
         raise HTTPException(status_code=400, detail="Maximal 5 Suchen erlaubt")
     return {"id": search_id, "message": "Suche gespeichert"}
@@ -278,13 +288,12 @@ def get_searches(request: Request):
 
 @app.get("/searches/{search_id}")
 def get_search_detail(search_id: int, request: Request):
-    import json
     user_id = get_user_id(request)
     search = get_saved_search(user_id, search_id)
     if not search:
         raise HTTPException(status_code=404, detail="Suche nicht gefunden")
-    search["params"] = json.loads(search["params"])
-    search["results"] = json.loads(search["results"]) if search["results"] else []
+    search["params"] = fastjson.loads(search["params"])
+    search["results"] = fastjson.loads(search["results"]) if search["results"] else []
     return search
 
 
@@ -353,7 +362,9 @@ def start_search(request: SearchRequest, background_tasks: BackgroundTasks, req:
 
     # Log search to DB
     airports_str = ",".join(request.airports)
-    log_search(user_id, request.search_mode, airports_str, request.start_date, request.end_date, request.max_price)
+    log_search(user_id, request.search_mode, airports_str, request.start_date, request.end_date, request.max_price,
+               start_weekday=request.start_weekday, durations=",".join(str(d) for d in request.durations),
+               adults=request.adults)
 
     job_id = str(uuid.uuid4())[:8]
 
@@ -380,6 +391,22 @@ def start_search(request: SearchRequest, background_tasks: BackgroundTasks, req:
     )
 
 
+@app.post("/search/estimate")
+def estimate_search(request: SearchRequest, req: Request):
+    """Wie viele Skyscanner-Requests eine Suche kosten wird (ohne Netzwerk, nur Cache-Lookups)."""
+    get_user_id(req)
+    try:
+        start_date = datetime.strptime(request.start_date, "%Y-%m-%d")
+        end_date = datetime.strptime(request.end_date, "%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Ungültiges Datum")
+    valid_airports = [a for a in request.airports if a in AIRPORTS]
+    scrapers = {code: _make_search_scraper(SkyscannerAPI, AIRPORTS[code], request) for code in valid_airports}
+    tasks = plan_trips(valid_airports, start_date, end_date, request.start_weekday, request.durations or [2])
+    cities = request.selected_cities if request.search_mode == "cities" else None
+    return estimate_plan(tasks, scrapers, cities=cities)
+
+
 @app.get("/status/{job_id}", response_model=JobStatus)
 def get_status(job_id: str):
     if job_id not in jobs:
@@ -400,6 +427,7 @@ def get_status(job_id: str):
         destinations_found=job.get("destinations_found", 0),
         deals_found=job.get("deals_found", 0),
         pdf_path=job.get("pdf_path"),
+        degraded=job.get("degraded", False),
     )
 
 
@@ -443,6 +471,7 @@ def generate_pdf_from_deals(request: Request, body: dict = Body(...)):
             flight_time=d.get("flight_time", ""), return_flight_time=d.get("return_flight_time", ""),
             origin=d.get("origin", ""), latitude=d.get("latitude", 0), longitude=d.get("longitude", 0),
             early_departure=d.get("early_departure", False), alternatives=d.get("alternatives", []),
+            stale=d.get("stale", False),
         ))
 
     pdf_id = str(uuid.uuid4())[:8]
@@ -475,6 +504,41 @@ def admin_searches(request: Request, limit: int = 50):
     return {"searches": get_search_log(limit)}
 
 
+@app.get("/admin/upstream")
+def admin_upstream(request: Request):
+    """Zustand der Skyscanner-Anbindung (Session-Pool etc.)."""
+    _require_admin(request)
+    return {
+        "session_pool": SESSION_POOL.stats(),
+        "rate": GOVERNOR.stats(),
+        "concurrency": CONCURRENCY.stats(),
+        "retries": retry_stats(),
+        "coalescing": SINGLE_FLIGHT.stats(),
+        "breaker": BREAKER.stats(),
+        "memory_cache": MEMORY_CACHE.stats(),
+        "cache_refresh": REFRESHER.stats(),
+        "ttl_buckets": TTL_STATS.stats(),
+        "cache_db": cache_db_stats(),
+        "prewarm": prewarm_stats(),
+        "detail_latency": detail_latency_stats(),
+        "timeouts": TIMEOUTS.stats(),
+    }
+
+
+@app.get("/admin/proxies")
+def admin_proxies(request: Request):
+    """Gesundheit pro Proxy (Latenz, Fehler-/403-Rate, Quarantäne)."""
+    _require_admin(request)
+    return PROXY_POOL.stats()
+
+
+@app.post("/admin/proxies/reload")
+def admin_proxies_reload(request: Request):
+    _require_admin(request)
+    count = PROXY_POOL.reload()
+    return {"message": f"{count} Proxy(s) geladen"}
+
+
 @app.post("/admin/test-alerts")
 def test_alerts(request: Request):
     _require_admin(request)
@@ -552,15 +616,37 @@ def _deal_to_dict(d: FlightDeal) -> dict:
         "longitude": d.longitude,
         "early_departure": d.early_departure,
         "alternatives": d.alternatives,
+        "stale": d.stale,
     }
 
 
+def _make_search_scraper(engine_cls, airport: dict, request: SearchRequest, **kwargs):
+    """Scraper für einen Airport mit den Filtern der Suche. Kein Netzwerk: die Session
+    wird erst beim ersten Request geliehen."""
+    scraper = engine_cls(
+        origin_entity_id=airport["id"],
+        adults=request.adults,
+        start_hour=request.min_departure_hour,
+        origin_sky_code=airport["code"],
+        max_return_hour=request.max_return_hour,
+        **kwargs,
+    )
+    scraper.MAX_PRICE = request.max_price
+    if request.blacklist_countries:
+        scraper.BLACKLIST_COUNTRIES = request.blacklist_countries
+    return scraper
+
+
 def run_search(job_id: str, request: SearchRequest):
     """Background task für die Flugsuche"""
     try:
         job = jobs[job_id]
         job["status"] = "running"
         job["message"] = "Initialisiere Suche..."
+        # Circuit-Breaker offen: Live-Requests werden abgelehnt, die Suche liefert nur Cache-Daten
+        job["degraded"] = BREAKER.degraded
+        if job["degraded"]:
+            print("[BREAKER] Suche läuft im Cache-only-Modus")
 
         all_deals: list[FlightDeal] = []
         seen_cities: set[str] = set()
@@ -571,14 +657,15 @@ def run_search(job_id: str, request: SearchRequest):
 
         durations = request.durations or [2]
 
-        # Berechne totale Trips für granulares Progress
-        valid_airports = [a for a in request.airports if a in AIRPORTS]
-        total_trips = 0
-        for airport_code in valid_airports:
-            airport = AIRPORTS[airport_code]
-            temp_scraper = SkyscannerAPI(origin_entity_id=airport["id"], origin_sky_code=airport["code"])
-            for dur in durations:
-                total_trips += len(temp_scraper.generate_trips(start_date, end_date, request.start_weekday, dur))
+        valid_airports = list(dict.fromkeys(a for a in request.airports if a in AIRPORTS))
+        is_city_mode = request.search_mode == "cities" and request.selected_cities
+        use_async = SCRAPER_ENGINE == "async"
+        engine_cls = AsyncSkyscannerAPI if use_async else SkyscannerAPI
+
+        # Ganze Suche (Airports × Dauern × Wochen) als eine Task-Liste, ohne Netzwerk
+        scrapers = {code: _make_search_scraper(engine_cls, AIRPORTS[code], request) for code in valid_airports}
+        tasks = plan_trips(valid_airports, start_date, end_date, request.start_weekday, durations)
+        total_trips = len(tasks)
         completed_trips = 0
         status_updates = 0
 
@@ -615,59 +702,56 @@ def run_search(job_id: str, request: SearchRequest):
         def cancel_check():
             return job.get("cancelled", False)
 
-        is_city_mode = request.search_mode == "cities" and request.selected_cities
-
-        for airport_code in valid_airports:
-            if cancel_check():
-                break
-            airport = AIRPORTS[airport_code]
-
-            for dur in durations:
-                if cancel_check():
-                    break
-
-                scraper = SkyscannerAPI(
-                    origin_entity_id=airport["id"],
-                    adults=request.adults,
-                    start_hour=request.min_departure_hour,
-                    origin_sky_code=airport["code"],
-                    max_return_hour=request.max_return_hour,
-                )
-                scraper.MAX_PRICE = request.max_price
-
+        def on_trip_done(task, trip_deals):
+            # on_deals wird bereits pro Stadt gefeuert, hier nur progress
+            on_progress(0, total_trips)
+
+        origin_names = ", ".join(AIRPORTS[code]["name"] for code in valid_airports)
+        distinct_durations = list(dict.fromkeys(durations))
+        nights = ", ".join(str(d) for d in distinct_durations)
+        nights += " Nacht" if distinct_durations == [1] else " Nächte"
+        if is_city_mode:
+            city_names = ", ".join(request.selected_cities[:3])
+            if len(request.selected_cities) > 3:
+                city_names += f" +{len(request.selected_cities) - 3}"
+            job["message"] = f"Suche {city_names} ab {origin_names} ({nights})..."
+        else:
+            job["message"] = f"Suche ab {origin_names} ({nights})..."
+
+        def deals_callback(task):
+            airport_name = AIRPORTS[task.origin]["name"]
+            return lambda deals: on_deals(deals, airport_name)
+
+        search_started = time.time()
+        if use_async:
+            # Alle Trips aller Airports × Dauern gleichzeitig in einem Event-Loop
+            async def run_all():
+                semaphore = asyncio.Semaphore(ASYNC_MAX_CONCURRENCY)
+                for scraper in scrapers.values():
+                    scraper._semaphore = semaphore
+
+                async def run_task(scraper, task):
+                    if is_city_mode:
+                        return await scraper.run_city_trip(request.selected_cities, task, cancel_check=cancel_check,
+                                                           on_deals=deals_callback(task), on_status=on_status)
+                    return await scraper.run_trip(task, cancel_check=cancel_check,
+                                                  on_deals=deals_callback(task), on_status=on_status)
+
+                await execute_plan_async(tasks, scrapers, run_task, on_trip_done=on_trip_done)
+
+            asyncio.run(run_all())
+        else:
+            # Ein Executor für alle Trips, Parallelität regelt der AIMD-Controller
+            def run_task(scraper, task, attempt):
                 if is_city_mode:
-                    city_names = ", ".join(request.selected_cities[:3])
-                    if len(request.selected_cities) > 3:
-                        city_names += f" +{len(request.selected_cities) - 3}"
-                    job["message"] = f"Suche {city_names} ab {airport['name']} ({dur} {'Nacht' if dur == 1 else 'Nächte'})..."
-
-                    scraper.run_city_search(
-                        cities=request.selected_cities,
-                        start_date=start_date,
-                        end_date=end_date,
-                        start_weekday=request.start_weekday,
-                        duration=dur,
-                        cancel_check=cancel_check,
-                        on_deals=lambda deals, an=airport["name"]: on_deals(deals, an),
-                        on_progress=on_progress,
-                        on_status=on_status,
-                    )
-                else:
-                    job["message"] = f"Suche ab {airport['name']} ({dur} {'Nacht' if dur == 1 else 'Nächte'})..."
-
-                    if request.blacklist_countries:
-                        scraper.BLACKLIST_COUNTRIES = request.blacklist_countries
-
-                    scraper.run(
-                        start_date=start_date,
-                        end_date=end_date,
-                        start_weekday=request.start_weekday,
-                        duration=dur,
-                        cancel_check=cancel_check,
-                        on_deals=lambda deals, an=airport["name"]: on_deals(deals, an),
-                        on_progress=on_progress,
-                        on_status=on_status,
-                    )
+                    return scraper.run_city_trip(request.selected_cities, task, attempt, cancel_check=cancel_check,
+                                                 on_deals=deals_callback(task), on_status=on_status)
+                return scraper.run_trip(task, attempt, cancel_check=cancel_check,
+                                        on_deals=deals_callback(task), on_status=on_status)
+
+            execute_plan(tasks, scrapers, run_task, cancel_check=cancel_check, on_trip_done=on_trip_done)
+        elapsed = time.time() - search_started
+        print(f"[ENGINE] {SCRAPER_ENGINE}: {completed_trips}/{total_trips} Trips in {elapsed:.1f}s")
 
         was_cancelled = job.get("cancelled", False)
 
@@ -676,7 +760,6 @@ def run_search(job_id: str, request: SearchRequest):
 
         # PDF generieren
         pdf_filename = os.path.join(PDF_DIR, f"flight_report_{job_id}.pdf")
-        origin_names = ", ".join([AIRPORTS[a]["name"] for a in valid_airports])
         create_pdf_report(all_deals, origin_names, filename=pdf_filename)
 
         # Final results
@@ -684,7 +767,10 @@ def run_search(job_id: str, request: SearchRequest):
 
         job["status"] = "cancelled" if was_cancelled else "completed"
         job["progress"] = 100
+        job["degraded"] = job["degraded"] or BREAKER.degraded
         job["message"] = f"{'Gestoppt' if was_cancelled else 'Fertig'}! {len(results)} Deals gefunden."
+        if job["degraded"]:
+            job["message"] += " (Skyscanner blockiert – nur Cache-Ergebnisse)"
         job["results"] = results
         job["pdf_path"] = pdf_filename
 
@@ -695,55 +781,39 @@ def run_search(job_id: str, request: SearchRequest):
         jobs[job_id]["progress"] = 0
 
 
-def _search_calendar_day(dep_date: datetime, ret_date: datetime, req: CalendarRequest) -> dict:
-    """Sucht Deals für einen einzelnen Tag (wird parallel aufgerufen)."""
-    day_deals = []
-
-    for airport_code in req.airports:
-        if airport_code not in AIRPORTS:
+def _calendar_airport_deals(data: dict, airport: dict, dep_date: datetime, ret_date: datetime, req: CalendarRequest) -> list[dict]:
+    """Länder-Deals eines Airports aus der Everywhere-Antwort."""
+    deals = []
+    results = data.get("everywhereDestination", {}).get("results", [])
+    for result in results:
+        if result.get("type") != "LOCATION":
             continue
-        airport = AIRPORTS[airport_code]
-
-        scraper = SkyscannerAPI(
-            origin_entity_id=airport["id"],
-            adults=req.adults,
-            start_hour=0,
-            origin_sky_code=airport["code"],
-        )
-        if req.blacklist_countries:
-            scraper.BLACKLIST_COUNTRIES = req.blacklist_countries
-        scraper.MAX_PRICE = req.max_price
-
-        data = scraper.search_flights(dep_date, ret_date)
-        if not data:
+        content = result.get("content", {})
+        location = content.get("location", {})
+        fq = content.get("flightQuotes", {})
+        if not fq:
             continue
-
-        results = data.get("everywhereDestination", {}).get("results", [])
-        for result in results:
-            if result.get("type") != "LOCATION":
-                continue
-            content = result.get("content", {})
-            location = content.get("location", {})
-            fq = content.get("flightQuotes", {})
-            if not fq:
-                continue
-            raw_price = fq.get("cheapest", {}).get("rawPrice", 9999)
-            price_pp = raw_price / req.adults
-            if price_pp <= req.max_price and location.get("type") == "Nation":
-                # Skyscanner-Link bauen
-                sky_code = location.get("skyCode", "")
-                url = (
-                    f"https://www.skyscanner.at/transport/fluge/{airport['code']}/{sky_code.lower()}/"
-                    f"{dep_date.strftime('%y%m%d')}/{ret_date.strftime('%y%m%d')}/"
-                    f"?adultsv2={req.adults}&cabinclass=economy&rtn=1&preferdirects=true"
-                )
-                day_deals.append({
-                    "country": location.get("name", "?"),
-                    "price": round(price_pp, 2),
-                    "origin": airport["name"],
-                    "url": url,
-                })
-
+        raw_price = fq.get("cheapest", {}).get("rawPrice", 9999)
+        price_pp = raw_price / req.adults
+        if price_pp <= req.max_price and location.get("type") == "Nation":
+            # Skyscanner-Link bauen
+            sky_code = location.get("skyCode", "")
+            url = (
+                f"https://www.skyscanner.at/transport/fluge/{airport['code']}/{sky_code.lower()}/"
+                f"{dep_date.strftime('%y%m%d')}/{ret_date.strftime('%y%m%d')}/"
+                f"?adultsv2={req.adults}&cabinclass=economy&rtn=1&preferdirects=true"
+            )
+            deals.append({
+                "country": location.get("name", "?"),
+                "price": round(price_pp, 2),
+                "origin": airport["name"],
+                "url": url,
+                "stale": bool(data.get("stale")),
+            })
+    return deals
+
+
+def _calendar_day_result(dep_date: datetime, day_deals: list[dict]) -> dict:
     if day_deals:
         min_price = min(d["price"] for d in day_deals)
         return {
@@ -751,6 +821,7 @@ def _search_calendar_day(dep_date: datetime, ret_date: datetime, req: CalendarRe
             "min_price": round(min_price, 2),
             "deals_count": len(day_deals),
             "deals": sorted(day_deals, key=lambda x: x["price"])[:5],
+            "stale": any(d["stale"] for d in day_deals),
         }
     else:
         return {
@@ -761,6 +832,66 @@ def _search_calendar_day(dep_date: datetime, ret_date: datetime, req: CalendarRe
         }
 
 
+def _make_calendar_scraper(engine_cls, airport: dict, req: CalendarRequest, **kwargs):
+    scraper = engine_cls(
+        origin_entity_id=airport["id"],
+        adults=req.adults,
+        start_hour=0,
+        origin_sky_code=airport["code"],
+        **kwargs,
+    )
+    if req.blacklist_countries:
+        scraper.BLACKLIST_COUNTRIES = req.blacklist_countries
+    scraper.MAX_PRICE = req.max_price
+    return scraper
+
+
+def _search_calendar_day(dep_date: datetime, ret_date: datetime, req: CalendarRequest, attempt: int = 0) -> dict:
+    """Sucht Deals für einen einzelnen Tag (wird parallel aufgerufen).
+    Bei 403 wirft search_flights RetryLater; bereits geladene Airports kommen beim
+    nächsten Versuch aus dem Cache."""
+    day_deals = []
+
+    for airport_code in req.airports:
+        if airport_code not in AIRPORTS:
+            continue
+        airport = AIRPORTS[airport_code]
+
+        scraper = _make_calendar_scraper(SkyscannerAPI, airport, req)
+        scraper.defer_403 = True
+        scraper.retry_attempt = attempt
+        try:
+            data = scraper.search_flights(dep_date, ret_date)
+        finally:
+            scraper.close()
+        if not data:
+            continue
+        day_deals.extend(_calendar_airport_deals(data, airport, dep_date, ret_date, req))
+
+    return _calendar_day_result(dep_date, day_deals)
+
+
+async def _search_calendar_day_async(dep_date: datetime, ret_date: datetime, req: CalendarRequest,
+                                     semaphore: asyncio.Semaphore) -> dict:
+    """Wie _search_calendar_day, alle Airports gleichzeitig auf dem Event-Loop."""
+    airports = [AIRPORTS[code] for code in req.airports if code in AIRPORTS]
+
+    async def search_airport(airport: dict) -> list[dict]:
+        scraper = _make_calendar_scraper(AsyncSkyscannerAPI, airport, req, semaphore=semaphore)
+        try:
+            data = await scraper.search_flights(dep_date, ret_date)
+        finally:
+            await scraper.aclose()
+        if not data:
+            return []
+        return _calendar_airport_deals(data, airport, dep_date, ret_date, req)
+
+    day_deals = []
+    for airport_deals in await asyncio.gather(*(search_airport(a) for a in airports)):
+        day_deals.extend(airport_deals)
+    return _calendar_day_result(dep_date, day_deals)
+
+
 def run_calendar_search(job_id: str, req: CalendarRequest):
     """Background task für die Kalender-Suche - scannt jeden Tag im Monat (parallel)"""
     try:
@@ -789,30 +920,45 @@ def run_calendar_search(job_id: str, req: CalendarRequest):
         total_future = len(future_days)
         processed = 0
 
-        # Parallel mit max 3 gleichzeitigen Requests
-        with ThreadPoolExecutor(max_workers=3) as executor:
-            future_to_day = {}
-            for day in future_days:
+        def on_day_done(day: int, result: Optional[dict], error: Optional[Exception] = None):
+            nonlocal processed
+            if error is not None:
+                print(f"[CALENDAR] Fehler Tag {day}: {error}")
+                result = _calendar_day_result(datetime(year, month, day), [])
+            results_by_day[day] = result
+            processed += 1
+            jobs[job_id]["progress"] = int((processed / total_future) * 95) if total_future else 95
+            jobs[job_id]["message"] = f"Prüfe Tage... ({processed}/{total_future})"
+
+        if SCRAPER_ENGINE == "async":
+            async def run_all_days():
+                semaphore = asyncio.Semaphore(ASYNC_MAX_CONCURRENCY)
+
+                async def run_day(day: int):
+                    dep_date = datetime(year, month, day)
+                    ret_date = dep_date + timedelta(days=req.duration)
+                    try:
+                        return day, await _search_calendar_day_async(dep_date, ret_date, req, semaphore), None
+                    except Exception as e:
+                        return day, None, e
+
+                for task in asyncio.as_completed([run_day(day) for day in future_days]):
+                    on_day_done(*(await task))
+
+            asyncio.run(run_all_days())
+        else:
+            def search_day(day: int, attempt: int) -> dict:
                 dep_date = datetime(year, month, day)
                 ret_date = dep_date + timedelta(days=req.duration)
-                future = executor.submit(_search_calendar_day, dep_date, ret_date, req)
-                future_to_day[future] = day
+                return _search_calendar_day(dep_date, ret_date, req, attempt)
 
-            for future in as_completed(future_to_day):
-                day = future_to_day[future]
+            # Parallel, Anzahl gleichzeitiger Tage regelt der AIMD-Controller;
+            # bei 403 kommt der Tag in die Delay-Queue statt den Thread zu blockieren
+            for day, future in run_bounded(future_days, search_day):
                 try:
-                    results_by_day[day] = future.result()
+                    on_day_done(day, future.result())
                 except Exception as e:
-                    print(f"[CALENDAR] Fehler Tag {day}: {e}")
-                    results_by_day[day] = {
-                        "date": datetime(year, month, day).strftime("%Y-%m-%d"),
-                        "min_price": None,
-                        "deals_count": 0,
-                        "deals": [],
-                    }
-                processed += 1
-                jobs[job_id]["progress"] = int((processed / total_future) * 95) if total_future else 95
-                jobs[job_id]["message"] = f"Prüfe Tage... ({processed}/{total_future})"
+                    on_day_done(day, None, e)
 
         # Ergebnisse in Reihenfolge sortieren
         dates_data = [results_by_day[day] for day in range(1, num_days + 1)]
@@ -844,7 +990,11 @@ if os.path.isdir(FRONTEND_DIR):
 
 @app.on_event("startup")
 def on_startup():
+    import_cache_snapshot()
     start_alert_scheduler()
+    start_cache_janitor()
+    # Prewarmer nur in Leerlaufphasen: kein Job wartet oder läuft
+    start_prewarmer(lambda: not any(j.get("status") in ("pending", "running") for j in jobs.values()))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,114 @@
+"""
+Flight Scout Metrics - leichte In-Process-Messwerte für /admin/upstream.
+"""
+
+import threading
+from bisect import bisect_left
+from collections import OrderedDict, deque
+
+# Bucket-Grenzen der Latenz-Histogramme in Sekunden (letzter Bucket: darüber)
+HISTOGRAM_BOUNDS = (0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30)
+
+
+class LatencyRecorder:
+    """Die letzten `window` Messungen (Sekunden) mit Perzentilen."""
+
+    def __init__(self, window: int = 2048):
+        self._samples: deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+            self.count += 1
+
+    def percentile(self, p: float) -> float | None:
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(p / 100 * len(samples)))]
+
+    def stats(self) -> dict:
+        with self._lock:
+            samples = sorted(self._samples)
+            count = self.count
+        if not samples:
+            return {"count": count}
+
+        def pct(p):
+            return round(samples[min(len(samples) - 1, int(p / 100 * len(samples)))] * 1000, 2)
+
+        return {
+            "count": count,
+            "p50_ms": pct(50),
+            "p90_ms": pct(90),
+            "p99_ms": pct(99),
+            "max_ms": round(samples[-1] * 1000, 2),
+        }
+
+
+class LatencyHistogram(LatencyRecorder):
+    """LatencyRecorder plus Histogramm über alle Messungen seit dem Start (nicht nur das Fenster)."""
+
+    def __init__(self, window: int = 2048, bounds: tuple = HISTOGRAM_BOUNDS):
+        super().__init__(window)
+        self.bounds = bounds
+        self._buckets = [0] * (len(bounds) + 1)
+
+    def record(self, seconds: float):
+        bucket = bisect_left(self.bounds, seconds)
+        with self._lock:
+            self._samples.append(seconds)
+            self.count += 1
+            self._buckets[bucket] += 1
+
+    def histogram(self) -> dict:
+        with self._lock:
+            buckets = list(self._buckets)
+        labels = [f"<={b:g}s" for b in self.bounds] + [f">{self.bounds[-1]:g}s"]
+        return dict(zip(labels, buckets))
+
+    def stats(self) -> dict:
+        return {**super().stats(), "histogram": self.histogram()}
+
+
+class KeyedLatency:
+    """Ein LatencyRecorder pro Schlüssel (z.B. Ziel-Stadt), höchstens max_keys Schlüssel."""
+
+    def __init__(self, window: int = 256, max_keys: int = 500):
+        self.window = window
+        self.max_keys = max_keys
+        self._recorders: OrderedDict[str, LatencyRecorder] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, key: str, seconds: float):
+        with self._lock:
+            recorder = self._recorders.get(key)
+            if recorder is None:
+                recorder = self._recorders[key] = LatencyRecorder(self.window)
+                while len(self._recorders) > self.max_keys:
+                    self._recorders.popitem(last=False)
+            self._recorders.move_to_end(key)
+        recorder.record(seconds)
+
+    def stats(self, names: dict | None = None, top: int = 20) -> dict:
+        """p50/p99 pro Schlüssel, die langsamsten (p99) zuerst. names: Schlüssel -> Anzeigename."""
+        with self._lock:
+            items = list(self._recorders.items())
+        rows = []
+        for key, recorder in items:
+            stats = recorder.stats()
+            if "p99_ms" in stats:
+                rows.append({"key": key, "name": (names or {}).get(key, key), "count": stats["count"],
+                             "p50_ms": stats["p50_ms"], "p99_ms": stats["p99_ms"]})
+        rows.sort(key=lambda r: r["p99_ms"], reverse=True)
+        return {"keys": len(items), "slowest": rows[:top]}
+
+
+# SQLite-Schreibzugriffe im search_cache (set_cache)
+CACHE_WRITE_LATENCY = LatencyRecorder()
+
+# Detail-Calls pro Ziel-Stadt, Ende-zu-Ende inkl. Hedging (beide Engines)
+DETAIL_CITY_LATENCY = KeyedLatency()
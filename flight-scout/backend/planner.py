@@ -0,0 +1,119 @@
+"""
+Flight Scout Planner - eine Suche (Airports × Dauern × Wochen) als eine flache Task-Liste.
+Einziger Orchestrierungspfad für Suchen: statt pro Airport und Dauer nacheinander zu suchen, laufen alle
+(Origin, Hinflug, Rückflug)-Trips auf einem gemeinsamen Executor.
+Planung und Kostenschätzung brauchen kein Netzwerk.
+"""
+
+import asyncio
+from datetime import datetime
+
+from cities import CITY_DATABASE
+from database import get_cache, get_cache_entry, CACHE_SWR_HOURS, CACHE_STALE_MAX_HOURS
+from proxies import PROXY_POOL
+from scraper import SkyscannerAPI, SkyscannerBase, TripTask, generate_trips
+from upstream import GOVERNOR, run_bounded
+
+# Durchschnittswerte für Trips ohne Cache-Eintrag
+EST_COUNTRIES_PER_TRIP = 8
+EST_CITIES_PER_COUNTRY = 2.5
+
+
+def plan_trips(airport_codes: list[str], start_date: datetime, end_date: datetime,
+               start_weekday: int, durations: list[int]) -> list[TripTask]:
+    """Alle Trips der Suche, ohne Duplikate (doppelte Airports/Dauern).
+    Sortiert nach Abflug: gleiche Tage verschiedener Airports/Dauern laufen zeitgleich,
+    überlappende Country-/Detail-Calls treffen dann Cache bzw. Singleflight."""
+    tasks = []
+    seen = set()
+    for code in dict.fromkeys(airport_codes):
+        for dur in dict.fromkeys(durations):
+            for dep, ret in generate_trips(start_date, end_date, start_weekday, dur):
+                key = (code, dep, ret)
+                if key in seen:
+                    continue
+                seen.add(key)
+                tasks.append(TripTask(dep, ret, origin=code))
+    tasks.sort(key=lambda t: (t.departure, t.return_date, t.origin))
+    return tasks
+
+
+def estimate_plan(tasks: list[TripTask], scrapers: dict[str, SkyscannerBase],
+                  cities: list[str] | None = None) -> dict:
+    """Request-Kosten eines Plans. Was im Cache liegt, wird ausgewertet (inkl. Filter
+    MAX_PRICE/Blacklist), für den Rest gelten die Durchschnittswerte oben."""
+    calls = {"everywhere": 0.0, "country": 0.0, "detail": 0.0}
+    hits = {"everywhere": 0, "country": 0, "detail": 0}
+
+    def detail(scraper, entity_id, task):
+        key = scraper._detail_cache_key(str(entity_id).replace("location-", ""), task.departure, task.return_date)
+        if get_cache(key) is not None:
+            hits["detail"] += 1
+        else:
+            calls["detail"] += 1
+
+    for task in tasks:
+        scraper = scrapers[task.origin]
+        if cities:
+            for city_name in cities:
+                city_info = CITY_DATABASE.get(city_name)
+                if city_info:
+                    detail(scraper, city_info["entity_id"], task)
+            continue
+
+        # Innerhalb des SWR-Fensters wird der alte Eintrag ohne Request geliefert
+        entry = get_cache_entry(scraper._everywhere_cache_key(task.departure, task.return_date), CACHE_STALE_MAX_HOURS)
+        data = entry[0] if entry is not None and entry[1] <= entry[2] + CACHE_SWR_HOURS else None
+        if data is None:
+            calls["everywhere"] += 1
+            calls["country"] += EST_COUNTRIES_PER_TRIP
+            calls["detail"] += EST_COUNTRIES_PER_TRIP * EST_CITIES_PER_COUNTRY
+            continue
+        hits["everywhere"] += 1
+
+        cheap_countries, _ = scraper._cheap_countries(data)
+        for country in cheap_countries:
+            key = scraper._country_cache_key(country["entity_id"], task.departure, task.return_date)
+            city_data = get_cache(key)
+            if city_data is None:
+                calls["country"] += 1
+                calls["detail"] += EST_CITIES_PER_COUNTRY
+                continue
+            hits["country"] += 1
+            for _, _, _, city_entity_id in scraper._cities_in_country(city_data):
+                detail(scraper, city_entity_id, task)
+
+    requests_total = sum(calls.values())
+    # Engpass ist das Rate-Budget: global oder Summe der Proxy-Budgets (ohne Proxy: eins)
+    rate = min(GOVERNOR.global_bucket.rate, GOVERNOR.proxy_rate * max(1, PROXY_POOL.healthy_count()))
+    seconds = max(0.0, requests_total - GOVERNOR.global_bucket.burst) / rate
+    return {
+        "trips": len(tasks),
+        "requests": {**{k: round(v) for k, v in calls.items()}, "total": round(requests_total)},
+        "cache_hits": hits,
+        "rate_per_s": round(rate, 2),
+        "estimated_seconds": round(seconds),
+    }
+
+
+def execute_plan(tasks: list[TripTask], scrapers: dict[str, SkyscannerAPI], run_task,
+                 cancel_check=None, on_trip_done=None):
+    """run_task(scraper, task, attempt) für alle Tasks auf einem Executor (run_bounded).
+    on_trip_done(task, deals) pro fertigem Trip."""
+    def process(task: TripTask, attempt: int):
+        return run_task(scrapers[task.origin], task, attempt)
+
+    for task, future in run_bounded(tasks, process, cancel_check=cancel_check):
+        if on_trip_done:
+            on_trip_done(task, future.result())
+
+
+async def execute_plan_async(tasks: list[TripTask], scrapers: dict, run_task, on_trip_done=None):
+    """Async-Variante: alle Tasks auf einem Event-Loop, begrenzt durch die Semaphore der Scraper."""
+    async def process(task: TripTask):
+        return task, await run_task(scrapers[task.origin], task)
+
+    for coro in asyncio.as_completed([process(t) for t in tasks]):
+        task, deals = await coro
+        if on_trip_done:
+            on_trip_done(task, deals)
@@ -0,0 +1,108 @@
+"""
+Flight Scout Prewarmer - hält die Everywhere-Ergebnisse der meistgesuchten
+(Airport, Wochenende, Dauer)-Kombinationen aus search_log warm.
+Refresht nur, wenn keine Suche läuft, und kurz bevor die TTL abläuft.
+Alle Requests laufen über den globalen Rate-Governor wie jede andere Suche.
+"""
+
+import os
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from alerts import AIRPORTS
+from cache import PREWARM_TRACKER
+
+PREWARM_TOP_N = int(os.environ.get("PREWARM_TOP_N", "30"))  # 0 = aus
+PREWARM_INTERVAL = int(os.environ.get("PREWARM_INTERVAL", "900"))
+PREWARM_LOOKBACK_DAYS = int(os.environ.get("PREWARM_LOOKBACK_DAYS", "14"))
+# Ab diesem Anteil der TTL wird vorab erneuert (0.8 = in den letzten 20%)
+PREWARM_REFRESH_AT = float(os.environ.get("PREWARM_REFRESH_AT", "0.8"))
+
+PREWARM_STATS = {"cycles": 0, "candidates": 0, "refreshed": 0, "fresh": 0, "failed": 0, "interrupted": 0, "last_run": None}
+
+
+def rank_popular_trips(searches: list[dict], top_n: int = PREWARM_TOP_N) -> list[tuple[tuple, int]]:
+    """Zählt (Airport, Hinflug, Rückflug, Erwachsene) über alle geloggten Everywhere-Suchen."""
+    from scraper import generate_trips
+
+    counts = Counter()
+    for s in searches:
+        try:
+            start = datetime.strptime(s["start_date"], "%Y-%m-%d")
+            end = datetime.strptime(s["end_date"], "%Y-%m-%d")
+            durations = {int(d) for d in (s.get("durations") or "2").split(",") if d.strip()}
+        except (TypeError, ValueError):
+            continue
+        weekday = s.get("start_weekday")
+        weekday = 4 if weekday is None else weekday
+        adults = s.get("adults") or 1
+        for code in (s.get("airports") or "").split(","):
+            code = code.strip().lower()
+            if code not in AIRPORTS:
+                continue
+            for duration in durations:
+                for dep, ret in generate_trips(start, end, weekday, duration):
+                    counts[(code, dep, ret, adults)] += 1
+    return counts.most_common(top_n)
+
+
+def run_prewarm_cycle(is_idle=None) -> dict:
+    """Ein Durchlauf: Top-Kombinationen prüfen, fällige sequentiell erneuern."""
+    from database import get_recent_everywhere_searches, get_cache_entry, CACHE_STALE_MAX_HOURS
+    from scraper import SkyscannerAPI, _refresh_everywhere
+
+    ranked = rank_popular_trips(get_recent_everywhere_searches(PREWARM_LOOKBACK_DAYS))
+    result = {"candidates": len(ranked), "refreshed": 0, "fresh": 0, "failed": 0, "interrupted": False}
+    for (code, dep, ret, adults), count in ranked:
+        if is_idle is not None and not is_idle():
+            print("[PREWARM] Suche läuft -> Zyklus abgebrochen")
+            result["interrupted"] = True
+            break
+        airport = AIRPORTS[code]
+        api = SkyscannerAPI(origin_entity_id=airport["id"], adults=adults, origin_sky_code=airport["code"])
+        cache_key = api._everywhere_cache_key(dep, ret)
+        api.close()
+        entry = get_cache_entry(cache_key, CACHE_STALE_MAX_HOURS)
+        if entry is not None and entry[1] < entry[2] * PREWARM_REFRESH_AT:
+            result["fresh"] += 1
+            continue
+        if _refresh_everywhere(airport["id"], adults, airport["code"], dep, ret):
+            PREWARM_TRACKER.warmed(cache_key)
+            result["refreshed"] += 1
+            print(f"[PREWARM] {code.upper()} {dep.strftime('%d.%m.')}-{ret.strftime('%d.%m.')} erneuert ({count}x gesucht)")
+        else:
+            result["failed"] += 1
+
+    PREWARM_STATS["cycles"] += 1
+    for k in ("candidates", "refreshed", "fresh", "failed"):
+        PREWARM_STATS[k] += result[k]
+    PREWARM_STATS["interrupted"] += int(result["interrupted"])
+    PREWARM_STATS["last_run"] = datetime.now().isoformat(timespec="seconds")
+    return result
+
+
+def prewarm_stats() -> dict:
+    return {**PREWARM_STATS, **PREWARM_TRACKER.stats(), "top_n": PREWARM_TOP_N, "interval_s": PREWARM_INTERVAL}
+
+
+def start_prewarmer(is_idle=None):
+    """Hintergrund-Thread: alle PREWARM_INTERVAL Sekunden ein Zyklus."""
+    if PREWARM_TOP_N <= 0:
+        print("[PREWARM] Deaktiviert (PREWARM_TOP_N=0)")
+        return
+
+    def prewarm_loop():
+        while True:
+            time.sleep(PREWARM_INTERVAL)
+            try:
+                result = run_prewarm_cycle(is_idle)
+                print(f"[PREWARM] {result['refreshed']} erneuert, {result['fresh']} frisch, "
+                      f"{result['failed']} fehlgeschlagen von {result['candidates']} Kandidaten")
+            except Exception as e:
+                print(f"[PREWARM] Fehler im Zyklus: {e}")
+
+    thread = threading.Thread(target=prewarm_loop, daemon=True)
+    thread.start()
+    print(f"[PREWARM] Gestartet (Top {PREWARM_TOP_N}, alle {PREWARM_INTERVAL}s)")
@@ -0,0 +1,198 @@
+"""
+Flight Scout Proxy Pool - Proxy-Auswahl nach Gesundheit statt random.choice.
+Pro Proxy werden Latenz, Fehler- und 403-Rate mitgeschrieben; kaputte Proxies
+kommen mit exponentiellem Backoff in Quarantäne. proxies_europe.txt wird bei
+Änderung automatisch neu geladen.
+"""
+
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from upstream import proxy_label
+
+PROXY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "proxies_europe.txt")
+PROXY_QUARANTINE_BASE = float(os.environ.get("PROXY_QUARANTINE_BASE", "30"))  # Sekunden, verdoppelt sich pro Strike
+PROXY_QUARANTINE_MAX = float(os.environ.get("PROXY_QUARANTINE_MAX", "1800"))
+PROXY_403_STRIKES = int(os.environ.get("PROXY_403_STRIKES", "2"))  # 403 in Folge bis Quarantäne
+PROXY_RELOAD_INTERVAL = float(os.environ.get("PROXY_RELOAD_INTERVAL", "30"))  # mtime-Check
+
+EWMA_ALPHA = 0.2
+
+
+def _load_proxy_urls() -> tuple[list[str], str]:
+    """Proxies laden: Datei (host:port:user:pw) zuerst, sonst PROXY_URL (kommagetrennt)."""
+    if os.path.isfile(PROXY_FILE):
+        urls = []
+        with open(PROXY_FILE, "r") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                parts = line.split(":")
+                if len(parts) == 4:
+                    host, port, user, pw = parts
+                    urls.append(f"http://{user}:{pw}@{host}:{port}")
+        return urls, "proxies_europe.txt"
+    env = os.environ.get("PROXY_URL", "")
+    return [p.strip() for p in env.split(",") if p.strip()], "Umgebungsvariable"
+
+
+@dataclass
+class ProxyHealth:
+    url: str
+    requests: int = 0
+    successes: int = 0
+    errors: int = 0
+    throttles: int = 0
+    latency_ewma: Optional[float] = None
+    error_ewma: float = 0.0  # 0..1, gleitende Fehler-/403-Quote
+    strikes: int = 0  # Quarantänen in Folge (für den Backoff)
+    consecutive_403: int = 0
+    quarantined_until: float = 0.0
+
+    def quarantined(self, now: float) -> bool:
+        return self.quarantined_until > now
+
+    def score(self) -> float:
+        """Gewicht für die Auswahl: schnelle, fehlerfreie Proxies werden bevorzugt."""
+        latency = self.latency_ewma if self.latency_ewma is not None else 1.0
+        return (1.0 - self.error_ewma) ** 2 / (0.5 + latency) + 0.01
+
+    def _observe(self, failed: bool):
+        self.requests += 1
+        self.error_ewma += EWMA_ALPHA * ((1.0 if failed else 0.0) - self.error_ewma)
+
+
+class ProxyPool:
+    def __init__(self, loader=_load_proxy_urls, reload_interval: float = PROXY_RELOAD_INTERVAL):
+        self._loader = loader
+        self.reload_interval = reload_interval
+        self._lock = threading.Lock()
+        self._proxies: dict[str, ProxyHealth] = {}
+        self._mtime: Optional[float] = None
+        self._last_check = 0.0
+        self.reloads = 0
+        self.reload()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._proxies)
+
+    def _file_mtime(self) -> Optional[float]:
+        try:
+            return os.path.getmtime(PROXY_FILE)
+        except OSError:
+            return None
+
+    def reload(self) -> int:
+        """Proxy-Liste neu einlesen. Stats bleiben für Proxies erhalten, die weiter drin sind."""
+        urls, source = self._loader()
+        with self._lock:
+            self._proxies = {url: self._proxies.get(url) or ProxyHealth(url) for url in urls}
+            self._mtime = self._file_mtime()
+            self._last_check = time.monotonic()
+            self.reloads += 1
+        if urls:
+            print(f"[PROXY] {len(urls)} Proxy(s) aus {source} geladen")
+        return len(urls)
+
+    def _maybe_reload(self):
+        now = time.monotonic()
+        if now - self._last_check < self.reload_interval:
+            return
+        self._last_check = now
+        if self._file_mtime() != self._mtime:
+            self.reload()
+
+    def pick(self, exclude: Optional[str] = None) -> Optional[str]:
+        """Gesunden Proxy gewichtet nach Score wählen. Sind alle in Quarantäne,
+        den nehmen, der am frühesten wieder frei wird."""
+        self._maybe_reload()
+        with self._lock:
+            if not self._proxies:
+                return None
+            now = time.monotonic()
+            candidates = [p for p in self._proxies.values() if not p.quarantined(now) and p.url != exclude]
+            if not candidates:
+                candidates = [p for p in self._proxies.values() if not p.quarantined(now)]
+            if not candidates:
+                return min(self._proxies.values(), key=lambda p: p.quarantined_until).url
+            return random.choices(candidates, weights=[p.score() for p in candidates])[0].url
+
+    def _quarantine(self, health: ProxyHealth, reason: str):
+        health.strikes += 1
+        duration = min(PROXY_QUARANTINE_MAX, PROXY_QUARANTINE_BASE * 2 ** (health.strikes - 1))
+        health.quarantined_until = time.monotonic() + duration
+        print(f"[PROXY] {proxy_label(health.url)} in Quarantäne für {duration:.0f}s ({reason})")
+
+    def report_success(self, proxy: Optional[str], latency: float):
+        with self._lock:
+            health = self._proxies.get(proxy)
+            if health is None:
+                return
+            health._observe(False)
+            health.successes += 1
+            health.consecutive_403 = 0
+            health.strikes = 0
+            health.latency_ewma = latency if health.latency_ewma is None else \
+                health.latency_ewma + EWMA_ALPHA * (latency - health.latency_ewma)
+
+    def report_throttle(self, proxy: Optional[str]):
+        with self._lock:
+            health = self._proxies.get(proxy)
+            if health is None:
+                return
+            health._observe(True)
+            health.throttles += 1
+            health.consecutive_403 += 1
+            if health.consecutive_403 >= PROXY_403_STRIKES:
+                health.consecutive_403 = 0
+                self._quarantine(health, "403")
+
+    def report_error(self, proxy: Optional[str]):
+        """Verbindungs-/Auth-Fehler: Proxy sofort in Quarantäne."""
+        with self._lock:
+            health = self._proxies.get(proxy)
+            if health is None:
+                return
+            health._observe(True)
+            health.errors += 1
+            self._quarantine(health, "Proxy-Fehler")
+
+    def healthy_count(self) -> int:
+        with self._lock:
+            now = time.monotonic()
+            return sum(1 for p in self._proxies.values() if not p.quarantined(now))
+
+    def stats(self) -> dict:
+        with self._lock:
+            now = time.monotonic()
+            proxies = []
+            for p in self._proxies.values():
+                proxies.append({
+                    "proxy": proxy_label(p.url),
+                    "requests": p.requests,
+                    "successes": p.successes,
+                    "errors": p.errors,
+                    "throttles": p.throttles,
+                    "error_rate": round(p.errors / p.requests, 3) if p.requests else None,
+                    "rate_403": round(p.throttles / p.requests, 3) if p.requests else None,
+                    "latency_ms": round(p.latency_ewma * 1000) if p.latency_ewma is not None else None,
+                    "score": round(p.score(), 3),
+                    "quarantined_s": round(p.quarantined_until - now) if p.quarantined(now) else 0,
+                    "strikes": p.strikes,
+                })
+            return {
+                "total": len(proxies),
+                "healthy": sum(1 for p in self._proxies.values() if not p.quarantined(now)),
+                "reloads": self.reloads,
+                "proxies": sorted(proxies, key=lambda p: -p["score"]),
+            }
+
+
+# Prozessweit: alle Sessions (Threads und Async) wählen hier ihren Proxy
+PROXY_POOL = ProxyPool()
@@ -5,7 +5,6 @@ Skyscanner Weekend Flight Scraper - API Version & PDF Report
 """
 
 import requests
-import json
 import uuid
 import random
 import os
@@ -14,9 +13,11 @@ from dataclasses import dataclass, asdict, field
 from typing import Optional
 import time
 import threading
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED, TimeoutError as FuturesTimeout
 from fpdf import FPDF
 
+import fastjson
+
 PDF_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pdfs")
 os.makedirs(PDF_DIR, exist_ok=True)
 
@@ -34,6 +35,13 @@ USER_AGENTS = [
 ]
 
 from cities import CITY_DATABASE
+from session_pool import SessionPool, WarmSession, jar_key, dump_cookies, load_cookies
+from upstream import (
+    GOVERNOR, CONCURRENCY, SINGLE_FLIGHT, BREAKER, HEDGER, TIMEOUTS, DETAIL_HEDGE, CircuitOpen, RetryLater,
+)
+from metrics import DETAIL_CITY_LATENCY, LatencyRecorder
+from proxies import PROXY_POOL
+from cache import REFRESHER, TTL_STATS, PREWARM_TRACKER, effective_ttl, project_everywhere, project_country, project_detail
 
 
 
@@ -53,6 +61,18 @@ class FlightDeal:
     longitude: float = 0.0
     early_departure: bool = False  # True = Abflug vor gewünschter Uhrzeit
     alternatives: list = field(default_factory=list)  # Weitere Flugoptionen
+    stale: bool = False  # Aus abgelaufenen Cache-Daten (Stale-while-revalidate / Upstream blockiert)
+
+
+@dataclass
+class TripTask:
+    """Ein Trip als Work-Item. Überlebt zurückgestellte 403-Retries, damit der
+    nächste Versuch fertige Länder überspringt."""
+    departure: datetime
+    return_date: datetime
+    done_countries: set = field(default_factory=set)
+    deals: list = field(default_factory=list)
+    origin: str = ""  # Airport-Code, wenn der Planner mehrere Airports mischt
 
 
 class FlightReport(FPDF):
@@ -184,28 +204,248 @@ def create_pdf_report(deals: list[FlightDeal], origin: str, filename="Flight_Rep
     pdf.output(filename)
 
 
-# Proxy configuration: file first, then env var fallback
-PROXY_URLS = []
-_proxy_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "proxies_europe.txt")
-if os.path.isfile(_proxy_file):
-    with open(_proxy_file, "r") as _f:
-        for _line in _f:
-            _line = _line.strip()
-            if not _line:
+# Wartezeiten nach einem 403 (Sekunden), danach gilt die Anfrage als geblockt
+RETRY_403_DELAYS = [30, 60]
+
+# Parallele Country-/Detail-Calls innerhalb eines Trips (1 = sequentiell)
+TRIP_FANOUT = int(os.environ.get("TRIP_FANOUT", "4"))
+
+HOMEPAGE_URL = "https://www.skyscanner.at/"
+FLIGHTS_PAGE_URL = "https://www.skyscanner.at/transport/fluge/vie/?adultsv2=1&cabinclass=economy"
+
+# Nur für die Everywhere-/Country-Suche, Detail-Calls schicken sie nicht mit
+EXPLORE_HEADERS = (
+    "x-radar-combined-explore-generic-results",
+    "x-radar-combined-explore-unfocused-locations-use-real-data",
+)
+
+
+def _browser_profile() -> tuple[str, str, str]:
+    """Random browser identity: (user-agent, sec-ch-ua, platform)."""
+    ua, sec_ch_ua = random.choice(USER_AGENTS)
+    platform = '"macOS"' if 'Macintosh' in ua else '"Windows"'
+    return ua, sec_ch_ua, platform
+
+
+def _browser_headers(ua: str, sec_ch_ua: str, platform: str) -> dict:
+    """Headers für den Homepage-Warmup (Navigation wie ein echter Browser)."""
+    return {
+        "accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8",
+        "accept-encoding": "gzip, deflate, br, zstd",
+        "accept-language": "de-DE,de;q=0.9,en-US;q=0.8,en;q=0.7",
+        "cache-control": "max-age=0",
+        "sec-ch-ua": sec_ch_ua,
+        "sec-ch-ua-mobile": "?0",
+        "sec-ch-ua-platform": platform,
+        "sec-fetch-dest": "document",
+        "sec-fetch-mode": "navigate",
+        "sec-fetch-site": "none",
+        "sec-fetch-user": "?1",
+        "upgrade-insecure-requests": "1",
+        "user-agent": ua,
+    }
+
+
+def _api_headers(ua: str, sec_ch_ua: str, platform: str, traveller_context: str, view_id: str) -> dict:
+    """Headers für die JSON-API nach dem Warmup."""
+    return {
+        "accept": "application/json",
+        "accept-encoding": "gzip, deflate, br, zstd",
+        "accept-language": "de-DE,de;q=0.9,en-US;q=0.8,en;q=0.7",
+        "content-type": "application/json",
+        "origin": "https://www.skyscanner.at",
+        "referer": FLIGHTS_PAGE_URL,
+        "sec-ch-ua": sec_ch_ua,
+        "sec-ch-ua-mobile": "?0",
+        "sec-ch-ua-platform": platform,
+        "sec-fetch-dest": "empty",
+        "sec-fetch-mode": "cors",
+        "sec-fetch-site": "same-origin",
+        "user-agent": ua,
+        "x-radar-combined-explore-generic-results": "1",
+        "x-radar-combined-explore-unfocused-locations-use-real-data": "1",
+        "x-skyscanner-channelid": "website",
+        "x-skyscanner-currency": "EUR",
+        "x-skyscanner-locale": "de-DE",
+        "x-skyscanner-market": "AT",
+        "x-skyscanner-traveller-context": f"{traveller_context};1",
+        "x-skyscanner-viewid": view_id,
+    }
+
+
+
+def _is_proxy_error(exc) -> bool:
+    """Check if an exception is a proxy connectivity/auth error."""
+    msg = str(exc).lower()
+    return "proxyerror" in msg or "407" in msg or "tunnel connection failed" in msg
+
+
+def _restore_session(session: requests.Session, proxy_url: Optional[str]) -> Optional[WarmSession]:
+    """Gespeicherten Cookie-Jar des Proxys übernehmen statt zu warmen (None = kein gültiger Jar)."""
+    from database import load_session_jar, delete_session_jar
+    key = jar_key(proxy_url)
+    jar = load_session_jar(key)
+    if jar is None:
+        return None
+    if not load_cookies(session.cookies, jar["cookies"]):
+        delete_session_jar(key)
+        return None
+    session.headers.update(_api_headers(jar["user_agent"], jar["sec_ch_ua"], jar["platform"],
+                                        jar["traveller_context"], jar["view_id"]))
+    print(f"  [SESSION] Cookie-Jar übernommen, kein Warmup (Cookies: {len(session.cookies)})")
+    return WarmSession(session=session, traveller_context=jar["traveller_context"], view_id=jar["view_id"],
+                       proxy=proxy_url, restored=True)
+
+
+def _forget_session_jar(ws: WarmSession):
+    """Geblockte Session: ihren Jar nicht wiederverwenden (nur wenn er noch zu ihr gehört)."""
+    from database import delete_session_jar
+    delete_session_jar(jar_key(ws.proxy), ws.traveller_context)
+
+
+def _warm_session(max_proxy_retries=5) -> WarmSession:
+    """Session für den nächsten Proxy: gespeicherten Cookie-Jar übernehmen, sonst
+    Homepage + Flugseite besuchen, Jar speichern und API-Headers setzen."""
+    from database import save_session_jar
+    proxy_url = None
+    warmed = False
+    for attempt in range(max_proxy_retries):
+        session = requests.Session()
+        # Nach einem Proxy-Fehler nicht denselben Proxy nochmal
+        proxy_url = PROXY_POOL.pick(exclude=proxy_url)
+        if proxy_url:
+            session.proxies = {"http": proxy_url, "https": proxy_url}
+            print(f"  [PROXY] Verwende Proxy")
+        restored = _restore_session(session, proxy_url)
+        if restored is not None:
+            return restored
+        traveller_context = str(uuid.uuid4())
+        view_id = str(uuid.uuid4())
+        ua, sec_ch_ua, platform = _browser_profile()
+
+        # Schritt 1: Homepage besuchen wie ein echter Browser
+        browser_headers = _browser_headers(ua, sec_ch_ua, platform)
+        try:
+            GOVERNOR.wait(proxy_url)
+            started = time.monotonic()
+            session.get(HOMEPAGE_URL, timeout=TIMEOUTS.timeout("warmup", proxy_url), headers=browser_headers)
+            latency = time.monotonic() - started
+            PROXY_POOL.report_success(proxy_url, latency)
+            TIMEOUTS.record("warmup", proxy_url, latency)
+
+            # Schritt 2: Flugsuche-Seite besuchen (simuliert echten Nutzer)
+            browser_headers["referer"] = HOMEPAGE_URL
+            browser_headers["sec-fetch-site"] = "same-origin"
+            GOVERNOR.wait(proxy_url)
+            started = time.monotonic()
+            session.get(FLIGHTS_PAGE_URL, timeout=TIMEOUTS.timeout("warmup", proxy_url), headers=browser_headers)
+            TIMEOUTS.record("warmup", proxy_url, time.monotonic() - started)
+            warmed = True
+            break  # Warmup OK
+        except Exception as e:
+            if isinstance(e, requests.Timeout):
+                TIMEOUTS.record_timeout("warmup", proxy_url, time.monotonic() - started)
+            if _is_proxy_error(e):
+                PROXY_POOL.report_error(proxy_url)
+            if _is_proxy_error(e) and attempt < max_proxy_retries - 1:
+                print(f"  [SESSION] Proxy-Fehler, versuche anderen Proxy... ({attempt + 1}/{max_proxy_retries})")
                 continue
-            _parts = _line.split(":")
-            if len(_parts) == 4:
-                _host, _port, _user, _pw = _parts
-                PROXY_URLS.append(f"http://{_user}:{_pw}@{_host}:{_port}")
-    print(f"[PROXY] {len(PROXY_URLS)} Proxy(s) aus proxies_europe.txt geladen")
-else:
-    _proxy_env = os.environ.get("PROXY_URL", "")
-    if _proxy_env:
-        PROXY_URLS = [p.strip() for p in _proxy_env.split(",") if p.strip()]
-        print(f"[PROXY] {len(PROXY_URLS)} Proxy(s) aus Umgebungsvariable")
-
-
-class SkyscannerAPI:
+            print(f"  [SESSION] Warmup-Fehler: {e}")
+
+    # Schritt 3: API-Headers setzen (jetzt mit echten Cookies)
+    session.headers.update(_api_headers(ua, sec_ch_ua, platform, traveller_context, view_id))
+    print(f"  [SESSION] Neue Session bereit (Cookies: {len(session.cookies)})")
+    if warmed and len(session.cookies):
+        save_session_jar(jar_key(proxy_url), dump_cookies(session.cookies), ua, sec_ch_ua, platform,
+                         traveller_context, view_id)
+    return WarmSession(session=session, traveller_context=traveller_context, view_id=view_id, proxy=proxy_url)
+
+
+def generate_trips(start_date: datetime, end_date: datetime, start_weekday: int, duration: int) -> list[tuple[datetime, datetime]]:
+    """(Hinflug, Rückflug) für jeden start_weekday im Zeitraum. Reine Funktion, kein Netzwerk."""
+    trips = []
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    current = start_date
+    while current.weekday() != start_weekday:
+        current += timedelta(days=1)
+    while current <= end_date:
+        dep = current
+        ret = dep + timedelta(days=duration)
+        if ret <= end_date and dep >= today:
+            trips.append((dep, ret))
+        current += timedelta(days=7)
+    return trips
+
+
+def _report_status(status_code: int, proxy: Optional[str] = None, latency: float = 0.0):
+    """Antwort-Status an AIMD-Concurrency-Controller, Circuit-Breaker und Proxy-Pool melden."""
+    BREAKER.record(status_code)
+    if status_code == 403:
+        CONCURRENCY.on_throttle()
+        PROXY_POOL.report_throttle(proxy)
+    elif status_code == 200:
+        CONCURRENCY.on_success()
+        PROXY_POOL.report_success(proxy, latency)
+
+
+# Prozessweiter Pool: alle Worker aller Jobs teilen sich die gewärmten Sessions
+SESSION_POOL = SessionPool(_warm_session, on_blocked=_forget_session_jar)
+
+# Gehedgte Detail-Calls (DETAIL_HEDGE=1): Primär- und Hedge-Request laufen hier, damit der
+# Aufrufer auf den ersten Erfolg warten kann
+HEDGE_EXECUTOR = ThreadPoolExecutor(max_workers=64, thread_name_prefix="hedge")
+
+
+def _detail_headers(session: requests.Session) -> dict:
+    """Session-Headers ohne die Explore-Header (Detail-Calls schicken sie nicht mit)."""
+    headers = session.headers.copy()
+    for name in EXPLORE_HEADERS:
+        headers.pop(name, None)
+    return headers
+
+
+def detail_latency_stats() -> dict:
+    """p50/p99 der Detail-Calls pro Ziel-Stadt (Namen aus CITY_DATABASE) plus Hedging-Zähler."""
+    names = {str(info["entity_id"]): name for name, info in CITY_DATABASE.items()}
+    return {"per_city": DETAIL_CITY_LATENCY.stats(names), "hedging": HEDGER.stats()}
+
+
+def _refresh_everywhere(origin_entity_id: str, adults: int, origin_sky_code: str,
+                        departure: datetime, return_date: datetime) -> bool:
+    """Läuft im REFRESHER-Thread. Bei 403 kein Warten – der nächste Stale-Hit plant neu."""
+    from database import set_cache, CACHE_TTL_HOURS, CACHE_STALE_MAX_HOURS
+    api = SkyscannerAPI(origin_entity_id=origin_entity_id, adults=adults, origin_sky_code=origin_sky_code)
+    api.defer_403 = True
+    api.retry_attempt = len(RETRY_403_DELAYS)
+    cache_key = api._everywhere_cache_key(departure, return_date)
+    body = api._everywhere_body(departure, return_date)
+    label = f"REFRESH {origin_sky_code} {departure.strftime('%d.%m.')}"
+    if api._negative(cache_key, label):
+        return False
+    try:
+        bucket, ttl = effective_ttl(CACHE_TTL_HOURS, departure)
+        try:
+            status, data = SINGLE_FLIGHT.do(SINGLE_FLIGHT.key("everywhere", body), lambda: api._fetch(body, label, "everywhere", bucket=bucket))
+        except CircuitOpen:
+            return False
+        print(f"[{label}] -> HTTP {status}")
+        if status != 200:
+            api._remember_failure(cache_key, status)
+            return False
+        if not data.get("everywhereDestination", {}).get("results"):
+            api._remember_failure(cache_key, status, reason="empty")
+            return False
+        set_cache(cache_key, project_everywhere(data), ttl, CACHE_STALE_MAX_HOURS)
+        return True
+    finally:
+        api.close()
+
+
+class SkyscannerBase:
+    """Gemeinsamer Teil beider Engines ohne eigenes Netzwerk: Request-Bodies, Cache-Keys und
+    -Lookups, Parsing der Antworten und Deal-Bau. Sessions und Requests stecken in SkyscannerAPI
+    (requests, Threads) bzw. async_scraper.AsyncSkyscannerAPI (httpx, Event-Loop)."""
+
     API_URL = "https://www.skyscanner.at/g/radar/api/v2/web-unified-search/"
     MAX_PRICE = 70
     BLACKLIST_COUNTRIES: list[str] = []  # Leer = keine ausgeschlossen
@@ -214,118 +454,18 @@ class SkyscannerAPI:
     EASTER_END = datetime(2026, 4, 6)
 
     def __init__(self, origin_entity_id="95673444", adults=1, start_hour=14, origin_sky_code="vie", max_return_hour=23):
-        self.session = requests.Session()
-        self.traveller_context = str(uuid.uuid4())
-        self.view_id = str(uuid.uuid4())
         self.VIENNA_ENTITY_ID = origin_entity_id
         self.ORIGIN_SKY_CODE = origin_sky_code.lower()
-        self._apply_proxy()
-        self._setup_session()
         self.ADULTS = adults
         self.START_HOUR = start_hour
         self.MAX_RETURN_HOUR = max_return_hour
-        self.deals: list[FlightDeal] = []
         self._is_blocked = False
 
-    def _apply_proxy(self):
-        """Apply a random proxy from the configured list."""
-        if PROXY_URLS:
-            proxy_url = random.choice(PROXY_URLS)
-            self.session.proxies = {
-                "http": proxy_url,
-                "https": proxy_url,
-            }
-            print(f"  [PROXY] Verwende Proxy")
-
     def _is_proxy_error(self, exc):
-        """Check if an exception is a proxy connectivity/auth error."""
-        msg = str(exc).lower()
-        return "proxyerror" in msg or "407" in msg or "tunnel connection failed" in msg
-
-    def _setup_session(self, max_proxy_retries=5):
-        # Komplett neue Session mit frischen IDs
-        for attempt in range(max_proxy_retries):
-            self.session = requests.Session()
-            self._apply_proxy()
-            self.traveller_context = str(uuid.uuid4())
-            self.view_id = str(uuid.uuid4())
-            ua, sec_ch_ua = random.choice(USER_AGENTS)
-            platform = '"macOS"' if 'Macintosh' in ua else '"Windows"'
-
-            # Schritt 1: Homepage besuchen wie ein echter Browser
-            browser_headers = {
-                "accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8",
-                "accept-encoding": "gzip, deflate, br, zstd",
-                "accept-language": "de-DE,de;q=0.9,en-US;q=0.8,en;q=0.7",
-                "cache-control": "max-age=0",
-                "sec-ch-ua": sec_ch_ua,
-                "sec-ch-ua-mobile": "?0",
-                "sec-ch-ua-platform": platform,
-                "sec-fetch-dest": "document",
-                "sec-fetch-mode": "navigate",
-                "sec-fetch-site": "none",
-                "sec-fetch-user": "?1",
-                "upgrade-insecure-requests": "1",
-                "user-agent": ua,
-            }
-            try:
-                self.session.get("https://www.skyscanner.at/", timeout=15, headers=browser_headers)
-                time.sleep(random.uniform(1.5, 3.0))
-
-                # Schritt 2: Flugsuche-Seite besuchen (simuliert echten Nutzer)
-                browser_headers["referer"] = "https://www.skyscanner.at/"
-                browser_headers["sec-fetch-site"] = "same-origin"
-                self.session.get(
-                    "https://www.skyscanner.at/transport/fluge/vie/?adultsv2=1&cabinclass=economy",
-                    timeout=15, headers=browser_headers
-                )
-                time.sleep(random.uniform(1.0, 2.5))
-                break  # Warmup OK
-            except Exception as e:
-                if self._is_proxy_error(e) and attempt < max_proxy_retries - 1:
-                    print(f"  [SESSION] Proxy-Fehler, versuche anderen Proxy... ({attempt + 1}/{max_proxy_retries})")
-                    continue
-                print(f"  [SESSION] Warmup-Fehler: {e}")
-
-        # Schritt 3: API-Headers setzen (jetzt mit echten Cookies)
-        self.session.headers.update({
-            "accept": "application/json",
-            "accept-encoding": "gzip, deflate, br, zstd",
-            "accept-language": "de-DE,de;q=0.9,en-US;q=0.8,en;q=0.7",
-            "content-type": "application/json",
-            "origin": "https://www.skyscanner.at",
-            "referer": "https://www.skyscanner.at/transport/fluge/vie/?adultsv2=1&cabinclass=economy",
-            "sec-ch-ua": sec_ch_ua,
-            "sec-ch-ua-mobile": "?0",
-            "sec-ch-ua-platform": platform,
-            "sec-fetch-dest": "empty",
-            "sec-fetch-mode": "cors",
-            "sec-fetch-site": "same-origin",
-            "user-agent": ua,
-            "x-radar-combined-explore-generic-results": "1",
-            "x-radar-combined-explore-unfocused-locations-use-real-data": "1",
-            "x-skyscanner-channelid": "website",
-            "x-skyscanner-currency": "EUR",
-            "x-skyscanner-locale": "de-DE",
-            "x-skyscanner-market": "AT",
-            "x-skyscanner-traveller-context": f"{self.traveller_context};1",
-            "x-skyscanner-viewid": self.view_id,
-        })
-        print(f"  [SESSION] Neue Session bereit (Cookies: {len(self.session.cookies)})")
+        return _is_proxy_error(exc)
 
     def generate_trips(self, start_date: datetime, end_date: datetime, start_weekday: int, duration: int) -> list[tuple[datetime, datetime]]:
-        trips = []
-        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-        current = start_date
-        while current.weekday() != start_weekday:
-            current += timedelta(days=1)
-        while current <= end_date:
-            dep = current
-            ret = dep + timedelta(days=duration)
-            if ret <= end_date and dep >= today:
-                trips.append((dep, ret))
-            current += timedelta(days=7)
-        return trips
+        return generate_trips(start_date, end_date, start_weekday, duration)
 
     def is_easter_period(self, date: datetime) -> bool:
         return self.EASTER_START <= date <= self.EASTER_END
@@ -341,6 +481,543 @@ class SkyscannerAPI:
             f"&preferdirects=true&departure-times={start_minutes}-1439"
         )
 
+    def _everywhere_body(self, departure: datetime, return_date: datetime) -> dict:
+        return {
+            "cabinClass": "ECONOMY",
+            "childAges": [],
+            "adults": self.ADULTS,
+            "legs": [
+                {
+                    "legOrigin": {"@type": "entity", "entityId": self.VIENNA_ENTITY_ID},
+                    "legDestination": {"@type": "everywhere"},
+                    "dates": {"@type": "date", "year": departure.year, "month": departure.month, "day": departure.day}
+                },
+                {
+                    "legOrigin": {"@type": "everywhere"},
+                    "legDestination": {"@type": "entity", "entityId": self.VIENNA_ENTITY_ID},
+                    "dates": {"@type": "date", "year": return_date.year, "month": return_date.month, "day": return_date.day}
+                }
+            ],
+            "options": {"fareAttributes": {"selectedFareAttributes": []}}
+        }
+
+    def _country_body(self, country_entity_id: str, departure: datetime, return_date: datetime) -> dict:
+        return {
+            "cabinClass": "ECONOMY",
+            "childAges": [],
+            "adults": self.ADULTS,
+            "legs": [
+                {
+                    "legOrigin": {"@type": "entity", "entityId": self.VIENNA_ENTITY_ID},
+                    "legDestination": {"@type": "entity", "entityId": country_entity_id},
+                    "dates": {"@type": "date", "year": departure.year, "month": departure.month, "day": departure.day},
+                    "placeOfStay": country_entity_id
+                },
+                {
+                    "legOrigin": {"@type": "entity", "entityId": country_entity_id},
+                    "legDestination": {"@type": "entity", "entityId": self.VIENNA_ENTITY_ID},
+                    "dates": {"@type": "date", "year": return_date.year, "month": return_date.month, "day": return_date.day}
+                }
+            ],
+            "options": {"fareAttributes": {"selectedFareAttributes": []}}
+        }
+
+    def _detail_body(self, clean_dest_id: str, departure: datetime, return_date: datetime) -> dict:
+        return {
+            "cabinClass": "ECONOMY",
+            "childAges": [],
+            "adults": self.ADULTS,
+            "legs": [
+                {
+                    "legOrigin": {"@type": "entity", "entityId": self.VIENNA_ENTITY_ID},
+                    "legDestination": {"@type": "entity", "entityId": clean_dest_id},
+                    "dates": {"@type": "date", "year": str(departure.year), "month": str(departure.month).zfill(2), "day": str(departure.day).zfill(2)},
+                    "placeOfStay": clean_dest_id
+                },
+                {
+                    "legOrigin": {"@type": "entity", "entityId": clean_dest_id},
+                    "legDestination": {"@type": "entity", "entityId": self.VIENNA_ENTITY_ID},
+                    "dates": {"@type": "date", "year": str(return_date.year), "month": str(return_date.month).zfill(2), "day": str(return_date.day).zfill(2)}
+                }
+            ]
+        }
+
+    @staticmethod
+    def _json_result(response) -> tuple[int, Optional[dict]]:
+        """(status, json) – so lässt sich eine Antwort zwischen gleichzeitigen Callern teilen."""
+        return response.status_code, (fastjson.loads(response.content) if response.status_code == 200 else None)
+
+    def _negative(self, cache_key: str, label: str) -> Optional[str]:
+        """Grund, falls die Query gerade im Negativ-Cache steht (dann nicht erneut anfragen)."""
+        from database import get_negative
+        reason = get_negative(cache_key)
+        if reason:
+            print(f"  [{label}] Negativ-Cache ({reason}) -> übersprungen")
+        return reason
+
+    @staticmethod
+    def _remember_failure(cache_key: str, status: Optional[int], cancel_check=None, reason: Optional[str] = None):
+        """Endgültigen Fehlschlag in den Negativ-Cache. Nicht bei Abbruch durch den User."""
+        from database import set_negative, negative_reason
+        if cancel_check and cancel_check():
+            return
+        set_negative(cache_key, reason or negative_reason(status), status)
+
+    def _cached_everywhere(self, cache_key: str, departure: datetime, return_date: datetime,
+                           bucket: str) -> tuple[Optional[dict], Optional[dict]]:
+        """(sofort liefern, Fallback). Frisch -> direkt; innerhalb des SWR-Fensters -> als stale
+        direkt plus Refresh im Hintergrund; bis CACHE_STALE_MAX_HOURS -> nur Fallback bei Fehlern."""
+        from database import get_cache_entry, CACHE_SWR_HOURS, CACHE_STALE_MAX_HOURS
+        entry = get_cache_entry(cache_key, CACHE_STALE_MAX_HOURS)
+        if entry is None or not entry[0]:
+            TTL_STATS.record(bucket, "misses")
+            PREWARM_TRACKER.lookup(cache_key, False)
+            return None, None
+        cached, age_hours, ttl_hours = entry
+        results = cached.get("everywhereDestination", {}).get("results", [])
+        if age_hours <= ttl_hours:
+            TTL_STATS.record(bucket, "hits")
+            PREWARM_TRACKER.lookup(cache_key, True)
+            print(f"[CACHE HIT] {self.ORIGIN_SKY_CODE} {departure.strftime('%d.%m.')} -> {len(results)} Ergebnisse")
+            return cached, None
+        if age_hours <= ttl_hours + CACHE_SWR_HOURS:
+            TTL_STATS.record(bucket, "hits")
+            PREWARM_TRACKER.lookup(cache_key, True)
+            print(f"[CACHE STALE] {self.ORIGIN_SKY_CODE} {departure.strftime('%d.%m.')} -> {len(results)} Ergebnisse "
+                  f"({age_hours:.1f}h alt), Refresh im Hintergrund")
+            self._schedule_refresh(cache_key, departure, return_date)
+            return {**cached, "stale": True}, None
+        TTL_STATS.record(bucket, "misses")
+        PREWARM_TRACKER.lookup(cache_key, False)
+        return None, cached
+
+    @staticmethod
+    def _stale_fallback(stale: Optional[dict], label: str) -> dict:
+        if not stale:
+            return {}
+        print(f"[{label}] Upstream blockiert -> liefere veraltete Cache-Daten")
+        return {**stale, "stale": True}
+
+    def _schedule_refresh(self, cache_key: str, departure: datetime, return_date: datetime):
+        """Everywhere-Eintrag im Hintergrund neu laden (eigene Session, ein Versuch ohne 403-Wartezeit)."""
+        origin = (self.VIENNA_ENTITY_ID, self.ADULTS, self.ORIGIN_SKY_CODE)
+        REFRESHER.schedule(cache_key, lambda: _refresh_everywhere(*origin, departure, return_date))
+
+    def _everywhere_cache_key(self, departure: datetime, return_date: datetime) -> str:
+        return f"{self.ORIGIN_SKY_CODE}_{departure.strftime('%Y-%m-%d')}_{return_date.strftime('%Y-%m-%d')}_{self.ADULTS}"
+
+    def _country_cache_key(self, country_entity_id: str, departure: datetime, return_date: datetime) -> str:
+        return f"country_{self.ORIGIN_SKY_CODE}_{country_entity_id}_{departure.strftime('%Y-%m-%d')}_{return_date.strftime('%Y-%m-%d')}_{self.ADULTS}"
+
+    def _detail_cache_key(self, clean_dest_id: str, departure: datetime, return_date: datetime) -> str:
+        return f"detail_{self.ORIGIN_SKY_CODE}_{clean_dest_id}_{departure.strftime('%Y-%m-%d')}_{return_date.strftime('%Y-%m-%d')}_{self.ADULTS}"
+
+    @staticmethod
+    def _negative_details(reason: str) -> Optional[dict]:
+        """Ergebnis eines Detail-Calls, der im Negativ-Cache steht. "negative" heißt: nur diese
+        Stadt überspringen, nicht den ganzen Trip als geblockt markieren."""
+        if reason == "blocked":
+            return {"status": "blocked", "negative": True}
+        if reason == "empty":
+            return {"status": "too_early_or_expensive"}
+        return None
+
+    def _parse_flight_details(self, data: dict, departure: datetime) -> dict:
+        """Filtert die Itineraries eines Detail-Calls nach MAX_PRICE / START_HOUR."""
+        itineraries = data.get("itineraries", {}).get("results", [])
+        print(f"  [API] {len(itineraries)} Itineraries gefunden")
+
+        valid_options = []  # (price, dep_time, ret_time, early)
+        early_options = []
+        skipped_price = 0
+
+        min_hour = 7 if self.is_easter_period(departure) else self.START_HOUR
+
+        for itinerary in itineraries:
+            total_price = float(itinerary.get("price", {}).get("raw", 9999))
+            price_per_person = total_price / self.ADULTS
+
+            if price_per_person > self.MAX_PRICE:
+                skipped_price += 1
+                continue
+
+            legs = itinerary.get("legs", [])
+            if not legs:
+                continue
+
+            departure_str = legs[0].get("departure", "")
+            if not departure_str:
+                continue
+
+            try:
+                dep_dt = datetime.fromisoformat(departure_str)
+                ret_time = ""
+                ret_arr_time = ""
+                if len(legs) >= 2:
+                    ret_dep_str = legs[1].get("departure", "")
+                    if ret_dep_str:
+                        ret_time = datetime.fromisoformat(ret_dep_str).strftime("%H:%M")
+                    ret_arr_str = legs[1].get("arrival", "")
+                    if ret_arr_str:
+                        ret_arr_time = datetime.fromisoformat(ret_arr_str).strftime("%H:%M")
+
+                dep_time = dep_dt.strftime("%H:%M")
+                option = {"price": price_per_person, "time": dep_time, "return_time": ret_time, "return_arrival": ret_arr_time}
+
+                if dep_dt.hour < min_hour:
+                    option["early_departure"] = True
+                    early_options.append(option)
+                else:
+                    option["early_departure"] = False
+                    valid_options.append(option)
+            except ValueError:
+                continue
+
+        # Nach Preis sortieren
+        valid_options.sort(key=lambda x: x["price"])
+        early_options.sort(key=lambda x: x["price"])
+
+        if valid_options:
+            best = valid_options[0]
+            # Alternativen: die nächsten 2 (andere Preis/Zeit-Kombination)
+            alternatives = []
+            seen = {(best["time"], best["return_time"])}
+            for opt in valid_options[1:]:
+                key = (opt["time"], opt["return_time"])
+                if key not in seen:
+                    alternatives.append(opt)
+                    seen.add(key)
+                if len(alternatives) >= 3:
+                    break
+
+            return {
+                "price": best["price"], "status": "ok",
+                "time": best["time"], "return_time": best["return_time"],
+                "early_departure": False, "alternatives": alternatives,
+            }
+
+        if not valid_options and itineraries:
+            print(f"  [FILTER] Alle rausgefiltert! Preis>{self.MAX_PRICE}€: {skipped_price}, Abflug<{min_hour}h: {len(early_options)}")
+
+        # Fallback: Frühflüge
+        if early_options:
+            best = early_options[0]
+            print(f"  [FILTER] Frühflug-Fallback: {best['price']:.0f}€ um {best['time']} (vor {min_hour}h)")
+            alternatives = []
+            seen = {(best["time"], best["return_time"])}
+            for opt in early_options[1:]:
+                key = (opt["time"], opt["return_time"])
+                if key not in seen:
+                    opt["early_departure"] = True
+                    alternatives.append(opt)
+                    seen.add(key)
+                if len(alternatives) >= 3:
+                    break
+
+            return {
+                "price": best["price"], "status": "ok",
+                "time": best["time"], "return_time": best["return_time"],
+                "early_departure": True, "alternatives": alternatives,
+            }
+
+        return {"status": "too_early_or_expensive"}
+
+    def _stale_country(self, cache_key: str) -> dict:
+        """Stale-on-403 für Country-Daten (bis CACHE_STALE_MAX_HOURS), als stale markiert wie beim Everywhere-Fallback."""
+        from database import get_cache_entry, CACHE_STALE_MAX_HOURS
+        entry = get_cache_entry(cache_key, CACHE_STALE_MAX_HOURS)
+        if entry is None:
+            return {}
+        print(f"  [COUNTRY] Upstream blockiert -> veraltete Cache-Daten ({entry[1]:.1f}h alt)")
+        return {**entry[0], "stale": True}
+
+    def _cheap_countries(self, data: dict) -> tuple[list[dict], list[str]]:
+        """Länder aus der Everywhere-Antwort, die unter MAX_PRICE liegen."""
+        results = data.get("everywhereDestination", {}).get("results", [])
+        cheap_countries = []
+        skipped_countries = []
+
+        for result in results:
+            if result.get("type") != "LOCATION":
+                continue
+            content = result.get("content", {})
+            location = content.get("location", {})
+            flight_quotes = content.get("flightQuotes", {})
+            if not flight_quotes:
+                continue
+
+            raw_price = flight_quotes.get("cheapest", {}).get("rawPrice", 999)
+            price_per_person = raw_price / self.ADULTS
+            country_name = location.get("name")
+
+            # Blacklist check
+            if self.BLACKLIST_COUNTRIES and country_name in self.BLACKLIST_COUNTRIES:
+                continue
+
+            if location.get("type") == "Nation":
+                if price_per_person <= self.MAX_PRICE:
+                    cheap_countries.append({
+                        "name": country_name,
+                        "entity_id": location.get("id"),
+                        "price": price_per_person
+                    })
+                else:
+                    skipped_countries.append(f"{country_name} ({price_per_person:.0f}€)")
+
+        return cheap_countries, skipped_countries
+
+    def _cities_in_country(self, city_data: dict) -> list[tuple]:
+        """Städte aus der Country-Antwort: (location, cheapest, price_per_person, entity_id)."""
+        city_results = city_data.get("countryDestination", {}).get("results", [])
+
+        cities_in_country = []
+        for result in city_results:
+            if result.get("type") != "LOCATION":
+                continue
+            content = result.get("content", {})
+            location = content.get("location", {})
+            flight_quotes = content.get("flightQuotes", {})
+
+            if not flight_quotes or location.get("type") != "City":
+                continue
+
+            cheapest = flight_quotes.get("cheapest", {})
+            raw_price = cheapest.get("rawPrice", 999)
+            price_per_person = raw_price / self.ADULTS
+
+            if price_per_person > self.MAX_PRICE:
+                continue
+
+            city_entity_id = location.get("entityId") or location.get("id")
+            if not city_entity_id:
+                continue
+
+            cities_in_country.append((location, cheapest, price_per_person, city_entity_id))
+        return cities_in_country
+
+    def _weekend_deal(self, location: dict, cheapest: dict, price_per_person: float, country_name: str,
+                      details: dict, friday: datetime, sunday: datetime, stale: bool = False) -> FlightDeal:
+        """Baut den Deal aus Detail-Call (status ok) oder Country-Preis (status blocked).
+        stale: Everywhere- oder Country-Daten dieses Deals kamen aus abgelaufenem Cache."""
+        final_price = price_per_person
+        final_time = "??:??"
+        final_return_time = "??:??"
+        is_early = False
+        alts = []
+
+        if details.get("status") == "ok":
+            final_price = details['price']
+            final_time = details['time']
+            final_return_time = details.get('return_time', '??:??')
+            is_early = details.get('early_departure', False)
+            alts = details.get('alternatives', [])
+
+        coords = location.get('coordinates', {})
+        lat = coords.get('latitude', 0) or 0
+        lon = coords.get('longitude', 0) or 0
+
+        # Fallback: Koordinaten aus CITY_DATABASE wenn API keine liefert
+        if lat == 0 and lon == 0:
+            city_name = location.get('name', '')
+            db_entry = CITY_DATABASE.get(city_name)
+            if db_entry:
+                lat = db_entry["lat"]
+                lon = db_entry["lon"]
+
+        return FlightDeal(
+            city=location.get('name', 'Unknown'),
+            country=country_name,
+            price=final_price,
+            departure_date=friday.strftime("%Y-%m-%d"),
+            return_date=sunday.strftime("%Y-%m-%d"),
+            is_direct=cheapest.get("direct", False),
+            url=self.build_flight_url(location.get("skyCode", ""), friday, sunday),
+            flight_time=final_time,
+            return_flight_time=final_return_time,
+            latitude=lat,
+            longitude=lon,
+            early_departure=is_early,
+            alternatives=alts,
+            stale=stale,
+        )
+
+    def _city_deal(self, city_name: str, city_info: dict, details: dict,
+                   departure: datetime, return_date: datetime) -> FlightDeal:
+        """Deal für die gezielte Stadtsuche aus einem erfolgreichen Detail-Call."""
+        return FlightDeal(
+            city=city_name,
+            country=city_info["country"],
+            price=details["price"],
+            departure_date=departure.strftime("%Y-%m-%d"),
+            return_date=return_date.strftime("%Y-%m-%d"),
+            is_direct=False,
+            url=self.build_flight_url(city_info["sky_code"], departure, return_date),
+            flight_time=details.get("time", "??:??"),
+            return_flight_time=details.get("return_time", "??:??"),
+            latitude=city_info["lat"],
+            longitude=city_info["lon"],
+            early_departure=details.get('early_departure', False),
+            alternatives=details.get("alternatives", []),
+        )
+
+    def _city_outcome(self, details: Optional[dict], location: dict, cheapest: dict, price_per_person: float,
+                      country_name: str, friday: datetime, sunday: datetime, stale: bool = False,
+                      on_status=None) -> Optional[FlightDeal]:
+        """Detail-Ergebnis einer Stadt in einen Deal umsetzen (None = kein Deal)."""
+        city_name_api = location.get('name', '?')
+        if details is None:
+            if on_status:
+                on_status(f"⚠️ {city_name_api} – kein API-Response")
+            return None
+        if details.get("status") == "blocked":
+            if on_status:
+                on_status(f"🛡️ API-Limit erreicht, nutze Fallback-Preise")
+            print(f"  [FALLBACK] {city_name_api} -> Country-Preis {price_per_person:.0f}€ (ohne Uhrzeiten)")
+        elif details.get("status") == "too_early_or_expensive":
+            if on_status:
+                on_status(f"💸 {city_name_api} – zu teuer oder ungünstige Zeiten")
+            return None
+        return self._weekend_deal(location, cheapest, price_per_person, country_name, details, friday, sunday, stale)
+
+    def _spawn_worker(self):
+        """Neue Instanz mit gleicher Konfiguration (eigene Session pro Worker)."""
+        worker = type(self)(
+            origin_entity_id=self.VIENNA_ENTITY_ID,
+            adults=self.ADULTS,
+            start_hour=self.START_HOUR,
+            origin_sky_code=self.ORIGIN_SKY_CODE,
+            max_return_hour=self.MAX_RETURN_HOUR,
+        )
+        worker.MAX_PRICE = self.MAX_PRICE
+        worker.BLACKLIST_COUNTRIES = self.BLACKLIST_COUNTRIES
+        return worker
+
+
+class SkyscannerAPI(SkyscannerBase):
+    """Thread-Engine: requests-Sessions aus dem SESSION_POOL, blockierende Calls."""
+
+    def __init__(self, origin_entity_id="95673444", adults=1, start_hour=14, origin_sky_code="vie", max_return_hour=23):
+        super().__init__(origin_entity_id, adults, start_hour, origin_sky_code, max_return_hour)
+        # Session wird erst beim ersten Request aus dem Pool geliehen
+        self._lease: Optional[WarmSession] = None
+        self._session_lock = threading.Lock()  # Lease leihen/tauschen (session, _setup_session) atomar
+        # Von run_bounded gesetzt: 403 als RetryLater melden statt im Thread zu warten
+        self.defer_403 = False
+        self.retry_attempt = 0
+
+    @property
+    def session(self) -> requests.Session:
+        if self._lease is None:
+            with self._session_lock:
+                if self._lease is None:
+                    self._lease = SESSION_POOL.acquire()
+        return self._lease.session
+
+    def close(self):
+        """Geliehene Session an den Pool zurückgeben."""
+        if self._lease is not None:
+            SESSION_POOL.release(self._lease)
+            self._lease = None
+
+    def _mark_blocked(self):
+        """403 gesehen: Session wird beim Zurückgeben verworfen statt wiederverwendet."""
+        if self._lease is not None:
+            self._lease.blocked = True
+
+    def _post(self, body: dict, kind: str, headers=None, cancel_check=None) -> requests.Response:
+        """Jeder API-Request läuft durch Circuit-Breaker und globalen Rate-Governor."""
+        if not BREAKER.allow():
+            raise CircuitOpen()
+        session = self.session
+        return self._send(session, self._lease.proxy, body, kind, headers, cancel_check)
+
+    def _send(self, session: requests.Session, proxy: Optional[str], body: dict, kind: str, headers=None,
+              cancel_check=None, recorder: Optional[LatencyRecorder] = None) -> requests.Response:
+        """POST mit adaptivem Timeout für (kind, proxy); kind = everywhere | country | detail."""
+        GOVERNOR.wait(proxy, cancel_check=cancel_check)
+        started = time.monotonic()
+        try:
+            response = session.post(self.API_URL, json=body, headers=headers, timeout=TIMEOUTS.timeout(kind, proxy))
+        except Exception as e:
+            if isinstance(e, requests.Timeout):
+                TIMEOUTS.record_timeout(kind, proxy, time.monotonic() - started)
+            if _is_proxy_error(e):
+                PROXY_POOL.report_error(proxy)
+            raise
+        latency = time.monotonic() - started
+        TIMEOUTS.record(kind, proxy, latency)
+        _report_status(response.status_code, proxy, latency)
+        if recorder is not None:
+            recorder.record(latency)
+        return response
+
+    def _post_detail(self, body: dict) -> requests.Response:
+        """Detail-POST. Mit DETAIL_HEDGE: kommt binnen HEDGER.delay() (p90) keine Antwort, geht
+        derselbe Request über eine zweite Session aus dem Pool raus, die erste 200 gewinnt."""
+        if not BREAKER.allow():
+            raise CircuitOpen()
+        session = self.session
+        proxy = self._lease.proxy
+        # Latenz wird auch ohne Hedging gemessen, damit die Schwelle beim Einschalten schon stimmt
+        if not DETAIL_HEDGE:
+            return self._send(session, proxy, body, "detail", _detail_headers(session), recorder=HEDGER.latency)
+        HEDGER.start()
+        delay = HEDGER.delay()
+        primary = HEDGE_EXECUTOR.submit(self._send, session, proxy, body, "detail", _detail_headers(session),
+                                        recorder=HEDGER.latency)
+        try:
+            return primary.result(timeout=delay)
+        except FuturesTimeout:
+            pass
+        # Nur mit bereits warmer Session hedgen – ein Warmup würde den Caller länger aufhalten
+        lease = SESSION_POOL.try_acquire(avoid_proxy=proxy)
+        if not HEDGER.try_hedge(session_available=lease is not None):
+            if lease is not None:
+                SESSION_POOL.release(lease)
+            return primary.result()
+        print(f"  [HEDGE] Detail nach {delay:.1f}s ohne Antwort -> zweite Session")
+        secondary = HEDGE_EXECUTOR.submit(self._send, lease.session, lease.proxy, body, "detail",
+                                          _detail_headers(lease.session), recorder=HEDGER.latency)
+        pending = {primary, secondary}
+        try:
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for f in done:
+                    if f.exception() is None and f.result().status_code == 200:
+                        if f is secondary:
+                            HEDGER.record_win()
+                            self._adopt_hedge_lease(lease, primary)
+                            lease = None
+                        return f.result()
+            # Keiner mit 200: Ergebnis der eigenen Session (403 -> Country-Preis wie bisher)
+            return primary.result()
+        finally:
+            if lease is not None:
+                # Verlierer läuft evtl. noch -> Lease erst zurück in den Pool, wenn er fertig ist
+                secondary.add_done_callback(lambda f, lease=lease: self._release_hedge(lease, f))
+
+    def _adopt_hedge_lease(self, lease: WarmSession, primary):
+        """Hedge hat gewonnen: seine Session übernehmen. Die eigene läuft noch im Primary und
+        geht erst zurück in den Pool, wenn der fertig ist – so nutzt sie nie ein zweiter Thread."""
+        with self._session_lock:
+            own, self._lease = self._lease, lease
+        if own is not None:
+            primary.add_done_callback(lambda f: self._release_hedge(own, f))
+
+    @staticmethod
+    def _release_hedge(lease: WarmSession, future):
+        """Lease nach ihrem letzten Detail-Request zurückgeben, geblockt bei 403 oder Exception."""
+        if future.exception() is not None or future.result().status_code == 403:
+            lease.blocked = True
+        SESSION_POOL.release(lease)
+
+    def _setup_session(self):
+        """Aktuelle Session verwerfen (403 / Proxy-Fehler) und eine andere leihen."""
+        with self._session_lock:
+            if self._lease is not None:
+                SESSION_POOL.discard(self._lease)
+            self._lease = SESSION_POOL.acquire()
+
     def _retry_on_403(self, make_request, label="API", cancel_check=None):
         """Gemeinsame 403-Retry-Logik mit Wartezeiten"""
         # Proxy-Fehler: sofort neuen Proxy probieren (max 5x)
@@ -360,7 +1037,22 @@ class SkyscannerAPI:
         if response.status_code != 403:
             return response
 
-        for retry_wait in [30, 60]:
+        if BREAKER.degraded:
+            # Upstream blockiert gerade alle -> kein Warten/Retry, Caller nimmt Cache/Fallback
+            print(f"  [{label}] 403 BLOCKED - Circuit-Breaker offen, kein Retry")
+            self._mark_blocked()
+            return response
+
+        if self.defer_403:
+            # Nicht im Thread warten: Trip geht in die Delay-Queue von run_bounded,
+            # der Worker ist sofort frei für andere Trips
+            self._mark_blocked()
+            if self.retry_attempt < len(RETRY_403_DELAYS):
+                raise RetryLater(RETRY_403_DELAYS[self.retry_attempt], label=label)
+            print(f"  [{label}] 403 BLOCKED - keine Retries mehr")
+            return response
+
+        for retry_wait in RETRY_403_DELAYS:
             if cancel_check and cancel_check():
                 print(f"  [{label}] Abbruch während Retry")
                 return response
@@ -371,7 +1063,6 @@ class SkyscannerAPI:
                     return response
                 time.sleep(1)
             self._setup_session()
-            time.sleep(random.uniform(2, 4))
             try:
                 response = make_request()
             except Exception as e:
@@ -385,225 +1076,164 @@ class SkyscannerAPI:
                 self._is_blocked = False
                 return response
 
+        self._mark_blocked()
         return response
 
+    def _fetch(self, body: dict, label: str, kind: str, cancel_check=None,
+               bucket: Optional[str] = None) -> tuple[int, Optional[dict]]:
+        if bucket:
+            TTL_STATS.record(bucket, "upstream")
+        response = self._retry_on_403(
+            lambda: self._post(body, kind, cancel_check=cancel_check),
+            label=label,
+            cancel_check=cancel_check,
+        )
+        return self._json_result(response)
+
     def search_flights(self, departure: datetime, return_date: datetime, cancel_check=None) -> dict:
-        from database import get_cache, set_cache
-        cache_key = f"{self.ORIGIN_SKY_CODE}_{departure.strftime('%Y-%m-%d')}_{return_date.strftime('%Y-%m-%d')}_{self.ADULTS}"
-        cached = get_cache(cache_key)
+        from database import set_cache, CACHE_TTL_HOURS, CACHE_STALE_MAX_HOURS
+        cache_key = self._everywhere_cache_key(departure, return_date)
+        bucket, ttl = effective_ttl(CACHE_TTL_HOURS, departure)
+        cached, stale = self._cached_everywhere(cache_key, departure, return_date, bucket)
         if cached:
-            results = cached.get("everywhereDestination", {}).get("results", [])
-            print(f"[CACHE HIT] {self.ORIGIN_SKY_CODE} {departure.strftime('%d.%m.')} -> {len(results)} Ergebnisse")
             return cached
 
-        body = {
-            "cabinClass": "ECONOMY",
-            "childAges": [],
-            "adults": self.ADULTS,
-            "legs": [
-                {
-                    "legOrigin": {"@type": "entity", "entityId": self.VIENNA_ENTITY_ID},
-                    "legDestination": {"@type": "everywhere"},
-                    "dates": {"@type": "date", "year": departure.year, "month": departure.month, "day": departure.day}
-                },
-                {
-                    "legOrigin": {"@type": "everywhere"},
-                    "legDestination": {"@type": "entity", "entityId": self.VIENNA_ENTITY_ID},
-                    "dates": {"@type": "date", "year": return_date.year, "month": return_date.month, "day": return_date.day}
-                }
-            ],
-            "options": {"fareAttributes": {"selectedFareAttributes": []}}
-        }
+        body = self._everywhere_body(departure, return_date)
         label = f"EVERYWHERE {self.ORIGIN_SKY_CODE} {departure.strftime('%d.%m.')}"
+        if self._negative(cache_key, label):
+            return self._stale_fallback(stale, label)
         try:
-            response = self._retry_on_403(
-                lambda: self.session.post(self.API_URL, json=body, timeout=30),
-                label=label,
-                cancel_check=cancel_check,
+            status, data = SINGLE_FLIGHT.do(
+                SINGLE_FLIGHT.key("everywhere", body),
+                lambda: self._fetch(body, label, "everywhere", cancel_check, bucket),
+                cancel_check,
             )
-            print(f"[{label}] -> HTTP {response.status_code}")
-            if response.status_code == 200:
-                data = response.json()
+            print(f"[{label}] -> HTTP {status}")
+            if status == 200:
                 results = data.get("everywhereDestination", {}).get("results", [])
                 print(f"[{label}] {len(results)} Ergebnisse")
-                set_cache(cache_key, data)
+                if not results:
+                    # Leere Antwort ist oft eine weiche Sperre -> kurz negativ statt 6h positiv cachen
+                    self._remember_failure(cache_key, status, cancel_check, reason="empty")
+                    return self._stale_fallback(stale, label)
+                set_cache(cache_key, project_everywhere(data), ttl, CACHE_STALE_MAX_HOURS)
+                PREWARM_TRACKER.forget(cache_key)
                 return data
-            print(f"[{label}] Fehlgeschlagen! Status {response.status_code}")
-            return {}
+            print(f"[{label}] Fehlgeschlagen! Status {status}")
+            self._remember_failure(cache_key, status, cancel_check)
+            return self._stale_fallback(stale, label)
+        except RetryLater:
+            # Stale-on-403: alte Daten statt Delay-Queue. Kein Negativ-Eintrag, der Trip kommt wieder
+            if stale:
+                return self._stale_fallback(stale, label)
+            raise
+        except CircuitOpen:
+            # Cache-only-Modus: kein Live-Request, kein Negativ-Eintrag
+            return self._stale_fallback(stale, label)
         except Exception as e:
             print(f"[{label}] Exception: {e}")
-            return {}
+            self._remember_failure(cache_key, None, cancel_check)
+            return self._stale_fallback(stale, label)
 
-    def get_specific_flight_details(self, destination_entity_id: str, departure: datetime, return_date: datetime) -> Optional[dict]:
+    def get_specific_flight_details(self, destination_entity_id: str, departure: datetime, return_date: datetime,
+                                    cache_only: bool = False) -> Optional[dict]:
+        from database import get_cache, set_cache, DETAIL_CACHE_TTL_HOURS
         clean_dest_id = str(destination_entity_id).replace("location-", "")
-        body = {
-            "cabinClass": "ECONOMY",
-            "childAges": [],
-            "adults": self.ADULTS,
-            "legs": [
-                {
-                    "legOrigin": {"@type": "entity", "entityId": self.VIENNA_ENTITY_ID},
-                    "legDestination": {"@type": "entity", "entityId": clean_dest_id},
-                    "dates": {"@type": "date", "year": str(departure.year), "month": str(departure.month).zfill(2), "day": str(departure.day).zfill(2)},
-                    "placeOfStay": clean_dest_id
-                },
-                {
-                    "legOrigin": {"@type": "entity", "entityId": clean_dest_id},
-                    "legDestination": {"@type": "entity", "entityId": self.VIENNA_ENTITY_ID},
-                    "dates": {"@type": "date", "year": str(return_date.year), "month": str(return_date.month).zfill(2), "day": str(return_date.day).zfill(2)}
-                }
-            ]
-        }
+        # Roh-Itineraries cachen, gefiltert (MAX_PRICE / START_HOUR) wird lokal
+        cache_key = self._detail_cache_key(clean_dest_id, departure, return_date)
+        bucket, ttl = effective_ttl(DETAIL_CACHE_TTL_HOURS, departure)
+        cached = get_cache(cache_key)
+        if cached is not None:
+            TTL_STATS.record(bucket, "hits")
+            print(f"  [CACHE HIT] Detail {clean_dest_id}")
+            return self._parse_flight_details(cached, departure)
+        TTL_STATS.record(bucket, "misses")
+        if cache_only:
+            # Trip geblockt (403 / Circuit-Breaker): Cache-Treffer ja, Upstream nein
+            return {"status": "blocked", "cache_only": True}
+        negative = self._negative(cache_key, f"DETAIL {clean_dest_id}")
+        if negative:
+            return self._negative_details(negative)
+
+        body = self._detail_body(clean_dest_id, departure, return_date)
         try:
-            h = self.session.headers.copy()
-            h.pop("x-radar-combined-explore-generic-results", None)
-            h.pop("x-radar-combined-explore-unfocused-locations-use-real-data", None)
-            response = self.session.post(self.API_URL, json=body, headers=h, timeout=30)
-            print(f"  [API] {clean_dest_id} -> HTTP {response.status_code}")
-            if response.status_code == 403:
+            def fetch():
+                TTL_STATS.record(bucket, "upstream")
+                started = time.monotonic()
+                try:
+                    return self._json_result(self._post_detail(body))
+                finally:
+                    DETAIL_CITY_LATENCY.record(clean_dest_id, time.monotonic() - started)
+
+            status, data = SINGLE_FLIGHT.do(SINGLE_FLIGHT.key("detail", body), fetch)
+            print(f"  [API] {clean_dest_id} -> HTTP {status}")
+            if status == 403:
                 # Sofort aufgeben statt minutenlang warten - Caller nutzt Country-Preis
                 print(f"  [API] 403 -> Skip (Country-Preis wird verwendet)")
+                self._mark_blocked()
+                self._remember_failure(cache_key, status)
                 return {"status": "blocked"}
-            if response.status_code != 200:
+            if status != 200:
+                self._remember_failure(cache_key, status)
                 return None
-            data = response.json()
-            itineraries = data.get("itineraries", {}).get("results", [])
-            print(f"  [API] {len(itineraries)} Itineraries gefunden")
-
-            valid_options = []  # (price, dep_time, ret_time, early)
-            early_options = []
-            skipped_price = 0
-
-            min_hour = 7 if self.is_easter_period(departure) else self.START_HOUR
-
-            for itinerary in itineraries:
-                total_price = float(itinerary.get("price", {}).get("raw", 9999))
-                price_per_person = total_price / self.ADULTS
-
-                if price_per_person > self.MAX_PRICE:
-                    skipped_price += 1
-                    continue
-
-                legs = itinerary.get("legs", [])
-                if not legs:
-                    continue
-
-                departure_str = legs[0].get("departure", "")
-                if not departure_str:
-                    continue
-
-                try:
-                    dep_dt = datetime.fromisoformat(departure_str)
-                    ret_time = ""
-                    ret_arr_time = ""
-                    if len(legs) >= 2:
-                        ret_dep_str = legs[1].get("departure", "")
-                        if ret_dep_str:
-                            ret_time = datetime.fromisoformat(ret_dep_str).strftime("%H:%M")
-                        ret_arr_str = legs[1].get("arrival", "")
-                        if ret_arr_str:
-                            ret_arr_time = datetime.fromisoformat(ret_arr_str).strftime("%H:%M")
-
-                    dep_time = dep_dt.strftime("%H:%M")
-                    option = {"price": price_per_person, "time": dep_time, "return_time": ret_time, "return_arrival": ret_arr_time}
-
-                    if dep_dt.hour < min_hour:
-                        option["early_departure"] = True
-                        early_options.append(option)
-                    else:
-                        option["early_departure"] = False
-                        valid_options.append(option)
-                except ValueError:
-                    continue
-
-            # Nach Preis sortieren
-            valid_options.sort(key=lambda x: x["price"])
-            early_options.sort(key=lambda x: x["price"])
-
-            if valid_options:
-                best = valid_options[0]
-                # Alternativen: die nächsten 2 (andere Preis/Zeit-Kombination)
-                alternatives = []
-                seen = {(best["time"], best["return_time"])}
-                for opt in valid_options[1:]:
-                    key = (opt["time"], opt["return_time"])
-                    if key not in seen:
-                        alternatives.append(opt)
-                        seen.add(key)
-                    if len(alternatives) >= 3:
-                        break
-
-                return {
-                    "price": best["price"], "status": "ok",
-                    "time": best["time"], "return_time": best["return_time"],
-                    "early_departure": False, "alternatives": alternatives,
-                }
-
-            if not valid_options and itineraries:
-                print(f"  [FILTER] Alle rausgefiltert! Preis>{self.MAX_PRICE}€: {skipped_price}, Abflug<{min_hour}h: {len(early_options)}")
-
-            # Fallback: Frühflüge
-            if early_options:
-                best = early_options[0]
-                print(f"  [FILTER] Frühflug-Fallback: {best['price']:.0f}€ um {best['time']} (vor {min_hour}h)")
-                alternatives = []
-                seen = {(best["time"], best["return_time"])}
-                for opt in early_options[1:]:
-                    key = (opt["time"], opt["return_time"])
-                    if key not in seen:
-                        opt["early_departure"] = True
-                        alternatives.append(opt)
-                        seen.add(key)
-                    if len(alternatives) >= 3:
-                        break
-
-                return {
-                    "price": best["price"], "status": "ok",
-                    "time": best["time"], "return_time": best["return_time"],
-                    "early_departure": True, "alternatives": alternatives,
-                }
-
-            return {"status": "too_early_or_expensive"}
+            if not data.get("itineraries", {}).get("results"):
+                self._remember_failure(cache_key, status, reason="empty")
+            else:
+                set_cache(cache_key, project_detail(data), ttl)
+            return self._parse_flight_details(data, departure)
+        except CircuitOpen:
+            # Wie 403: Caller nutzt den Country-Preis
+            return {"status": "blocked"}
         except Exception as e:
             print(f"  [API] Exception: {e}")
+            self._remember_failure(cache_key, None)
             return None
 
     def search_country_cities(self, country_entity_id: str, departure: datetime, return_date: datetime, cancel_check=None) -> dict:
-        body = {
-            "cabinClass": "ECONOMY",
-            "childAges": [],
-            "adults": self.ADULTS,
-            "legs": [
-                {
-                    "legOrigin": {"@type": "entity", "entityId": self.VIENNA_ENTITY_ID},
-                    "legDestination": {"@type": "entity", "entityId": country_entity_id},
-                    "dates": {"@type": "date", "year": departure.year, "month": departure.month, "day": departure.day},
-                    "placeOfStay": country_entity_id
-                },
-                {
-                    "legOrigin": {"@type": "entity", "entityId": country_entity_id},
-                    "legDestination": {"@type": "entity", "entityId": self.VIENNA_ENTITY_ID},
-                    "dates": {"@type": "date", "year": return_date.year, "month": return_date.month, "day": return_date.day}
-                }
-            ],
-            "options": {"fareAttributes": {"selectedFareAttributes": []}}
-        }
+        from database import get_cache, set_cache, COUNTRY_CACHE_TTL_HOURS, CACHE_STALE_MAX_HOURS
+        cache_key = self._country_cache_key(country_entity_id, departure, return_date)
+        bucket, ttl = effective_ttl(COUNTRY_CACHE_TTL_HOURS, departure)
+        cached = get_cache(cache_key)
+        if cached is not None:
+            TTL_STATS.record(bucket, "hits")
+            print(f"  [CACHE HIT] Country {country_entity_id}")
+            return cached
+        TTL_STATS.record(bucket, "misses")
+        if self._negative(cache_key, f"COUNTRY {country_entity_id}"):
+            return self._stale_country(cache_key)
+
+        body = self._country_body(country_entity_id, departure, return_date)
         try:
-            response = self._retry_on_403(
-                lambda: self.session.post(self.API_URL, json=body, timeout=30),
-                label=f"COUNTRY {country_entity_id}",
-                cancel_check=cancel_check,
+            status, data = SINGLE_FLIGHT.do(
+                SINGLE_FLIGHT.key("country", body),
+                lambda: self._fetch(body, f"COUNTRY {country_entity_id}", "country", cancel_check, bucket),
+                cancel_check,
             )
-            print(f"  [COUNTRY] {country_entity_id} -> HTTP {response.status_code}")
-            if response.status_code == 200:
-                return response.json()
-            return {}
+            print(f"  [COUNTRY] {country_entity_id} -> HTTP {status}")
+            if status == 200:
+                if not data.get("countryDestination", {}).get("results"):
+                    self._remember_failure(cache_key, status, cancel_check, reason="empty")
+                    return data
+                set_cache(cache_key, project_country(data), ttl, CACHE_STALE_MAX_HOURS)
+                return data
+            self._remember_failure(cache_key, status, cancel_check)
+            return self._stale_country(cache_key)
+        except RetryLater:
+            stale = self._stale_country(cache_key)
+            if stale:
+                return stale
+            raise
+        except CircuitOpen:
+            return self._stale_country(cache_key)
         except Exception as e:
             print(f"  [COUNTRY] Exception: {e}")
-            return {}
+            self._remember_failure(cache_key, None, cancel_check)
+            return self._stale_country(cache_key)
 
     def scrape_weekend(self, friday: datetime, sunday: datetime, cancel_check=None,
-                       on_deals=None, on_status=None) -> list[FlightDeal]:
+                       on_deals=None, on_status=None, done_countries: Optional[set] = None) -> list[FlightDeal]:
+        """done_countries: Entity-IDs bereits fertiger Länder. Wird beim Retry eines
+        zurückgestellten Trips übergeben, damit keine Deals doppelt gemeldet werden."""
         self._is_blocked = False  # Reset pro Trip
         if cancel_check and cancel_check():
             return []
@@ -615,75 +1245,29 @@ class SkyscannerAPI:
         data = self.search_flights(friday, sunday, cancel_check=cancel_check)
         if not data:
             return []
+        everywhere_stale = bool(data.get("stale"))
 
-        results = data.get("everywhereDestination", {}).get("results", [])
         deals = []
-        cheap_countries = []
-        skipped_countries = []
-
-        for result in results:
-            if result.get("type") != "LOCATION":
-                continue
-            content = result.get("content", {})
-            location = content.get("location", {})
-            flight_quotes = content.get("flightQuotes", {})
-            if not flight_quotes:
-                continue
-
-            raw_price = flight_quotes.get("cheapest", {}).get("rawPrice", 999)
-            price_per_person = raw_price / self.ADULTS
-            country_name = location.get("name")
-
-            # Blacklist check
-            if self.BLACKLIST_COUNTRIES and country_name in self.BLACKLIST_COUNTRIES:
-                continue
-
-            if location.get("type") == "Nation":
-                if price_per_person <= self.MAX_PRICE:
-                    cheap_countries.append({
-                        "name": country_name,
-                        "entity_id": location.get("id"),
-                        "price": price_per_person
-                    })
-                else:
-                    skipped_countries.append(f"{country_name} ({price_per_person:.0f}€)")
+        cheap_countries, skipped_countries = self._cheap_countries(data)
 
         if on_status:
             on_status(f"🌍 {date_str} {len(cheap_countries)} günstige Länder gefunden, {len(skipped_countries)} zu teuer")
 
-        for ci, country in enumerate(cheap_countries):
+        todo = [c for c in cheap_countries if done_countries is None or c["entity_id"] not in done_countries]
+        if TRIP_FANOUT > 1 and todo:
+            return self._fan_out_countries(todo, friday, sunday, everywhere_stale, cancel_check, on_deals, on_status,
+                                           done_countries)
+
+        for ci, country in enumerate(todo):
             if cancel_check and cancel_check():
                 break
 
             if on_status:
-                on_status(f"🔎 {date_str} {country['name']} durchsuchen... ({ci+1}/{len(cheap_countries)})")
+                on_status(f"🔎 {date_str} {country['name']} durchsuchen... ({ci+1}/{len(todo)})")
 
             city_data = self.search_country_cities(country["entity_id"], friday, sunday, cancel_check=cancel_check)
-            city_results = city_data.get("countryDestination", {}).get("results", [])
-
-            cities_in_country = []
-            for result in city_results:
-                if result.get("type") != "LOCATION":
-                    continue
-                content = result.get("content", {})
-                location = content.get("location", {})
-                flight_quotes = content.get("flightQuotes", {})
-
-                if not flight_quotes or location.get("type") != "City":
-                    continue
-
-                cheapest = flight_quotes.get("cheapest", {})
-                raw_price = cheapest.get("rawPrice", 999)
-                price_per_person = raw_price / self.ADULTS
-
-                if price_per_person > self.MAX_PRICE:
-                    continue
-
-                city_entity_id = location.get("entityId") or location.get("id")
-                if not city_entity_id:
-                    continue
-
-                cities_in_country.append((location, cheapest, price_per_person, city_entity_id))
+            cities_in_country = self._cities_in_country(city_data)
+            stale = everywhere_stale or bool(city_data.get("stale"))
 
             for cj, (location, cheapest, price_per_person, city_entity_id) in enumerate(cities_in_country):
                 if cancel_check and cancel_check():
@@ -693,138 +1277,169 @@ class SkyscannerAPI:
                 if on_status:
                     on_status(f"✈️ {date_str} {city_name_api}, {country['name']} prüfen... ({cj+1}/{len(cities_in_country)})")
 
-                # Detail-Call nur versuchen wenn nicht schon geblockt
-                if not self._is_blocked:
-                    details = self.get_specific_flight_details(city_entity_id, friday, sunday)
-                else:
-                    details = {"status": "blocked"}
-
-                final_price = price_per_person
-                final_time = "??:??"
-                final_return_time = "??:??"
-                is_early = False
-                alts = []
-
-                if details is None:
-                    if on_status:
-                        on_status(f"⚠️ {city_name_api} – kein API-Response")
-                    continue
-                elif details.get("status") == "ok":
-                    final_price = details['price']
-                    final_time = details['time']
-                    final_return_time = details.get('return_time', '??:??')
-                    is_early = details.get('early_departure', False)
-                    alts = details.get('alternatives', [])
-                elif details.get("status") == "blocked":
+                # Nach einem Block nur noch Detail-Cache, kein Upstream-Call
+                details = self.get_specific_flight_details(city_entity_id, friday, sunday, cache_only=self._is_blocked)
+                if details is not None and details.get("status") == "blocked" and not details.get("negative"):
                     self._is_blocked = True
-                    if on_status:
-                        on_status(f"🛡️ API-Limit erreicht, nutze Fallback-Preise")
-                    print(f"  [FALLBACK] {city_name_api} -> Country-Preis {price_per_person:.0f}€ (ohne Uhrzeiten)")
-                elif details.get("status") == "too_early_or_expensive":
-                    if on_status:
-                        on_status(f"💸 {city_name_api} – zu teuer oder ungünstige Zeiten")
-                    continue
 
-                coords = location.get('coordinates', {})
-                lat = coords.get('latitude', 0) or 0
-                lon = coords.get('longitude', 0) or 0
-
-                # Fallback: Koordinaten aus CITY_DATABASE wenn API keine liefert
-                if lat == 0 and lon == 0:
-                    city_name = location.get('name', '')
-                    db_entry = CITY_DATABASE.get(city_name)
-                    if db_entry:
-                        lat = db_entry["lat"]
-                        lon = db_entry["lon"]
-
-                deal = FlightDeal(
-                    city=location.get('name', 'Unknown'),
-                    country=country["name"],
-                    price=final_price,
-                    departure_date=friday.strftime("%Y-%m-%d"),
-                    return_date=sunday.strftime("%Y-%m-%d"),
-                    is_direct=cheapest.get("direct", False),
-                    url=self.build_flight_url(location.get("skyCode", ""), friday, sunday),
-                    flight_time=final_time,
-                    return_flight_time=final_return_time,
-                    latitude=lat,
-                    longitude=lon,
-                    early_departure=is_early,
-                    alternatives=alts,
-                )
+                deal = self._city_outcome(details, location, cheapest, price_per_person, country["name"],
+                                          friday, sunday, stale, on_status)
+                if deal is None:
+                    continue
                 deals.append(deal)
 
                 # Sofort an Callback melden statt am Ende
                 if on_deals:
                     on_deals([deal])
 
-                if not self._is_blocked:
-                    time.sleep(random.uniform(0.5, 1.5))
-
-            time.sleep(random.uniform(0.5, 1.5))
+            if done_countries is not None and not (cancel_check and cancel_check()):
+                done_countries.add(country["entity_id"])
 
         return deals
 
-    def run(self, start_date: datetime, end_date: datetime, start_weekday: int = 4, duration: int = 2,
-            cancel_check=None, on_deals=None, on_progress=None, on_status=None):
-        trips = self.generate_trips(start_date, end_date, start_weekday, duration)
-
-        def process_trip(dep_date, ret_date):
-            if cancel_check and cancel_check():
-                return []
-            # Eigene Session pro Worker → kein 403-Konflikt
-            worker = SkyscannerAPI(
-                origin_entity_id=self.VIENNA_ENTITY_ID,
-                adults=self.ADULTS,
-                start_hour=self.START_HOUR,
-                origin_sky_code=self.ORIGIN_SKY_CODE,
-                max_return_hour=self.MAX_RETURN_HOUR,
-            )
-            worker.MAX_PRICE = self.MAX_PRICE
-            worker.BLACKLIST_COUNTRIES = self.BLACKLIST_COUNTRIES
+    def _fan_out_countries(self, countries: list[dict], friday: datetime, sunday: datetime, everywhere_stale: bool,
+                           cancel_check=None, on_deals=None, on_status=None,
+                           done_countries: Optional[set] = None) -> list[FlightDeal]:
+        """Country- und Detail-Calls eines Trips parallel auf TRIP_FANOUT Threads.
+        Jeder Thread hat eine eigene Instanz mit eigener Lease (403/Proxy-Fehler tauschen nur
+        seine Session), das Tempo regelt der globale Rate-Governor."""
+        date_str = friday.strftime('%d.%m.')
+        lock = threading.Lock()
+        futures = set()
+        open_cities: dict[str, int] = {}  # Country-ID -> noch offene Detail-Calls
+        retry_later: list[RetryLater] = []
+        deals: list[FlightDeal] = []
+        blocked = threading.Event()  # Ein 403 im Detail-Call gilt für den ganzen Trip
+        local = threading.local()
+        workers: list[SkyscannerAPI] = []
+        # Eigene Session zurück in den Pool, ein Fan-out-Thread übernimmt sie
+        self.close()
+
+        def worker_api() -> "SkyscannerAPI":
+            api = getattr(local, "api", None)
+            if api is None:
+                api = local.api = self._spawn_worker()
+                api.defer_403 = self.defer_403
+                api.retry_attempt = self.retry_attempt
+                with lock:
+                    workers.append(api)
+            return api
+
+        def cancelled():
+            return bool(cancel_check and cancel_check())
+
+        def country_finished(country):
+            if done_countries is not None and not cancelled():
+                with lock:
+                    done_countries.add(country["entity_id"])
+
+        def fetch_country(country):
+            # Nach einem RetryLater keine neuen Länder mehr anfangen
+            if cancelled() or retry_later:
+                return
+            if on_status:
+                on_status(f"🔎 {date_str} {country['name']} durchsuchen...")
+            city_data = worker_api().search_country_cities(country["entity_id"], friday, sunday, cancel_check=cancel_check)
+            cities = self._cities_in_country(city_data)
+            if not cities:
+                country_finished(country)
+                return
+            stale = everywhere_stale or bool(city_data.get("stale"))
+            with lock:
+                open_cities[country["entity_id"]] = len(cities)
+                for city in cities:
+                    futures.add(executor.submit(fetch_city, country, stale, *city))
+
+        def fetch_city(country, stale, location, cheapest, price_per_person, city_entity_id):
             try:
-                # on_deals wird jetzt direkt in scrape_weekend pro Stadt gefeuert
-                return worker.scrape_weekend(dep_date, ret_date, cancel_check=cancel_check,
-                                             on_deals=on_deals, on_status=on_status)
-            except Exception as e:
-                print(f"Error: {e}")
-                return []
+                if cancelled():
+                    return
+                if on_status:
+                    on_status(f"✈️ {date_str} {location.get('name', '?')}, {country['name']} prüfen...")
+                details = worker_api().get_specific_flight_details(city_entity_id, friday, sunday,
+                                                                   cache_only=blocked.is_set())
+                if details is not None and details.get("status") == "blocked" and not details.get("negative"):
+                    blocked.set()
+                deal = self._city_outcome(details, location, cheapest, price_per_person, country["name"],
+                                          friday, sunday, stale, on_status)
+                if deal is not None:
+                    with lock:
+                        deals.append(deal)
+                    if on_deals:
+                        on_deals([deal])
+            finally:
+                with lock:
+                    open_cities[country["entity_id"]] -= 1
+                    finished = open_cities[country["entity_id"]] == 0
+                if finished:
+                    country_finished(country)
 
-        with ThreadPoolExecutor(max_workers=3) as executor:
-            futures = {}
-            for dep_date, ret_date in trips:
-                if cancel_check and cancel_check():
-                    break
-                future = executor.submit(process_trip, dep_date, ret_date)
-                futures[future] = (dep_date, ret_date)
+        try:
+            with ThreadPoolExecutor(max_workers=TRIP_FANOUT) as executor:
+                with lock:
+                    futures.update(executor.submit(fetch_country, c) for c in countries)
+                while True:
+                    # Country-Tasks hängen ihre Detail-Tasks an, bevor sie selbst fertig sind
+                    with lock:
+                        current = set(futures)
+                    if not current:
+                        break
+                    done, _ = wait(current, return_when=FIRST_COMPLETED)
+                    with lock:
+                        futures.difference_update(done)
+                    for future in done:
+                        exc = future.exception()
+                        if isinstance(exc, RetryLater):
+                            retry_later.append(exc)
+                        elif exc is not None:
+                            print(f"  [FANOUT] Exception: {exc}")
+        finally:
+            for api in workers:
+                api.close()
+
+        if retry_later:
+            # Fertige Länder stehen in done_countries, der Rest läuft beim nächsten Versuch
+            raise retry_later[0]
+        return deals
 
-            for future in as_completed(futures):
-                trip_deals = future.result()
-                self.deals.extend(trip_deals)
-                # on_deals wird bereits in scrape_weekend gefeuert, hier nur progress
-                if on_progress:
-                    on_progress(0, len(trips))
+    def run_trip(self, task: TripTask, attempt: int = 0, cancel_check=None, on_deals=None, on_status=None) -> list[FlightDeal]:
+        """Ein Everywhere-Trip auf eigenem Worker. Wirft RetryLater bei 403 (→ Delay-Queue)."""
+        if cancel_check and cancel_check():
+            return task.deals
+        # Eigene Session pro Worker → kein 403-Konflikt
+        worker = self._spawn_worker()
+        worker.defer_403 = True
+        worker.retry_attempt = attempt
 
-        return self.deals
+        def collect(deals):
+            task.deals.extend(deals)
+            if on_deals:
+                on_deals(deals)
+
+        try:
+            # on_deals wird jetzt direkt in scrape_weekend pro Stadt gefeuert
+            worker.scrape_weekend(task.departure, task.return_date, cancel_check=cancel_check,
+                                  on_deals=collect, on_status=on_status, done_countries=task.done_countries)
+            return task.deals
+        except RetryLater:
+            raise
+        except Exception as e:
+            print(f"Error: {e}")
+            return task.deals
+        finally:
+            worker.close()
 
     def search_specific_cities(self, cities: list[str], departure: datetime, return_date: datetime,
                                cancel_check=None, on_deals=None, on_status=None) -> list[FlightDeal]:
         """Gezielte Suche nach bestimmten Städten statt Everywhere"""
         deals = []
         self._is_blocked = False
-        self._setup_session()
         date_str = departure.strftime('%d.%m.')
         print(f"\n[CITY-SEARCH] {departure.strftime('%d.%m.%Y')}-{return_date.strftime('%d.%m.%Y')} | {len(cities)} Städte | Origin: {self.ORIGIN_SKY_CODE} | MaxPrice: {self.MAX_PRICE}€ | MinHour: {self.START_HOUR} | MaxReturnHour: {self.MAX_RETURN_HOUR}")
         for ci, city_name in enumerate(cities):
             if cancel_check and cancel_check():
                 print(f"  [CITY-SEARCH] Abgebrochen durch Benutzer")
                 break
-            if self._is_blocked:
-                print(f"  [SKIP] {city_name} -> übersprungen (403-Block aktiv)")
-                if on_status:
-                    on_status(f"🛡️ {city_name} übersprungen (API-Limit)")
-                continue
-
             city_info = CITY_DATABASE.get(city_name)
             if not city_info:
                 print(f"  [SKIP] {city_name} - nicht in CITY_DATABASE!")
@@ -834,36 +1449,29 @@ class SkyscannerAPI:
                 on_status(f"✈️ {date_str} {city_name} prüfen... ({ci+1}/{len(cities)})")
 
             print(f"  [SEARCH] {city_name} (entity={city_info['entity_id']})...")
-            details = self.get_specific_flight_details(city_info["entity_id"], departure, return_date)
+            details = self.get_specific_flight_details(city_info["entity_id"], departure, return_date,
+                                                       cache_only=self._is_blocked)
 
             if details is None:
                 print(f"  [RESULT] {city_name} -> None (API-Fehler)")
                 if on_status:
                     on_status(f"⚠️ {city_name} – kein Response")
+            elif details.get("negative"):
+                print(f"  [RESULT] {city_name} -> kürzlich geblockt (Negativ-Cache), übersprungen")
+            elif details.get("cache_only"):
+                print(f"  [SKIP] {city_name} -> übersprungen (403-Block aktiv, nicht im Cache)")
+                if on_status:
+                    on_status(f"🛡️ {city_name} übersprungen (API-Limit)")
             elif details.get("status") == "blocked":
                 self._is_blocked = True
-                print(f"  [RESULT] {city_name} -> 403 geblockt, restliche Cities übersprungen")
+                print(f"  [RESULT] {city_name} -> 403 geblockt, restliche Cities nur noch aus dem Cache")
                 if on_status:
                     on_status(f"🛡️ API-Limit erreicht bei {city_name}")
             elif details.get("status") == "ok":
                 is_early = details.get('early_departure', False)
                 early_tag = " [FRÜH]" if is_early else ""
                 print(f"  [RESULT] {city_name} -> {details['price']:.0f}€, Hin: {details.get('time')}, Rück: {details.get('return_time')}{early_tag}")
-                deal = FlightDeal(
-                    city=city_name,
-                    country=city_info["country"],
-                    price=details["price"],
-                    departure_date=departure.strftime("%Y-%m-%d"),
-                    return_date=return_date.strftime("%Y-%m-%d"),
-                    is_direct=False,
-                    url=self.build_flight_url(city_info["sky_code"], departure, return_date),
-                    flight_time=details.get("time", "??:??"),
-                    return_flight_time=details.get("return_time", "??:??"),
-                    latitude=city_info["lat"],
-                    longitude=city_info["lon"],
-                    early_departure=is_early,
-                    alternatives=details.get("alternatives", []),
-                )
+                deal = self._city_deal(city_name, city_info, details, departure, return_date)
                 deals.append(deal)
                 if on_deals:
                     on_deals([deal])
@@ -872,51 +1480,23 @@ class SkyscannerAPI:
                 if on_status:
                     on_status(f"💸 {city_name} – kein passender Flug")
 
-            time.sleep(random.uniform(0.5, 1.5))
-
         print(f"[CITY-SEARCH] Ergebnis: {len(deals)}/{len(cities)} Deals für {departure.strftime('%d.%m.')}")
         return deals
 
-    def run_city_search(self, cities: list[str], start_date: datetime, end_date: datetime,
-                        start_weekday: int = 4, duration: int = 2,
-                        cancel_check=None, on_deals=None, on_progress=None, on_status=None):
-        """Run-Methode für gezielte Stadtsuche"""
-        trips = self.generate_trips(start_date, end_date, start_weekday, duration)
-
-        def process_city_trip(dep_date, ret_date):
-            if cancel_check and cancel_check():
-                return []
-            # Eigene Session pro Worker → kein 403-Konflikt
-            worker = SkyscannerAPI(
-                origin_entity_id=self.VIENNA_ENTITY_ID,
-                adults=self.ADULTS,
-                start_hour=self.START_HOUR,
-                origin_sky_code=self.ORIGIN_SKY_CODE,
-                max_return_hour=self.MAX_RETURN_HOUR,
-            )
-            worker.MAX_PRICE = self.MAX_PRICE
-            try:
-                # on_deals wird direkt in search_specific_cities pro Stadt gefeuert
-                return worker.search_specific_cities(cities, dep_date, ret_date,
-                                                     cancel_check=cancel_check,
-                                                     on_deals=on_deals, on_status=on_status)
-            except Exception as e:
-                print(f"Error city search: {e}")
-                return []
-
-        with ThreadPoolExecutor(max_workers=3) as executor:
-            futures = {}
-            for dep_date, ret_date in trips:
-                if cancel_check and cancel_check():
-                    break
-                future = executor.submit(process_city_trip, dep_date, ret_date)
-                futures[future] = (dep_date, ret_date)
-
-            for future in as_completed(futures):
-                trip_deals = future.result()
-                self.deals.extend(trip_deals)
-                # on_deals wird bereits in search_specific_cities gefeuert, hier nur progress
-                if on_progress:
-                    on_progress(0, len(trips))
-
-        return self.deals
+    def run_city_trip(self, cities: list[str], task: TripTask, attempt: int = 0,
+                      cancel_check=None, on_deals=None, on_status=None) -> list[FlightDeal]:
+        """Stadtsuche für einen Trip auf eigenem Worker."""
+        if cancel_check and cancel_check():
+            return []
+        # Eigene Session pro Worker → kein 403-Konflikt
+        worker = self._spawn_worker()
+        try:
+            # on_deals wird direkt in search_specific_cities pro Stadt gefeuert
+            return worker.search_specific_cities(cities, task.departure, task.return_date,
+                                                 cancel_check=cancel_check,
+                                                 on_deals=on_deals, on_status=on_status)
+        except Exception as e:
+            print(f"Error city search: {e}")
+            return []
+        finally:
+            worker.close()
@@ -0,0 +1,165 @@
+"""
+Flight Scout Session Pool - vorgewärmte Skyscanner-Sessions für alle Worker.
+Ein Worker leiht sich eine Session (Cookies, Headers, Traveller-Context, Proxy)
+und gibt sie nach dem Trip zurück, statt pro Trip neu zu warmen.
+Cookie-Jars werden pro Proxy in SQLite gespeichert (database.save_session_jar),
+damit auch ein Neustart ohne Warmup auskommt.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+import requests
+from requests.cookies import create_cookie
+
+SESSION_POOL_SIZE = int(os.environ.get("SESSION_POOL_SIZE", "8"))  # Max. idle Sessions
+SESSION_MAX_AGE = int(os.environ.get("SESSION_MAX_AGE", "1200"))  # Sekunden bis Refresh
+
+
+@dataclass
+class WarmSession:
+    session: requests.Session
+    traveller_context: str
+    view_id: str
+    proxy: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    uses: int = 0
+    blocked: bool = False  # 403 gesehen -> nicht zurück in den Pool
+    restored: bool = False  # aus gespeichertem Cookie-Jar, ohne Warmup
+
+    def age(self) -> float:
+        return time.time() - self.created_at
+
+
+def jar_key(proxy: Optional[str]) -> str:
+    """Schlüssel des Cookie-Jars. Proxy-URLs enthalten Zugangsdaten, gespeichert wird nur ein Hash."""
+    if not proxy:
+        return "direct"
+    return "proxy:" + hashlib.sha256(proxy.encode()).hexdigest()[:16]
+
+
+def dump_cookies(jar) -> list[dict]:
+    """http.cookiejar-kompatibler Jar (requests und httpx) -> JSON-fähige Liste."""
+    return [
+        {"name": c.name, "value": c.value, "domain": c.domain, "path": c.path,
+         "expires": c.expires, "secure": c.secure}
+        for c in jar
+    ]
+
+
+def load_cookies(jar, cookies: list[dict]) -> int:
+    """Nicht abgelaufene Cookies in den Jar übernehmen, Anzahl zurück."""
+    now = time.time()
+    loaded = 0
+    for c in cookies:
+        if c["expires"] is not None and c["expires"] < now:
+            continue
+        jar.set_cookie(create_cookie(c["name"], c["value"], domain=c["domain"], path=c["path"],
+                                     expires=c["expires"], secure=c["secure"]))
+        loaded += 1
+    return loaded
+
+
+class SessionPool:
+    def __init__(self, factory: Callable[[], WarmSession], max_size: int = SESSION_POOL_SIZE,
+                 max_age: float = SESSION_MAX_AGE, on_blocked: Optional[Callable[[WarmSession], None]] = None):
+        self._factory = factory
+        self._on_blocked = on_blocked  # z.B. gespeicherten Cookie-Jar des Proxys verwerfen
+        self.max_size = max_size
+        self.max_age = max_age
+        self._idle: list[WarmSession] = []
+        self._lock = threading.Lock()
+        self.leased = 0
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.discarded = 0
+        self.restored = 0
+
+    def _take_idle(self, avoid_proxy: Optional[str] = None) -> Optional[WarmSession]:
+        """Jüngste idle Session (abgelaufene werden verworfen), None wenn keine da ist."""
+        ws = None
+        with self._lock:
+            stale, fresh = [], []
+            for candidate in self._idle:
+                (stale if candidate.age() > self.max_age else fresh).append(candidate)
+            self._idle = fresh
+            if self._idle:
+                index = len(self._idle) - 1
+                if avoid_proxy is not None:
+                    index = next((i for i in range(len(self._idle) - 1, -1, -1)
+                                  if self._idle[i].proxy != avoid_proxy), index)
+                ws = self._idle.pop(index)
+                self.hits += 1
+                self.leased += 1
+            self.expired += len(stale)
+        for s in stale:
+            s.session.close()
+        if ws is not None:
+            ws.uses += 1
+        return ws
+
+    def try_acquire(self, avoid_proxy: Optional[str] = None) -> Optional[WarmSession]:
+        """Nur eine idle Session ausleihen, nie warmen (None wenn keine frei ist)."""
+        return self._take_idle(avoid_proxy)
+
+    def acquire(self, avoid_proxy: Optional[str] = None) -> WarmSession:
+        """Idle Session ausleihen, sonst neue warmen (blockiert für den Warmup).
+        avoid_proxy: wenn möglich eine Session über einen anderen Proxy."""
+        ws = self._take_idle(avoid_proxy)
+        if ws is not None:
+            return ws
+        with self._lock:
+            self.misses += 1
+            self.leased += 1
+        try:
+            ws = self._factory()
+        except Exception:
+            with self._lock:
+                self.leased -= 1
+            raise
+        if ws.restored:
+            with self._lock:
+                self.restored += 1
+        ws.uses += 1
+        return ws
+
+    def release(self, ws: WarmSession):
+        """Session zurückgeben. Geblockte, zu alte oder überzählige werden verworfen."""
+        keep = not ws.blocked and ws.age() <= self.max_age
+        if ws.blocked and self._on_blocked is not None:
+            try:
+                self._on_blocked(ws)
+            except Exception as e:
+                print(f"  [SESSION] Cookie-Jar konnte nicht verworfen werden: {e}")
+        with self._lock:
+            self.leased -= 1
+            if keep and len(self._idle) < self.max_size:
+                self._idle.append(ws)
+                return
+            self.discarded += 1
+        ws.session.close()
+
+    def discard(self, ws: WarmSession):
+        ws.blocked = True
+        self.release(ws)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "max_size": self.max_size,
+                "max_age_s": self.max_age,
+                "idle": len(self._idle),
+                "leased": self.leased,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+                "expired": self.expired,
+                "discarded": self.discarded,
+                "restored_from_jar": self.restored,
+            }
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Test: HttpKVBackend gegen den lokalen Stand-in (cache_kv_server.py)
+Startet den Server auf einem freien Port und prüft get/set und Ablauf.
+Läuft ohne Netzwerk, direkt (python test_cache_kv.py) oder mit pytest.
+"""
+
+import time
+import zlib
+from datetime import datetime
+
+from cache_backend import CacheBackend, CacheRecord, HttpKVBackend
+from cache_kv_server import serve
+
+
+def _backend():
+    server = serve(0)  # Port 0 = freier Port
+    return server, HttpKVBackend(f"http://127.0.0.1:{server.server_address[1]}")
+
+
+def _record(ttl_hours: float) -> CacheRecord:
+    return CacheRecord(blob=zlib.compress(b'{"price":42}'), codec="zlib",
+                       created_at=datetime.utcnow().replace(microsecond=0), ttl_hours=ttl_hours)
+
+
+def test_set_and_get():
+    server, backend = _backend()
+    try:
+        record = _record(ttl_hours=3.0)
+        backend.put("detail_test/key", record, keep_hours=6.0)
+        stored = backend.get("detail_test/key")
+        assert stored == record, stored
+        assert backend.get("detail_missing") is None
+        assert backend.counts["errors"] == 0, backend.counts
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_expiry():
+    server, backend = _backend()
+    try:
+        # 1s Löschfrist (Minimum von X-Expire-Seconds)
+        backend.put("country_expiring", _record(ttl_hours=1 / 3600), keep_hours=0.0)
+        assert backend.get("country_expiring") is not None
+        time.sleep(1.5)
+        assert backend.get("country_expiring") is None
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_incomplete_backend_rejected():
+    class GetOnly(CacheBackend):
+        def get(self, key):
+            return None
+
+    try:
+        GetOnly()
+    except TypeError:
+        return
+    raise AssertionError("Backend ohne put() ließ sich anlegen")
+
+
+if __name__ == "__main__":
+    for test in (test_set_and_get, test_expiry, test_incomplete_backend_rejected):
+        test()
+        print(f"OK  {test.__name__}")
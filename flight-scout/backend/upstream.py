@@ -0,0 +1,677 @@
+"""
+Flight Scout Upstream - prozessweite Steuerung des Skyscanner-Traffics.
+Alle Jobs (Suche, Kalender, Alerts) teilen sich diese Objekte, damit zwei
+gleichzeitige Suchen nicht die doppelte Request-Rate erzeugen.
+"""
+
+import asyncio
+import heapq
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Optional
+from urllib.parse import urlsplit
+
+from metrics import LatencyRecorder, LatencyHistogram
+
+UPSTREAM_RATE = float(os.environ.get("UPSTREAM_RATE", "3.0"))  # Requests/s gesamt
+UPSTREAM_BURST = float(os.environ.get("UPSTREAM_BURST", "10"))
+PROXY_RATE = float(os.environ.get("PROXY_RATE", "2.0"))  # Requests/s pro Proxy (bzw. direkt)
+PROXY_BURST = float(os.environ.get("PROXY_BURST", "5"))
+
+# Gleichzeitige Trip-Worker (AIMD): wächst bei 200ern, halbiert sich bei 403
+CONCURRENCY_START = int(os.environ.get("CONCURRENCY_START", "3"))
+CONCURRENCY_MIN = int(os.environ.get("CONCURRENCY_MIN", "1"))
+CONCURRENCY_MAX = int(os.environ.get("CONCURRENCY_MAX", "12"))
+
+# Circuit-Breaker: öffnet, wenn in den letzten BREAKER_WINDOW API-Antworten der 403-Anteil
+# BREAKER_403_RATIO erreicht; danach nur Cache, nach BREAKER_OPEN_SECONDS einzelne Probes
+BREAKER_WINDOW = int(os.environ.get("BREAKER_WINDOW", "40"))
+BREAKER_MIN_CALLS = int(os.environ.get("BREAKER_MIN_CALLS", "10"))
+BREAKER_403_RATIO = float(os.environ.get("BREAKER_403_RATIO", "0.5"))
+BREAKER_OPEN_SECONDS = float(os.environ.get("BREAKER_OPEN_SECONDS", "300"))
+BREAKER_PROBES = int(os.environ.get("BREAKER_PROBES", "3"))  # Erfolgreiche Probes bis geschlossen
+
+# Hedging für Detail-Calls: keine Antwort binnen p90 -> gleicher Request über eine zweite Session
+DETAIL_HEDGE = os.environ.get("DETAIL_HEDGE", "0") == "1"
+HEDGE_PERCENTILE = float(os.environ.get("HEDGE_PERCENTILE", "90"))
+HEDGE_MIN_DELAY = float(os.environ.get("HEDGE_MIN_DELAY", "0.5"))  # Sekunden
+HEDGE_MAX_SHARE = float(os.environ.get("HEDGE_MAX_SHARE", "0.1"))  # Max. Anteil zusätzlicher Requests
+
+# Adaptive Timeouts: p99 der bisherigen Calls (pro Call-Typ und Proxy) x TIMEOUT_MULTIPLIER,
+# begrenzt auf TIMEOUT_MIN und die bisherigen festen Werte (15s Warmup, 30s API)
+ADAPTIVE_TIMEOUTS = os.environ.get("ADAPTIVE_TIMEOUTS", "1") == "1"
+TIMEOUT_PERCENTILE = float(os.environ.get("TIMEOUT_PERCENTILE", "99"))
+TIMEOUT_MULTIPLIER = float(os.environ.get("TIMEOUT_MULTIPLIER", "3"))
+TIMEOUT_MIN = float(os.environ.get("TIMEOUT_MIN", "4"))  # Sekunden
+TIMEOUT_MIN_SAMPLES = int(os.environ.get("TIMEOUT_MIN_SAMPLES", "30"))
+
+
+def proxy_label(proxy: Optional[str]) -> str:
+    """host:port ohne Credentials (für Logs und Admin-Stats)."""
+    if not proxy:
+        return "direct"
+    parts = urlsplit(proxy)
+    return f"{parts.hostname}:{parts.port}" if parts.hostname else "proxy"
+
+
+class TokenBucket:
+    """Token Bucket, der Schulden erlaubt: reserve() nimmt immer ein Token und
+    liefert die Wartezeit, bis es tatsächlich gedeckt ist."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, now: float) -> float:
+        self._refill(now)
+        self.tokens -= 1
+        return max(0.0, -self.tokens / self.rate)
+
+    def level(self, now: float) -> float:
+        self._refill(now)
+        return self.tokens
+
+
+class RateGovernor:
+    """Globales Budget plus ein Budget pro Proxy. Gewartet wird nur, wenn eines erschöpft ist."""
+
+    def __init__(self, rate: float = UPSTREAM_RATE, burst: float = UPSTREAM_BURST,
+                 proxy_rate: float = PROXY_RATE, proxy_burst: float = PROXY_BURST):
+        self.global_bucket = TokenBucket(rate, burst)
+        self.proxy_rate = proxy_rate
+        self.proxy_burst = proxy_burst
+        self._proxy_buckets: dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.throttled = 0
+        self.waited_s = 0.0
+
+    def reserve(self, proxy: Optional[str] = None) -> float:
+        """Ein Request-Slot reservieren, gibt die nötige Wartezeit in Sekunden zurück."""
+        key = proxy or "direct"
+        with self._lock:
+            now = time.monotonic()
+            bucket = self._proxy_buckets.get(key)
+            if bucket is None:
+                bucket = self._proxy_buckets[key] = TokenBucket(self.proxy_rate, self.proxy_burst)
+            delay = max(self.global_bucket.reserve(now), bucket.reserve(now))
+            self.requests += 1
+            if delay > 0:
+                self.throttled += 1
+                self.waited_s += delay
+            return delay
+
+    def has_budget(self) -> bool:
+        """Ist im globalen Budget jetzt ein Token frei (Request ginge ohne Warten raus)?"""
+        with self._lock:
+            return self.global_bucket.level(time.monotonic()) >= 1
+
+    def wait(self, proxy: Optional[str] = None, cancel_check=None) -> float:
+        delay = self.reserve(proxy)
+        deadline = time.monotonic() + delay
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or (cancel_check and cancel_check()):
+                break
+            time.sleep(min(remaining, 0.5))
+        return delay
+
+    async def wait_async(self, proxy: Optional[str] = None) -> float:
+        delay = self.reserve(proxy)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+
+    def stats(self) -> dict:
+        with self._lock:
+            now = time.monotonic()
+            return {
+                "rate_per_s": self.global_bucket.rate,
+                "burst": self.global_bucket.burst,
+                "tokens": round(self.global_bucket.level(now), 2),
+                "requests": self.requests,
+                "throttled": self.throttled,
+                "waited_s": round(self.waited_s, 1),
+                "per_proxy": {
+                    proxy_label(None if key == "direct" else key): round(bucket.level(now), 2)
+                    for key, bucket in self._proxy_buckets.items()
+                },
+                "proxy_rate_per_s": self.proxy_rate,
+            }
+
+
+GOVERNOR = RateGovernor()
+
+
+class AdaptiveConcurrency:
+    """Prozessweites AIMD-Limit für parallele Trip-Worker.
+    Jeder 200er erhöht das Limit um 1/limit (≈ +1 pro Runde), ein 403 halbiert es."""
+
+    DECREASE_COOLDOWN = 5.0  # Sekunden: ein 403-Schwall zählt nur einmal
+
+    def __init__(self, initial: int = CONCURRENCY_START, minimum: int = CONCURRENCY_MIN,
+                 maximum: int = CONCURRENCY_MAX):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = float(min(max(initial, self.minimum), self.maximum))
+        self.in_flight = 0
+        self._cond = threading.Condition()
+        self._last_decrease = 0.0
+        self.successes = 0
+        self.throttles = 0
+        self.decreases = 0
+
+    def try_acquire(self) -> bool:
+        with self._cond:
+            if self.in_flight >= int(self.limit):
+                return False
+            self.in_flight += 1
+            return True
+
+    def wait_for_slot(self, timeout: float):
+        with self._cond:
+            if self.in_flight >= int(self.limit):
+                self._cond.wait(timeout)
+
+    def release(self):
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def on_success(self):
+        with self._cond:
+            self.successes += 1
+            before = int(self.limit)
+            self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+            if int(self.limit) > before:
+                self._cond.notify_all()
+
+    def on_throttle(self):
+        with self._cond:
+            self.throttles += 1
+            now = time.monotonic()
+            if now - self._last_decrease < self.DECREASE_COOLDOWN:
+                return
+            self._last_decrease = now
+            self.limit = max(self.minimum, self.limit / 2)
+            self.decreases += 1
+            print(f"[CONCURRENCY] 403 -> Limit auf {int(self.limit)} reduziert")
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "limit": int(self.limit),
+                "limit_raw": round(self.limit, 2),
+                "in_flight": self.in_flight,
+                "min": self.minimum,
+                "max": self.maximum,
+                "successes": self.successes,
+                "throttles": self.throttles,
+                "decreases": self.decreases,
+            }
+
+
+CONCURRENCY = AdaptiveConcurrency()
+
+
+class CircuitOpen(Exception):
+    """Live-Request abgelehnt, weil der Circuit-Breaker offen ist (kein Upstream-Fehler)."""
+
+
+class CircuitBreaker:
+    """Prozessweiter Breaker über alle Jobs und beide Engines.
+    closed -> open bei zu vielen 403, open -> half_open nach open_seconds,
+    half_open: immer nur ein Probe-Request; probes Erfolge schließen, ein 403 öffnet wieder."""
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+    PROBE_TIMEOUT = 60.0  # Probe ohne Antwort (Exception) gibt den Slot danach frei
+
+    def __init__(self, window: int = BREAKER_WINDOW, min_calls: int = BREAKER_MIN_CALLS,
+                 ratio: float = BREAKER_403_RATIO, open_seconds: float = BREAKER_OPEN_SECONDS,
+                 probes: int = BREAKER_PROBES):
+        self.min_calls = min_calls
+        self.ratio = ratio
+        self.open_seconds = open_seconds
+        self.probes = max(1, probes)
+        self._outcomes: deque[bool] = deque(maxlen=window)  # True = 403
+        self._lock = threading.Lock()
+        self.state = self.CLOSED
+        self._opened_at = 0.0
+        self._probe_started: Optional[float] = None
+        self._probe_successes = 0
+        self.opened = 0
+        self.rejected = 0
+        self.probes_sent = 0
+
+    @property
+    def degraded(self) -> bool:
+        """Nicht geschlossen -> neue Suchen laufen im Cache-only-Modus."""
+        return self.state != self.CLOSED
+
+    def _open(self, now: float, reason: str):
+        self.state = self.OPEN
+        self._opened_at = now
+        self._probe_started = None
+        self.opened += 1
+        print(f"[BREAKER] Offen ({reason}) -> {self.open_seconds:.0f}s nur Cache")
+
+    def allow(self) -> bool:
+        """Darf ein Live-Request raus?"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            now = time.monotonic()
+            if self.state == self.OPEN:
+                if now - self._opened_at < self.open_seconds:
+                    self.rejected += 1
+                    return False
+                self.state = self.HALF_OPEN
+                self._probe_successes = 0
+                print("[BREAKER] Half-open -> Probe-Requests")
+            if self._probe_started is not None and now - self._probe_started < self.PROBE_TIMEOUT:
+                self.rejected += 1
+                return False
+            self._probe_started = now
+            self.probes_sent += 1
+            return True
+
+    def record(self, status_code: int):
+        """Status einer API-Antwort (alle POSTs, über _report_status)."""
+        blocked = status_code == 403
+        with self._lock:
+            now = time.monotonic()
+            if self.state == self.HALF_OPEN:
+                self._probe_started = None
+                if blocked:
+                    self._open(now, "Probe 403")
+                    return
+                self._probe_successes += 1
+                if self._probe_successes >= self.probes:
+                    self.state = self.CLOSED
+                    self._outcomes.clear()
+                    print("[BREAKER] Geschlossen -> Live-Traffic wieder frei")
+                return
+            if self.state == self.OPEN:
+                return  # Nachzügler von vor dem Öffnen
+            self._outcomes.append(blocked)
+            if len(self._outcomes) >= self.min_calls:
+                share = sum(self._outcomes) / len(self._outcomes)
+                if share >= self.ratio:
+                    self._open(now, f"403-Quote {share:.0%}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            window = len(self._outcomes)
+            return {
+                "state": self.state,
+                "window": window,
+                "ratio_403": round(sum(self._outcomes) / window, 3) if window else None,
+                "threshold": self.ratio,
+                "open_for_s": round(max(0.0, self.open_seconds - (time.monotonic() - self._opened_at)), 1)
+                if self.state == self.OPEN else None,
+                "opened": self.opened,
+                "rejected": self.rejected,
+                "probes": self.probes_sent,
+            }
+
+
+BREAKER = CircuitBreaker()
+
+
+class Hedger:
+    """Policy für gehedgte Detail-Calls. Schwelle = p90 der bisherigen Detail-POSTs (adaptiv);
+    ein Hedge geht nur raus, wenn Rate-Budget frei ist, der Breaker zu ist und höchstens
+    max_share der Detail-Calls gehedgt wurden."""
+
+    MIN_SAMPLES = 20
+    DEFAULT_DELAY = 3.0  # Sekunden, bis genug Messwerte da sind
+
+    def __init__(self, percentile: float = HEDGE_PERCENTILE, min_delay: float = HEDGE_MIN_DELAY,
+                 max_share: float = HEDGE_MAX_SHARE):
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.max_share = max_share
+        self.latency = LatencyRecorder()  # einzelne Detail-POSTs
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.fired = 0
+        self.won = 0
+        self.skipped = 0
+
+    def delay(self) -> float:
+        if self.latency.count < self.MIN_SAMPLES:
+            return self.DEFAULT_DELAY
+        return max(self.min_delay, self.latency.percentile(self.percentile))
+
+    def start(self):
+        with self._lock:
+            self.calls += 1
+
+    def try_hedge(self, session_available: bool = True) -> bool:
+        """session_available=False: keine warme Session frei, Hedge wird nur als übersprungen gezählt."""
+        with self._lock:
+            if (not session_available or BREAKER.degraded or self.fired >= self.max_share * self.calls
+                    or not GOVERNOR.has_budget()):
+                self.skipped += 1
+                return False
+            self.fired += 1
+            return True
+
+    def record_win(self):
+        with self._lock:
+            self.won += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = {"calls": self.calls, "fired": self.fired, "won": self.won, "skipped": self.skipped}
+        return {"enabled": DETAIL_HEDGE, "delay_s": round(self.delay(), 3), **counts,
+                "post_latency": self.latency.stats()}
+
+
+HEDGER = Hedger()
+
+
+class AdaptiveTimeouts:
+    """Latenz-Histogramme pro Call-Typ (warmup, everywhere, country, detail) und pro Proxy;
+    daraus der Timeout für den nächsten Call. Ein Proxy nutzt seine eigene Verteilung, sobald
+    genug Messwerte da sind, sonst die des Call-Typs, ganz am Anfang den festen Höchstwert.
+    Läuft mehr als MAX_TIMEOUT_SHARE der letzten Calls in den Timeout, ist Skyscanner insgesamt
+    langsamer geworden – dann wieder der feste Höchstwert, bis neue Messwerte da sind."""
+
+    CEILINGS = {"warmup": 15.0, "everywhere": 30.0, "country": 30.0, "detail": 30.0}
+    OUTCOME_WINDOW = 50
+    MAX_TIMEOUT_SHARE = 0.1
+
+    def __init__(self, enabled: bool = ADAPTIVE_TIMEOUTS, percentile: float = TIMEOUT_PERCENTILE,
+                 multiplier: float = TIMEOUT_MULTIPLIER, minimum: float = TIMEOUT_MIN,
+                 min_samples: int = TIMEOUT_MIN_SAMPLES):
+        self.enabled = enabled
+        self.percentile = percentile
+        self.multiplier = multiplier
+        self.minimum = minimum
+        self.min_samples = min_samples
+        self._by_kind = {kind: LatencyHistogram() for kind in self.CEILINGS}
+        self._by_proxy: dict[tuple[str, str], LatencyHistogram] = {}
+        # Pro Call-Typ: die letzten Ausgänge (True = Timeout)
+        self._outcomes = {kind: deque(maxlen=self.OUTCOME_WINDOW) for kind in self.CEILINGS}
+        self._timeouts = {kind: 0 for kind in self.CEILINGS}
+        self._lock = threading.Lock()
+
+    def _proxy_recorder(self, kind: str, proxy: Optional[str]) -> LatencyHistogram:
+        key = (kind, proxy_label(proxy))
+        with self._lock:
+            recorder = self._by_proxy.get(key)
+            if recorder is None:
+                recorder = self._by_proxy[key] = LatencyHistogram(window=256)
+        return recorder
+
+    def _from(self, recorder: LatencyHistogram, ceiling: float) -> Optional[float]:
+        if recorder.count < self.min_samples:
+            return None
+        return min(ceiling, max(self.minimum, recorder.percentile(self.percentile) * self.multiplier))
+
+    def _timeout_share(self, kind: str) -> float:
+        with self._lock:
+            outcomes = list(self._outcomes[kind])
+        return sum(outcomes) / len(outcomes) if outcomes else 0.0
+
+    def timeout(self, kind: str, proxy: Optional[str] = None) -> float:
+        ceiling = self.CEILINGS[kind]
+        if not self.enabled or self._timeout_share(kind) > self.MAX_TIMEOUT_SHARE:
+            return ceiling
+        for recorder in (self._proxy_recorder(kind, proxy), self._by_kind[kind]):
+            value = self._from(recorder, ceiling)
+            if value is not None:
+                return value
+        return ceiling
+
+    def record(self, kind: str, proxy: Optional[str], seconds: float):
+        self._by_kind[kind].record(seconds)
+        self._proxy_recorder(kind, proxy).record(seconds)
+        with self._lock:
+            self._outcomes[kind].append(False)
+
+    def record_timeout(self, kind: str, proxy: Optional[str], seconds: float):
+        with self._lock:
+            self._outcomes[kind].append(True)
+            self._timeouts[kind] += 1
+        print(f"  [TIMEOUT] {kind} über {proxy_label(proxy)} nach {seconds:.1f}s abgebrochen")
+
+    def stats(self) -> dict:
+        with self._lock:
+            by_proxy = list(self._by_proxy.items())
+            timeouts = dict(self._timeouts)
+        kinds = {
+            kind: {**recorder.stats(), "timeout_s": round(self.timeout(kind), 2), "timeouts": timeouts[kind],
+                   "recent_timeout_share": round(self._timeout_share(kind), 3)}
+            for kind, recorder in self._by_kind.items()
+        }
+        proxies: dict[str, dict] = {}
+        for (kind, label), recorder in by_proxy:
+            value = self._from(recorder, self.CEILINGS[kind]) if self.enabled else None
+            proxies.setdefault(label, {})[kind] = {**recorder.stats(), "timeout_s": round(value, 2) if value else None}
+        return {"enabled": self.enabled, "percentile": self.percentile, "multiplier": self.multiplier,
+                "min_s": self.minimum, "by_kind": kinds, "by_proxy": proxies}
+
+
+TIMEOUTS = AdaptiveTimeouts()
+
+
+class RetryLater(Exception):
+    """Work-Item soll frühestens nach `delay` Sekunden erneut laufen (z.B. nach 403).
+    Der Worker-Thread wird sofort frei für andere Trips."""
+
+    def __init__(self, delay: float, label: str = ""):
+        super().__init__(f"{label} retry in {delay:.0f}s")
+        self.delay = delay
+        self.label = label
+
+
+class DelayQueue:
+    """Min-Heap nach frühester Retry-Zeit."""
+
+    def __init__(self):
+        self._heap = []
+        self._seq = itertools.count()
+
+    def push(self, item, delay: float):
+        heapq.heappush(self._heap, (time.monotonic() + delay, next(self._seq), item))
+
+    def pop_ready(self) -> list:
+        now = time.monotonic()
+        ready = []
+        while self._heap and self._heap[0][0] <= now:
+            ready.append(heapq.heappop(self._heap)[2])
+        return ready
+
+    def next_ready_in(self) -> float:
+        return max(0.0, self._heap[0][0] - time.monotonic()) if self._heap else 0.0
+
+    def clear(self) -> int:
+        dropped = len(self._heap)
+        self._heap.clear()
+        return dropped
+
+    def __len__(self):
+        return len(self._heap)
+
+
+RETRY_STATS = {"deferred": 0, "resumed": 0, "dropped": 0}
+_retry_lock = threading.Lock()
+
+
+def _count_retry(key: str, n: int = 1):
+    if n:
+        with _retry_lock:
+            RETRY_STATS[key] += n
+
+
+def retry_stats() -> dict:
+    with _retry_lock:
+        waiting = RETRY_STATS["deferred"] - RETRY_STATS["resumed"] - RETRY_STATS["dropped"]
+        return {**RETRY_STATS, "waiting": waiting}
+
+
+def run_bounded(items, process, cancel_check=None):
+    """process(item, attempt) für alle Items parallel ausführen, so viele gleichzeitig
+    wie CONCURRENCY gerade erlaubt. Wirft process RetryLater, kommt das Item in eine
+    Delay-Queue und läuft später mit attempt + 1 erneut. Liefert (item, future) in
+    Fertigstellungs-Reihenfolge."""
+    pending = [(item, 0) for item in items]
+    deferred = DelayQueue()
+    running = {}
+
+    def run_one(item, attempt):
+        try:
+            return process(item, attempt)
+        finally:
+            CONCURRENCY.release()
+
+    with ThreadPoolExecutor(max_workers=CONCURRENCY.maximum) as executor:
+        while pending or running or deferred:
+            cancelled = bool(cancel_check and cancel_check())
+            if cancelled:
+                pending.clear()
+                dropped = deferred.clear()
+                if dropped:
+                    print(f"[RETRY] Abbruch: {dropped} zurückgestellte Trips verworfen")
+                _count_retry("dropped", dropped)
+            ready = deferred.pop_ready()
+            _count_retry("resumed", len(ready))
+            pending.extend(ready)
+
+            while pending and CONCURRENCY.try_acquire():
+                item, attempt = pending.pop(0)
+                running[executor.submit(run_one, item, attempt)] = (item, attempt)
+            if not running:
+                if deferred and not pending:
+                    time.sleep(min(deferred.next_ready_in(), 0.5))
+                elif pending:
+                    # Alle Slots von anderen Jobs belegt
+                    CONCURRENCY.wait_for_slot(0.5)
+                continue
+
+            done, _ = wait(running, timeout=0.5, return_when=FIRST_COMPLETED)
+            for future in done:
+                item, attempt = running.pop(future)
+                exc = future.exception()
+                if isinstance(exc, RetryLater):
+                    if cancel_check and cancel_check():
+                        continue
+                    print(f"[RETRY] {exc.label} -> zurückgestellt, neuer Versuch in {exc.delay:.0f}s")
+                    deferred.push((item, attempt + 1), exc.delay)
+                    _count_retry("deferred")
+                    continue
+                yield item, future
+
+
+class _Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        # Nur ein fertiges Upstream-Ergebnis wird geteilt. Exceptions des Leaders (RetryLater,
+        # CircuitOpen, Proxy-Fehler) und von seinem cancel_check abgebrochene Calls nicht
+        self.shared = False
+
+
+class SingleFlight:
+    """Request-Coalescing: laufen zwei identische Requests gleichzeitig (z.B. zwei Jobs
+    für denselben Freitag ab Wien), geht nur einer raus, der andere wartet auf dessen
+    Antwort. Funktioniert über Threads und Event-Loops hinweg. Endet der Leader ohne
+    teilbares Ergebnis, versuchen es die Wartenden selbst (einer wird neuer Leader)."""
+
+    def __init__(self):
+        self._calls: dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        self._stats: dict[str, dict] = {}
+
+    @staticmethod
+    def key(kind: str, body: dict) -> str:
+        """Normalisierter Request-Body als Schlüssel."""
+        return f"{kind}:{json.dumps(body, sort_keys=True, separators=(',', ':'))}"
+
+    def _join(self, key: str) -> tuple[_Call, bool]:
+        kind = key.split(":", 1)[0]
+        with self._lock:
+            stats = self._stats.setdefault(kind, {"upstream": 0, "shared": 0})
+            call = self._calls.get(key)
+            if call is not None:
+                stats["shared"] += 1
+                return call, False
+            call = self._calls[key] = _Call()
+            stats["upstream"] += 1
+            return call, True
+
+    def _finish(self, key: str, call: _Call, result=None, shared: bool = False):
+        with self._lock:
+            self._calls.pop(key, None)
+        call.result = result
+        call.shared = shared
+        call.event.set()
+
+    def _retry(self, key: str):
+        """Wartender bekommt kein Ergebnis -> zählt nicht als geteilt, versucht es selbst."""
+        with self._lock:
+            self._stats[key.split(":", 1)[0]]["shared"] -= 1
+
+    def do(self, key: str, fn, cancel_check=None):
+        while True:
+            call, leader = self._join(key)
+            if leader:
+                break
+            call.event.wait()
+            if call.shared:
+                return call.result
+            self._retry(key)
+        result, shared = None, False
+        try:
+            result = fn()
+            shared = not (cancel_check and cancel_check())
+            return result
+        finally:
+            self._finish(key, call, result, shared)
+
+    async def do_async(self, key: str, fn, cancel_check=None):
+        while True:
+            call, leader = self._join(key)
+            if leader:
+                break
+            # Leader kann in einem anderen Thread laufen -> Event pollen statt blockieren
+            while not call.event.is_set():
+                await asyncio.sleep(0.05)
+            if call.shared:
+                return call.result
+            self._retry(key)
+        result, shared = None, False
+        try:
+            result = await fn()
+            shared = not (cancel_check and cancel_check())
+            return result
+        finally:
+            self._finish(key, call, result, shared)
+
+    def stats(self) -> dict:
+        with self._lock:
+            per_kind = {
+                kind: {**s, "saved_rate": round(s["shared"] / (s["upstream"] + s["shared"]), 3)}
+                for kind, s in self._stats.items()
+            }
+            return {
+                "in_flight": len(self._calls),
+                "saved_total": sum(s["shared"] for s in self._stats.values()),
+                "by_kind": per_kind,
+            }
+
+
+SINGLE_FLIGHT = SingleFlight()